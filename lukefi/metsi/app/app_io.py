@@ -34,7 +34,9 @@ class MetsiConfiguration(SimpleNamespace):
     measured_trees = False
     strata = True
     strata_origin = StrataOrigin.INVENTORY
+    vectorized_input = False
     multiprocessing = False
+    workers = None
 
     def __init__(self, **kwargs):
         """Initialize the configuration with defaults and user-provided values."""
@@ -52,13 +54,15 @@ class MetsiConfiguration(SimpleNamespace):
     def _convert_to_config(self, **kwargs):
         """Convert input values to their appropriate types or enums."""
 
-        config_types: dict[str, type[str] | type[bool]] = {
+        config_types: dict[str, type[str] | type[bool] | type[int]] = {
             'control_file': str,
             'input_path': str,
             'target_directory': str,
             'measured_trees': bool,
             'strata': bool,
-            'multiprocessing': bool
+            'vectorized_input': bool,
+            'multiprocessing': bool,
+            'workers': int
         }
         config_enums: dict[str, type[StringConfigEnum] | type[IntConfigEnum]] = {
             'run_modes': RunMode,
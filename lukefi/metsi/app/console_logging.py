@@ -9,3 +9,35 @@ def runtime_now() -> float:
 
 def print_logline(message: str):
     print(f"{runtime_now()} {message}")
+
+
+class ProgressReporter:
+    """
+    Throttled console progress reporting for long running loops. The progress line is rewritten in place at most
+    once per `interval` seconds, instead of on every step.
+
+    Reporting can be disabled process wide with the class attribute `enabled`, eg. in worker processes whose progress
+    is reported by the parent process.
+    """
+    enabled = True
+
+    def __init__(self, label: str, total: int, interval: float = 1.0):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.interval_ns = int(interval * 1000000000)
+        self._last_report = 0
+
+    def update(self, steps: int = 1):
+        self.done += steps
+        now = time.time_ns()
+        if now - self._last_report >= self.interval_ns or self.done >= self.total:
+            self._last_report = now
+            self._print(end="")
+
+    def finish(self):
+        self._print(end="\n")
+
+    def _print(self, end: str):
+        if ProgressReporter.enabled:
+            print(f"\r{runtime_now()} {self.label} {self.done}/{self.total}", end=end, flush=True)
@@ -3,12 +3,18 @@ import os
 import pickle
 import importlib.util
 from collections.abc import Iterator, Callable
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, repeat
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, BinaryIO, Optional
 import numpy as np
 import jsonpickle
-from lukefi.metsi.data.formats.forest_builder import VMI13Builder, VMI12Builder, XMLBuilder, GeoPackageBuilder
-from lukefi.metsi.data.formats.io_utils import stands_to_csv_content, csv_content_to_stands, \
+from lukefi.metsi.data.formats.forest_builder import VMIBuilder, VMI13Builder, VMI12Builder, XMLBuilder, \
+    GeoPackageBuilder
+from lukefi.metsi.data.formats import columnar
+from lukefi.metsi.data.formats.csv_columns import read_csv_stands
+from lukefi.metsi.data.formats.stand_store import StandStore
+from lukefi.metsi.data.formats.io_utils import stands_to_csv_content, \
     stands_to_rst_content, stands_to_rsts_content, mela_par_file_content
 from lukefi.metsi.app.app_io import MetsiConfiguration
 from lukefi.metsi.app.app_types import ExportableContainer
@@ -60,6 +66,8 @@ def stand_writer(container_format: str) -> StandWriter:
         return npy_writer
     if container_format == "npz":
         return npz_writer
+    if container_format == "soa":
+        return soa_writer
     raise MetsiException(f"Unsupported container format '{container_format}'")
 
 
@@ -88,14 +96,17 @@ def file_contents(file_path: str | Path) -> str:
         return f.read()
 
 # solve FdmReader
-def fdm_reader(container_format: str) -> StandReader:
-    """Resolve a reader function for FDM data containers"""
+def fdm_reader(container_format: str, vectorized: bool = False) -> StandReader:
+    """Resolve a reader function for FDM data containers. CSV trees and strata are read into ReferenceTrees and
+    Strata containers if `vectorized` is set."""
     if container_format == "pickle":
         return pickle_reader
     if container_format == "json":
         return json_reader
     if container_format == "csv":
-        return lambda path: csv_content_to_stands(csv_file_reader(path))
+        return lambda path: csv_reader(path, vectorized)
+    if container_format == "soa":
+        return soa_reader
     raise MetsiException(f"Unsupported container format '{container_format}'")
 
 # solve ObjectReader
@@ -107,18 +118,37 @@ def object_reader(container_format: str) -> Any:
     raise MetsiException(f"Unsupported container format '{container_format}'")
 
 # SourceDataReaders
-def external_reader(state_format: str, conversions, **builder_flags) -> StandReader:
-    """Resolve and prepare a reader function for non-FDM data formats"""
-    if state_format == "vmi13":
-        return lambda path: VMI13Builder(builder_flags, conversions.get('vmi13', {}), vmi_file_reader(path)).build()
-    if state_format == "vmi12":
-        return lambda path: VMI12Builder(builder_flags, conversions.get('vmi12', {}), vmi_file_reader(path)).build()
+def external_reader(state_format: str, conversions, workers: int = 1, **builder_flags) -> StandReader:
+    """Resolve and prepare a reader function for non-FDM data formats. VMI sources are converted in `workers`
+    processes."""
+    if state_format in ("vmi13", "vmi12"):
+        builder_type = VMI13Builder if state_format == "vmi13" else VMI12Builder
+        if workers > 1:
+            return lambda path: vmi_parallel_reader(builder_type(builder_flags, conversions.get(state_format, {})),
+                                                    path, workers)
+        return lambda path: vmi_stands(
+            builder_type(builder_flags, conversions.get(state_format, {})), vmi_file_stream(path))
+    if state_format in ("xml", "gpkg"):
+        stream = external_stream(state_format, conversions, **builder_flags)
+        return lambda path: list(stream(path))
+    raise MetsiException(f"Unsupported state format '{state_format}'")
+
+
+def external_stream(state_format: str, conversions, **builder_flags) -> Callable[[str | Path], Iterator[ForestStand]]:
+    """Resolve and prepare a function building the stands of non-FDM data formats lazily while reading the file"""
+    if state_format in ("vmi13", "vmi12"):
+        builder_type = VMI13Builder if state_format == "vmi13" else VMI12Builder
+        return lambda path: builder_type(builder_flags, conversions.get(state_format, {})).stream(vmi_file_stream(path))
     if state_format == "xml":
-        return lambda path: XMLBuilder(builder_flags, conversions.get('xml', {}), xml_file_reader(path)).build()
+        return lambda path: XMLBuilder(builder_flags, conversions.get('xml', {})).stream(path)
     if state_format == "gpkg":
-        return lambda path: GeoPackageBuilder(builder_flags, conversions.get('gpkg', {}), str(path)).build()
+        return lambda path: GeoPackageBuilder(builder_flags, conversions.get('gpkg', {}), str(path)).stream()
     raise MetsiException(f"Unsupported state format '{state_format}'")
 
+
+def _reader_workers(app_config: MetsiConfiguration) -> int:
+    return (app_config.workers or os.cpu_count() or 1) if app_config.multiprocessing else 1
+
 # source data main entry function
 def read_stands_from_file(app_config: MetsiConfiguration, conversions: dict[str, Conversion]) -> StandList:
     """
@@ -129,16 +159,46 @@ def read_stands_from_file(app_config: MetsiConfiguration, conversions: dict[str,
     :return: list of ForestStands as computational units for simulation
     """
     if app_config.state_format == "fdm":
-        return fdm_reader(app_config.state_input_container.value)(app_config.input_path)
+        return fdm_reader(app_config.state_input_container.value,
+                          bool(app_config.vectorized_input))(app_config.input_path)
     if app_config.state_format in ("vmi13", "vmi12", "xml", "gpkg"):
         return external_reader(
             app_config.state_format.value,
             conversions,
+            workers=_reader_workers(app_config),
             strata=app_config.strata,
             measured_trees=app_config.measured_trees,
-            strata_origin=app_config.strata_origin)(app_config.input_path)
+            strata_origin=app_config.strata_origin,
+            vectorized=app_config.vectorized_input)(app_config.input_path)
     raise MetsiException(f"Unsupported state format '{app_config.state_format}'")
 
+
+def open_stands(app_config: MetsiConfiguration, conversions: dict[str, Conversion],
+                streamed: bool = False) -> StandList | StandStore | Iterator[ForestStand]:
+    """
+    Open the input stands for random access when possible. FDM stands of a `soa` container are opened as a StandStore,
+    which builds stands from the memory-mapped file only when they are accessed. If `streamed` is set, the stands of
+    VMI, XML and GeoPackage inputs are built lazily while iterating, unless VMI input is read with vectorized_input or
+    in worker processes. Other inputs are read into a list of ForestStands with read_stands_from_file.
+
+    :param app_config: Mela2Configuration
+    :param streamed: build the stands of external formats lazily when possible
+    :return: StandStore, list of ForestStands or iterator of ForestStands
+    """
+    if app_config.state_format == "fdm" and app_config.state_input_container == "soa":
+        return StandStore(app_config.input_path)
+    if streamed and app_config.state_format in ("vmi13", "vmi12", "xml", "gpkg"):
+        vmi = app_config.state_format in ("vmi13", "vmi12")
+        if not (vmi and (app_config.vectorized_input or _reader_workers(app_config) > 1)):
+            return external_stream(
+                app_config.state_format.value,
+                conversions,
+                strata=app_config.strata,
+                measured_trees=app_config.measured_trees,
+                strata_origin=app_config.strata_origin,
+                vectorized=app_config.vectorized_input)(app_config.input_path)
+    return read_stands_from_file(app_config, conversions)
+
 # io_util?
 def scan_dir_for_file(dirpath: Path, basename: str, suffixes: list[str]) -> Optional[tuple[Path, str]]:
     """
@@ -171,7 +231,7 @@ def read_schedule_payload_from_directory(schedule_path: Path) -> ForestOpPayload
     :param schedule_path: Path for a schedule directory
     :return: OperationPayload with computational_unit and collected_data if found
     """
-    scan_result = scan_dir_for_file(schedule_path, "unit_state", ["csv", "json", "pickle"])
+    scan_result = scan_dir_for_file(schedule_path, "unit_state", ["csv", "json", "pickle", "soa"])
     # unit_state_file, input_container = scan_dir_for_file(schedule_path, "unit_state", ["csv", "json", "pickle"])
     if scan_result is not None:
         unit_state_file, input_container = scan_result
@@ -328,6 +388,11 @@ def npz_writer(filepath: Path, container: ExportableContainer):
     np.savez(filepath, allow_pickle=True, *[np.array(stand) for stand in stands])
 
 
+def soa_writer(filepath: Path, container: ExportableContainer[ForestStand]):
+    with open(filepath, 'wb') as f:
+        columnar.write_stands(f, container.export_objects)
+
+
 def par_writer(filepath: Path, var_names: list[str]):
     def to_par_filepath(filepath: Path):
         dir_parts = list(filepath.parts)[0:-1]
@@ -340,6 +405,117 @@ def vmi_file_reader(file: str | Path) -> list[str]:
         return input_file.readlines()
 
 
+def vmi_file_stream(file: str | Path) -> Iterator[str]:
+    with open(file, 'r', encoding='utf-8') as input_file:
+        yield from input_file
+
+
+def _decode_line(line: bytes) -> str:
+    text = line.decode('utf-8')
+    return text[:-2] + '\n' if text.endswith('\r\n') else text
+
+
+def vmi_range_stream(file: str | Path, start: int, end: int) -> Iterator[str]:
+    """Lines of a file beginning within the byte range [start, end). The start must be at the beginning of a line."""
+    with open(file, 'rb') as input_file:
+        input_file.seek(start)
+        position = start
+        while position < end:
+            line = input_file.readline()
+            if not line:
+                break
+            position += len(line)
+            yield _decode_line(line)
+
+
+def _next_test_area(input_file: BinaryIO, offset: int, builder: VMIBuilder) -> Optional[int]:
+    """Byte position of the first stand row of the first test area beginning after the line containing offset"""
+    input_file.seek(offset - 1)
+    position = offset - 1 + len(input_file.readline())
+    previous = None
+    for line in iter(input_file.readline, b''):
+        row = builder.parse_row(_decode_line(line))
+        try:
+            row_type, test_area = builder.find_row_type(row), builder.test_area(row)
+        except (IndexError, TypeError, ValueError):
+            row_type, test_area = None, None
+        if row_type == 1 and previous is not None and test_area != previous:
+            return position
+        previous = test_area if test_area is not None else previous
+        position += len(line)
+    return None
+
+
+def vmi_file_ranges(file: str | Path, builder: VMIBuilder, parts: int) -> list[tuple[int, int]]:
+    """Split a VMI source file into at most `parts` byte ranges of about equal size. Each range after the first begins
+    with the first stand row of a test area, so that the rows of a test area are within one range."""
+    size = os.path.getsize(file)
+    boundaries = [0]
+    with open(file, 'rb') as input_file:
+        for i in range(1, parts):
+            offset = size * i // parts
+            if offset <= boundaries[-1]:
+                continue
+            boundary = _next_test_area(input_file, offset, builder)
+            if boundary is None:
+                break
+            boundaries.append(boundary)
+    return list(zip(boundaries, boundaries[1:] + [size]))
+
+
+_vmi_builder: Optional[VMIBuilder] = None
+
+
+def vmi_stands(builder: VMIBuilder, data_rows: Iterator[str], first_stand_id: int = 1) -> StandList:
+    """Build the stands of VMI data rows, with their trees and strata vectorized if the builder flag `vectorized` is
+    set"""
+    if builder.builder_flags.get('vectorized'):
+        return builder.build_vectorized(data_rows, first_stand_id)
+    return list(builder.stream(data_rows, first_stand_id))
+
+
+def _init_vmi_worker(builder: VMIBuilder):
+    global _vmi_builder  # pylint: disable=global-statement
+    _vmi_builder = builder
+
+
+def _worker_builder() -> VMIBuilder:
+    if _vmi_builder is None:
+        raise MetsiException("VMI builder of the worker process is not initialized")
+    return _vmi_builder
+
+
+def _count_vmi_stands(file: str | Path, start: int, end: int) -> int:
+    return sum(map(_worker_builder().is_stand_row, vmi_range_stream(file, start, end)))
+
+
+def _build_vmi_range(file: str | Path, start: int, end: int, first_stand_id: int) -> StandList:
+    return vmi_stands(_worker_builder(), vmi_range_stream(file, start, end), first_stand_id)
+
+
+def vmi_parallel_reader(builder: VMIBuilder, file: str | Path, workers: int) -> StandList:
+    """
+    Build the stands of a VMI source file in worker processes. The file is split at test area boundaries into byte
+    ranges, which are converted with the stream of the builder. The stand rows of each range are first counted
+    without parsing the rows, so that each range is built with the order number of its first stand in the file. The
+    stands are numbered and returned in the order of the file, as with a sequential build.
+
+    :param builder: VMI builder used in the workers
+    :param file: VMI source file
+    :param workers: number of worker processes
+    :return: the stands of the file
+    """
+    ranges = vmi_file_ranges(file, builder, workers * 4)
+    starts, ends = [start for start, _ in ranges], [end for _, end in ranges]
+    result: StandList = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_vmi_worker, initargs=(builder,)) as executor:
+        counts = list(executor.map(_count_vmi_stands, repeat(file), starts, ends))
+        first_stand_ids = accumulate(counts[:-1], initial=1)
+        for stands in executor.map(_build_vmi_range, repeat(file), starts, ends, first_stand_ids):
+            result.extend(stands)
+    return result
+
+
 def xml_file_reader(file: str | Path) -> str:
     with open(file, 'r', encoding='utf-8') as input_file:
         return input_file.read()
@@ -349,6 +525,10 @@ def csv_file_reader(file: str | Path) -> list[list[str]]:
     with open(file, 'r', encoding='utf-8') as input_file:
         return list(csv.reader(input_file, delimiter=';'))
 
+def csv_reader(file_path: str | Path, vectorized: bool = False) -> StandList:
+    with open(file_path, 'r', encoding='utf-8') as input_file:
+        return read_csv_stands(input_file, vectorized)
+
 ## ObjectFileReaders start ##
 def json_reader(file_path: str | Path) -> StandList:
     return jsonpickle.decode(file_contents(file_path)) # type: ignore
@@ -358,6 +538,11 @@ def pickle_reader(file_path: str | Path) -> StandList:
     with open(file_path, 'rb') as f:
         return pickle.load(f)
 
+def soa_reader(file_path: str | Path) -> StandList:
+    """Read stands of a columnar container, with their trees and strata as ReferenceTrees and Strata containers
+    memory-mapped from the file"""
+    return columnar.read_stands(file_path)
+
 def npy_file_reader(file_path: str | Path) -> np.ndarray:
     with open(file_path, 'rb') as f:
         return np.load(f, allow_pickle=True)
@@ -2,31 +2,34 @@ import os
 import sys
 import copy
 import traceback
-from typing import Callable
+from collections.abc import Iterable
+from typing import Callable, Optional
 from pathlib import Path
 
 from lukefi.metsi.app.preprocessor import (
     preprocess_stands,
     slice_stands_by_percentage,
-    slice_stands_by_size
+    slice_stands_by_size,
+    stream_stands_by_size
 )
 
 from lukefi.metsi.app.app_io import parse_cli_arguments, MetsiConfiguration, generate_application_configuration, RunMode
 from lukefi.metsi.app.app_types import SimResults
 from lukefi.metsi.domain.forestry_types import StandList
 from lukefi.metsi.app.export import export_files, export_preprocessed
-from lukefi.metsi.app.file_io import prepare_target_directory, read_stands_from_file, \
+from lukefi.metsi.app.file_io import prepare_target_directory, open_stands, \
     read_full_simulation_result_dirtree, write_full_simulation_result_dirtree, read_control_module
 from lukefi.metsi.app.post_processing import post_process_alternatives
 from lukefi.metsi.app.simulator import simulate_alternatives
 from lukefi.metsi.app.console_logging import print_logline
 from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.formats.stand_store import StandStore
 
 
 def preprocess(config: MetsiConfiguration, control: dict, stands: StandList) -> StandList:
-    _ = config
     print_logline("Preprocessing...")
-    result = preprocess_stands(stands, control)
+    workers = (config.workers or os.cpu_count() or 1) if config.multiprocessing else 1
+    result = preprocess_stands(stands, control, workers)
     return result
 
 
@@ -96,6 +99,15 @@ def remove_existing_export_files(config: MetsiConfiguration, control: dict):
             print_logline(f"Warning: Failed to delete file {file_path}: {e}")
 
 
+def slice_input[S: (StandList, StandStore)](stands: S, pct: Optional[float], sz: Optional[int]) -> list[S]:
+    """Split the input stands by percentage or size when either is given"""
+    if pct is not None:
+        return slice_stands_by_percentage(stands, pct)
+    if sz is not None:
+        return slice_stands_by_size(stands, sz)
+    return [stands]
+
+
 mode_runners: dict[RunMode, Callable] = {
     RunMode.PREPROCESS: preprocess,
     RunMode.EXPORT_PREPRO: export_prepro,
@@ -123,20 +135,25 @@ def main() -> int:
         remove_existing_export_files(app_config, control_structure)
 
         if app_config.run_modes[0] in [RunMode.PREPROCESS, RunMode.SIMULATE]:
-            # 1) read full stand list
-            full_stands = read_stands_from_file(app_config, control_structure.get('conversions', {}))
-
-            # 2) split it if slice_* parameters are given
             pct = control_structure.get('slice_percentage')
             sz = control_structure.get('slice_size')
-            if pct is not None:
-                stand_sublists = slice_stands_by_percentage(full_stands, pct)
+
+            # 1) read full stand list, or stream it when sliced by size
+            full_stands = open_stands(app_config, control_structure.get('conversions', {}),
+                                      streamed=pct is None and sz is not None)
+
+            # 2) split it if slice_* parameters are given
+            stand_sublists: Iterable[StandList] | list[StandStore]
+            if isinstance(full_stands, StandStore):
+                stand_sublists = slice_input(full_stands, pct, sz)
+            elif isinstance(full_stands, list):
+                stand_sublists = slice_input(full_stands, pct, sz)
             elif sz is not None:
-                stand_sublists = slice_stands_by_size(full_stands, sz)
+                stand_sublists = stream_stands_by_size(full_stands, sz)
             else:
-                stand_sublists = [full_stands]
+                stand_sublists = [list(full_stands)]
 
-            input_data: list[StandList] | SimResults = stand_sublists
+            input_data: Iterable[StandList] | list[StandStore] | SimResults = stand_sublists
 
         elif app_config.run_modes[0] in [RunMode.POSTPROCESS, RunMode.EXPORT]:
             input_data = read_full_simulation_result_dirtree(app_config.input_path)
@@ -148,7 +165,19 @@ def main() -> int:
         return 1
 
     # now run each slice in turn
-    for _, stands in enumerate(input_data):
+    slices = iter(input_data)
+    while True:
+        # the stands of streamed and stored input are read while iterating the slices
+        try:
+            stands = next(slices, None)
+            if stands is None:
+                break
+            current = list(stands) if isinstance(stands, StandStore) else stands
+        except Exception:  # pylint: disable=broad-exception-caught
+            traceback.print_exc()
+            print("Aborting run...")
+            return 1
+
         # -- optional slice folder (disabled for now) --
         # slice_target = os.path.join(app_config.target_directory, f"slice_{slice_idx+1}")
         # prepare_target_directory(slice_target)
@@ -161,7 +190,6 @@ def main() -> int:
         cfg.target_directory = app_config.target_directory
 
         # feed this sub‐list of stands through the normal run_modes
-        current = stands
         for mode in cfg.run_modes:
             runner = mode_runners[mode]
             current = runner(cfg, control_structure, current)
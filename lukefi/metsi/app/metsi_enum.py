@@ -98,12 +98,14 @@ class StateInputFormat(StringConfigEnum):
     PICKLE = 'pickle'
     JSON = 'json'
     CSV = 'csv'
+    SOA = 'soa'
 
 
 class StateOutputFormat(StringConfigEnum):
     PICKLE = 'pickle'
     JSON = 'json'
     CSV = 'csv'
+    SOA = 'soa'
 
 
 class DerivedDataOutputFormat(StringConfigEnum):
@@ -6,6 +6,7 @@ from lukefi.metsi.app.app_types import ForestOpPayload
 from lukefi.metsi.app.metsi_enum import FormationStrategy, EvaluationStrategy
 from lukefi.metsi.app.console_logging import print_logline
 from lukefi.metsi.domain.forestry_types import StandList
+from lukefi.metsi.domain.utils.parameter_tables import validate_parameter_files
 from lukefi.metsi.sim.runners import run_full_tree_strategy, run_partial_tree_strategy, depth_first_evaluator, \
     chain_evaluator
 from lukefi.metsi.sim.core_types import CollectedData, Runner, SimConfiguration, Evaluator
@@ -61,6 +62,7 @@ def resolve_evaluation_strategy(source: EvaluationStrategy) -> Evaluator[ForestO
 
 def simulate_alternatives(config: MetsiConfiguration, control, stands: StandList):
     simconfig = SimConfiguration(**control)
+    validate_parameter_files(simconfig.operation_file_params)
     formation_strategy = resolve_formation_strategy(config.formation_strategy)
     evaluation_strategy = resolve_evaluation_strategy(config.evaluation_strategy)
     result = run_stands(stands, simconfig, formation_strategy, evaluation_strategy)
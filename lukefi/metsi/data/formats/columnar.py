@@ -0,0 +1,272 @@
+""" Columnar container of ForestStands.
+
+The stands, reference trees and tree strata of a stand list are stored as typed NumPy columns in an uncompressed NPZ
+archive. Stand attributes are columns of one row per stand, with a boolean `.missing` column for the attributes which
+are None for some stands. Reference trees and tree strata are stored as the concatenated columns of their
+ReferenceTrees and Strata containers, with an `.offsets` column giving the row range of each stand.
+
+As the archive members are stored uncompressed, they are read by memory-mapping the archive file at the positions of
+the array data, so that the tree and strata columns of the stands are views of the mapped file. """
+import struct
+import zipfile
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, BinaryIO, Optional
+import numpy as np
+import numpy.typing as npt
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.enums.internal import (DrainageCategory, LandUseCategory, OwnerCategory, SiteType,
+                                              SoilPeatlandCategory)
+from lukefi.metsi.data.model import ForestStand
+from lukefi.metsi.data.vector_model import ReferenceTrees, Strata, VectorData
+from lukefi.metsi.data.vectorize import vectorize_objects
+
+STAND_COLUMNS: dict[str, npt.DTypeLike] = {
+    "identifier": np.str_,
+    "management_unit_id": np.int64,
+    "stand_id": np.int64,
+    "year": np.int32,
+    "area": np.float64,
+    "area_weight": np.float64,
+    "geo_location": np.dtype((np.float64, (3,))),
+    "geo_location_system": np.str_,
+    "degree_days": np.float64,
+    "owner_category": np.int32,
+    "land_use_category": np.int32,
+    "soil_peatland_category": np.int32,
+    "site_type_category": np.int32,
+    "tax_class_reduction": np.int32,
+    "tax_class": np.int32,
+    "drainage_category": np.int32,
+    "drainage_feasibility": np.bool_,
+    "drainage_year": np.int32,
+    "fertilization_year": np.int32,
+    "soil_surface_preparation_year": np.int32,
+    "natural_regeneration_feasibility": np.bool_,
+    "regeneration_area_cleaning_year": np.int32,
+    "development_class": np.int32,
+    "artificial_regeneration_year": np.int32,
+    "young_stand_tending_year": np.int32,
+    "pruning_year": np.int32,
+    "cutting_year": np.int32,
+    "forestry_centre_id": np.int32,
+    "forest_management_category": np.float64,
+    "method_of_last_cutting": np.int32,
+    "municipality_id": np.int32,
+    "dominant_storey_age": np.float64,
+    "area_weight_factors": np.dtype((np.float64, (2,))),
+    "fra_category": np.str_,
+    "land_use_category_detail": np.str_,
+    "auxiliary_stand": np.bool_,
+    "monthly_temperatures": np.float64,
+    "monthly_rainfall": np.float64,
+    "sea_effect": np.float64,
+    "lake_effect": np.float64,
+    "basal_area": np.float64,
+}
+
+# stand attributes stored as the concatenated values of their lists with the offsets of each stand
+LIST_COLUMNS = ("monthly_temperatures", "monthly_rainfall")
+
+ENUM_COLUMNS: dict[str, type] = {
+    "owner_category": OwnerCategory,
+    "land_use_category": LandUseCategory,
+    "soil_peatland_category": SoilPeatlandCategory,
+    "site_type_category": SiteType,
+    "drainage_category": DrainageCategory,
+}
+
+CONTAINERS: dict[str, type[ReferenceTrees] | type[Strata]] = {
+    "reference_trees": ReferenceTrees,
+    "tree_strata": Strata,
+}
+
+
+def _stand_value(stand: ForestStand, name: str) -> Any:
+    if name in ("geo_location", "geo_location_system"):
+        if stand.geo_location is None:
+            return None
+        if name == "geo_location":
+            return tuple(np.nan if v is None else v for v in stand.geo_location[:3])
+        return stand.geo_location[3]
+    return getattr(stand, name)
+
+
+def _column(values: list[Any], dtype: npt.DTypeLike) -> dict[str, np.ndarray]:
+    """ Column of the values, with None replaced by the defaults of vectorized data, and its missing mask if any of
+    the values is None """
+    dtype = np.dtype(dtype)
+    missing = np.fromiter((v is None for v in values), np.bool_, len(values))
+    default = VectorData.to_default(None, dtype.base)
+    result = {"": np.array([default if v is None else v for v in values], dtype.base).reshape((-1,) + dtype.shape)}
+    if missing.any():
+        result[".missing"] = missing
+    return result
+
+
+def _ragged_column(values: list[Optional[list]], dtype: npt.DTypeLike) -> dict[str, np.ndarray]:
+    lengths = [0 if v is None else len(v) for v in values]
+    result = {
+        "": np.array([x for v in values if v is not None for x in v], dtype),
+        ".offsets": np.concatenate(([0], np.cumsum(lengths, dtype=np.int64))),
+    }
+    missing = np.fromiter((v is None for v in values), np.bool_, len(values))
+    if missing.any():
+        result[".missing"] = missing
+    return result
+
+
+def _default_column(dtype: npt.DTypeLike, size: int) -> np.ndarray:
+    dtype = np.dtype(dtype)
+    return np.full((size,) + dtype.shape, VectorData.to_default(None, dtype.base), dtype.base)
+
+
+def _container_columns(containers: list[VectorData], dtypes: dict[str, npt.DTypeLike]) -> dict[str, np.ndarray]:
+    """ Concatenated attribute columns of the containers, and the offsets of the rows of each container. Attributes
+    missing from some of the containers are filled with the defaults of their types, and all attributes are present
+    when the containers are empty. """
+    sizes = [c.size for c in containers]
+    names = [k for k in dtypes if sum(sizes) == 0 or any(getattr(c, k, None) is not None for c in containers)]
+    result = {
+        k: np.concatenate([getattr(c, k, None) if getattr(c, k, None) is not None else _default_column(dtypes[k], n)
+                           for c, n in zip(containers, sizes)] or [_default_column(dtypes[k], 0)])
+        for k in names
+    }
+    result[".offsets"] = np.concatenate(([0], np.cumsum(sizes, dtype=np.int64)))
+    return result
+
+
+def stand_columns(stands: list[ForestStand]) -> dict[str, np.ndarray]:
+    """ Columns of the stands, keyed by `stands/`, `reference_trees/` and `tree_strata/` prefixed attribute names.
+    Trees and strata are taken from the SoA containers of vectorized stands and vectorized from the object lists of
+    other stands. """
+    result = {}
+    for name, dtype in STAND_COLUMNS.items():
+        values = [_stand_value(stand, name) for stand in stands]
+        columns = _ragged_column(values, dtype) if name in LIST_COLUMNS else _column(values, dtype)
+        result.update({f"stands/{name}{suffix}": column for suffix, column in columns.items()})
+    for attr, container in CONTAINERS.items():
+        soas = [vectorize_objects(getattr(stand, attr), container) if getattr(stand, f"{attr}_soa") is None
+                else getattr(stand, f"{attr}_soa") for stand in stands]
+        columns = _container_columns(soas, container().dtypes)
+        result.update({f"{attr}/{name}" if name[0] != "." else f"{attr}{name}": column
+                       for name, column in columns.items()})
+    return result
+
+
+def _management_category(value: float) -> int | float:
+    return int(value) if value.is_integer() else value
+
+
+def _geo_location(value: tuple) -> tuple:
+    return tuple(None if np.isnan(x) else x for x in value)
+
+
+def _python_values(columns: dict[str, np.ndarray], name: str, rows: npt.NDArray[np.intp]) -> list[Any]:
+    """ Stand attribute values of a stand column at the given rows, with the missing values as None """
+    column = columns.get(f"stands/{name}")
+    if column is None:
+        return [None] * len(rows)
+    if name in LIST_COLUMNS:
+        offsets = columns[f"stands/{name}.offsets"]
+        values = [column[start:end].tolist() for start, end in zip(offsets[rows].tolist(), offsets[rows + 1].tolist())]
+    elif column.ndim > 1:
+        values = [tuple(v) for v in column[rows].tolist()]
+    else:
+        values = column[rows].tolist()
+    convert: Optional[Callable[[Any], Any]] = ENUM_COLUMNS.get(name)
+    if name == "forest_management_category":
+        convert = _management_category
+    elif name == "geo_location":
+        convert = _geo_location
+    missing = columns.get(f"stands/{name}.missing")
+    if missing is not None:
+        values = [None if m else v for v, m in zip(values, missing[rows].tolist())]
+    if convert is not None:
+        values = [None if v is None else convert(v) for v in values]
+    return values
+
+
+def stand_count(columns: dict[str, np.ndarray]) -> int:
+    """ Number of stands of the columns """
+    return len(columns["stands/identifier"])
+
+
+def stands_from_columns(columns: dict[str, np.ndarray],
+                        rows: Optional[npt.NDArray[np.intp]] = None) -> list[ForestStand]:
+    """ ForestStands of the columns of stand_columns, or of the given stand rows of the columns. The reference trees
+    and tree strata of the stands are set as ReferenceTrees and Strata containers viewing the row ranges of the stands
+    in the columns, while the reference_trees and tree_strata lists are left empty. """
+    rows = np.arange(stand_count(columns)) if rows is None else np.asarray(rows, np.intp)
+    values = {name: _python_values(columns, name, rows) for name in STAND_COLUMNS}
+    locations = zip(values.pop("geo_location"), values.pop("geo_location_system"))
+    stands = []
+    for i, location in enumerate(locations):
+        stand = ForestStand()
+        for name, column in values.items():
+            setattr(stand, name, column[i])
+        stand.geo_location = None if location[0] is None else (*location[0], location[1])
+        stands.append(stand)
+    for attr, container in CONTAINERS.items():
+        prefix = f"{attr}/"
+        soa = container().from_columns({k[len(prefix):]: v for k, v in columns.items() if k.startswith(prefix)})
+        offsets = columns[f"{attr}.offsets"]
+        for stand, start, end in zip(stands, offsets[rows].tolist(), offsets[rows + 1].tolist()):
+            setattr(stand, f"{attr}_soa", soa.take(slice(start, end)))
+    return stands
+
+
+def write_columns(file: BinaryIO, columns: dict[str, np.ndarray]):
+    """ Write the columns into an uncompressed NPZ archive """
+    np.savez(file, allow_pickle=False, **columns)
+
+
+def _data_offset(file: BinaryIO, info: zipfile.ZipInfo) -> int:
+    """ Position of the data of an archive member within the archive file, after its local file header """
+    file.seek(info.header_offset)
+    header = file.read(30)
+    if header[:4] != b"PK\x03\x04":
+        raise MetsiException(f"Invalid local file header of archive member {info.filename}")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    return info.header_offset + 30 + name_length + extra_length
+
+
+def mapped_columns(path: str | Path) -> dict[str, np.ndarray]:
+    """ Columns of an NPZ archive written with write_columns, as copy-on-write memory maps of the archive file.
+    Compressed members are read into memory. """
+    result = {}
+    with open(path, "rb") as file, zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            name = info.filename.removesuffix(".npy")
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    result[name] = np.lib.format.read_array(member, allow_pickle=False)
+                continue
+            file.seek(_data_offset(file, info))
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+            if dtype.hasobject:
+                raise MetsiException(f"Object array {name} can not be memory-mapped")
+            if int(np.prod(shape)) == 0:
+                result[name] = np.empty(shape, dtype)
+                continue
+            mapped = np.memmap(path, dtype, "c", file.tell(), shape, "F" if fortran_order else "C")
+            result[name] = mapped.view(np.ndarray)
+    return result
+
+
+def write_stands(file: BinaryIO, stands: list[ForestStand]):
+    """ Write the stands into a columnar container """
+    write_columns(file, stand_columns(stands))
+
+
+def read_stands(path: str | Path) -> list[ForestStand]:
+    """ Read the stands of a columnar container, with their trees and strata mapped from the file """
+    return stands_from_columns(mapped_columns(path))
+
+
+__all__ = ['STAND_COLUMNS', 'stand_columns', 'stand_count', 'stands_from_columns', 'write_columns', 'mapped_columns',
+           'write_stands', 'read_stands']
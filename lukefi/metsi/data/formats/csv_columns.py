@@ -0,0 +1,258 @@
+""" Columnar reading of FDM CSV files.
+
+The file is read in blocks of lines. Stand rows are converted one at a time with ForestStand.from_csv_row. The tree
+and stratum rows of a block are parsed at once into typed columns, which are converted into ReferenceTree and
+TreeStratum objects, or into ReferenceTrees and Strata containers, with the same values as with the row-wise
+from_csv_row conversions. """
+import csv
+import io
+from enum import IntEnum
+from itertools import compress
+from typing import Any, TextIO
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.enums.internal import Storey, TreeSpecies
+from lukefi.metsi.data.model import ForestStand, ReferenceTree, TreeStratum
+from lukefi.metsi.data.vector_model import ReferenceTrees, Strata, VectorData
+
+# kinds of the CSV columns, besides enum types
+STR = "str"
+FLOAT = "float"
+INT = "int"
+INT_OR_ZERO = "int_or_zero"
+FLAG = "flag"
+POSITION = "position"  # three consecutive float columns, missing values as 0.0
+
+MISSING = "-nan"  # mark of missing values while parsing
+
+Kind = str | type[IntEnum]
+
+TREE_COLUMNS: dict[str, tuple[int, Kind]] = {
+    "identifier": (1, STR),
+    "species": (2, TreeSpecies),
+    "origin": (3, INT),
+    "stems_per_ha": (4, FLOAT),
+    "breast_height_diameter": (5, FLOAT),
+    "height": (6, FLOAT),
+    "measured_height": (7, FLOAT),
+    "breast_height_age": (8, FLOAT),
+    "biological_age": (9, FLOAT),
+    "saw_log_volume_reduction_factor": (10, FLOAT),
+    "pruning_year": (11, INT_OR_ZERO),
+    "age_when_10cm_diameter_at_breast_height": (12, INT),
+    "tree_number": (13, INT),
+    "stand_origin_relative_position": (14, POSITION),
+    "lowest_living_branch_height": (17, FLOAT),
+    "management_category": (18, INT),
+    "tree_category": (19, STR),
+    "sapling": (20, FLAG),
+    "storey": (21, Storey),
+    "tree_type": (22, STR),
+    "tuhon_ilmiasu": (23, STR),
+}
+
+STRATUM_COLUMNS: dict[str, tuple[int, Kind]] = {
+    "identifier": (1, STR),
+    "species": (2, TreeSpecies),
+    "origin": (3, INT),
+    "stems_per_ha": (4, FLOAT),
+    "mean_diameter": (5, FLOAT),
+    "mean_height": (6, FLOAT),
+    "breast_height_age": (7, FLOAT),
+    "biological_age": (8, FLOAT),
+    "basal_area": (9, FLOAT),
+    "saw_log_volume_reduction_factor": (10, FLOAT),
+    "cutting_year": (11, INT),
+    "age_when_10cm_diameter_at_breast_height": (12, INT),
+    "tree_number": (13, INT),
+    "stand_origin_relative_position": (14, POSITION),
+    "lowest_living_branch_height": (17, FLOAT),
+    "management_category": (18, INT),
+    "sapling_stems_per_ha": (19, FLOAT),
+    "sapling_stratum": (20, FLAG),
+    "storey": (21, Storey),
+}
+
+
+def _csv_frame(lines: list[str], columns: dict[str, tuple[int, Kind]]) -> dict[int, np.ndarray]:
+    """ Typed columns of CSV rows by column index. Numeric columns are parsed as floats with missing values as NaN and
+    text columns as objects with missing values as NaN. Floats are parsed as float() parses them.
+
+    The rows are parsed with numpy loadtxt, with the missing values marked as -nan. Blocks with quoted fields or with
+    the mark as a value are parsed with the slower round-trip converter of pandas instead. """
+    dtypes = {index: object if kind in (STR, FLAG) else np.float64 for index, kind in columns.values()}
+    for index, kind in columns.values():
+        if kind == POSITION:
+            dtypes.update({index + 1: np.float64, index + 2: np.float64})
+    text = "".join(lines)
+    if '"' in text or f";{MISSING}" in text:
+        width = max(max(dtypes) + 1, lines[0].count(";") + 1)
+        frame = pd.read_csv(io.StringIO(text), sep=";", header=None, names=range(width), usecols=list(dtypes),
+                            dtype=dtypes, na_values=["None"], keep_default_na=False, float_precision="round_trip")
+        return {index: frame[index].to_numpy() for index in dtypes}
+    # consecutive missing values share their separator, so the first pass marks every other one of them
+    marked = text.replace(";None;", f";{MISSING};").replace(";None;", f";{MISSING};")
+    marked = marked.replace(";None\n", f";{MISSING}\n")
+    if marked.endswith(";None"):
+        marked = marked[:-len("None")] + MISSING
+    try:
+        array = np.loadtxt(io.StringIO(marked), delimiter=";", usecols=list(dtypes), ndmin=1,
+                           dtype=[(str(index), dtype) for index, dtype in dtypes.items()])
+    except ValueError as e:
+        raise MetsiException(f"Invalid CSV rows: {e}") from e
+    result = {}
+    for index, dtype in dtypes.items():
+        column = array[str(index)]
+        if dtype is object:
+            column[column == MISSING] = np.nan
+        result[index] = column
+    return result
+
+
+def _integers(column: npt.NDArray[np.float64], missing: npt.NDArray[np.bool_], default: int) -> npt.NDArray[np.int64]:
+    return np.where(missing, default, column).astype(np.int64)
+
+
+def _members(enum_type: type[IntEnum], values: npt.NDArray[np.int64]) -> npt.NDArray[np.object_]:
+    """ Enum members of the values, converting each distinct value once """
+    keys, inverse = np.unique(values, return_inverse=True)
+    return np.array([enum_type(key) for key in keys.tolist()], dtype=object)[inverse.reshape(-1)]
+
+
+def _validate_members(enum_type: type[IntEnum], values: npt.NDArray[np.int64]):
+    """ Raise MetsiException if some of the values are not values of the enum type """
+    invalid = set(np.unique(values).tolist()) - {member.value for member in enum_type}
+    if invalid:
+        raise MetsiException(f"Invalid {enum_type.__name__} values in CSV: {sorted(invalid)}")
+
+
+def _object_column(frame: dict[int, np.ndarray], index: int, kind: Kind) -> list[Any]:
+    """ Values of a column as from_csv_row converts them """
+    if kind == POSITION:
+        positions = [frame[i] for i in range(index, index + 3)]
+        return list(zip(*(np.where(np.isnan(p) | (p == 0.0), 0.0, p).tolist() for p in positions)))
+    column = frame[index]
+    missing = pd.isna(column)
+    if kind == FLAG:
+        return (column == "True").tolist()
+    if kind == INT_OR_ZERO:
+        return _integers(column, missing, 0).tolist()
+    values: np.ndarray
+    if isinstance(kind, type):
+        values = np.empty(len(column), dtype=object)
+        values[~missing] = _members(kind, column[~missing].astype(np.int64))
+    elif kind == FLOAT:
+        values = column.astype(object)
+    elif kind == INT:
+        values = _integers(column, missing, 0).astype(object)
+    else:
+        values = column.copy()
+    values[missing] = None
+    return values.tolist()
+
+
+def _vector_column(frame: dict[int, np.ndarray], index: int, kind: Kind) -> np.ndarray:
+    """ Column as vectorize_objects gives it for the values of from_csv_row """
+    if kind == POSITION:
+        positions = [frame[i] for i in range(index, index + 3)]
+        return np.stack([np.where(np.isnan(p), 0.0, p) for p in positions], axis=1)
+    column = frame[index]
+    missing = pd.isna(column)
+    if kind == FLAG:
+        return column == "True"
+    if kind == FLOAT:
+        return column
+    if kind == STR:
+        values = column.copy()
+        values[missing] = VectorData.to_default(None, np.str_)
+        return values.astype(np.str_)
+    if kind == INT_OR_ZERO:
+        return _integers(column, missing, 0)
+    result = _integers(column, missing, VectorData.to_default(None, np.int64))
+    if isinstance(kind, type):
+        _validate_members(kind, result[~missing])
+    return result
+
+
+class _Rows:
+    """ Tree or stratum rows of the CSV file, converted block by block into the objects or containers of their
+    stands """
+
+    def __init__(self, columns: dict[str, tuple[int, Kind]], object_type: type, attr: str):
+        self.columns = columns
+        self.object_type = object_type
+        self.attr = attr
+        self.vectors: list[tuple[dict[str, np.ndarray], npt.NDArray[np.intp]]] = []
+
+    def convert(self, lines: list[str], owners: npt.NDArray[np.intp], stands: list[ForestStand], vectorized: bool):
+        """ Convert rows into attribute columns if vectorized, and otherwise into objects appended to the lists of
+        their stands. Owners are the positions of the stands of the rows in ascending order. """
+        if not lines:
+            return
+        frame = _csv_frame(lines, self.columns)
+        if vectorized:
+            self.vectors.append((
+                {name: _vector_column(frame, index, kind) for name, (index, kind) in self.columns.items()}, owners))
+            return
+        converted = {name: _object_column(frame, index, kind) for name, (index, kind) in self.columns.items()}
+        converted["stand"] = list(map(stands.__getitem__, owners.tolist()))
+        names = list(converted)
+        objects = [self.object_type(**dict(zip(names, values))) for values in zip(*converted.values())]
+        positions, starts = np.unique(owners, return_index=True)
+        for position, start, end in zip(positions.tolist(), starts.tolist(), starts[1:].tolist() + [len(objects)]):
+            getattr(stands[position], self.attr).extend(objects[start:end])
+
+    def assign_containers(self, stands: list[ForestStand], container: type[ReferenceTrees] | type[Strata]):
+        """ Set the converted attribute columns as containers of their stands. Other attributes of the objects are
+        filled with their defaults. """
+        result = container()
+        owners = np.concatenate([owners for _, owners in self.vectors] or [np.empty(0, np.intp)])
+        if self.vectors:
+            columns = {name: np.concatenate([columns[name] for columns, _ in self.vectors]) for name in self.columns}
+            for name in self.object_type().__dict__.keys() & result.dtypes.keys() - columns.keys():
+                columns[name] = np.full(len(owners), VectorData.to_default(None, result.dtypes[name]),
+                                        result.dtypes[name])
+            result.from_columns(columns)
+        else:
+            result.from_columns({})
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(owners, minlength=len(stands))))).tolist()
+        for stand, start, end in zip(stands, offsets, offsets[1:]):
+            setattr(stand, f"{self.attr}_soa", result.take(slice(start, end)))
+
+
+def read_csv_stands(file: TextIO, vectorized: bool = False, blocksize: int = 1 << 24) -> list[ForestStand]:
+    """
+    Read the stands of an FDM CSV file in one pass. The file is read in blocks of lines of about the given number of
+    characters. The tree and stratum rows of a block are converted at once.
+
+    :param file: FDM CSV file
+    :param vectorized: set the trees and strata of the stands as ReferenceTrees and Strata containers, leaving the
+        reference_trees and tree_strata lists empty
+    :param blocksize: number of characters read at once
+    :return: the stands of the file
+    """
+    stands: list[ForestStand] = []
+    rows = {
+        "tree": _Rows(TREE_COLUMNS, ReferenceTree, "reference_trees"),
+        "stratum": _Rows(STRATUM_COLUMNS, TreeStratum, "tree_strata"),
+    }
+    for lines in iter(lambda: file.readlines(blocksize), []):
+        row_types = np.array([line.partition(";")[0] for line in lines])
+        is_stand = row_types == "stand"
+        owners = np.cumsum(is_stand) + (len(stands) - 1)
+        stands.extend(ForestStand.from_csv_row(row)
+                      for row in csv.reader(compress(lines, is_stand), delimiter=";"))
+        for row_type, chunk in rows.items():
+            selected = row_types == row_type
+            if selected.any() and owners[selected][0] < 0:
+                raise MetsiException(f"CSV {row_type} row before the first stand row")
+            chunk.convert(list(compress(lines, selected)), owners[selected], stands, vectorized)
+    if vectorized:
+        rows["tree"].assign_containers(stands, ReferenceTrees)
+        rows["stratum"].assign_containers(stands, Strata)
+    return stands
+
+
+__all__ = ['TREE_COLUMNS', 'STRATUM_COLUMNS', 'read_csv_stands']
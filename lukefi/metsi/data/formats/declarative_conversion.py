@@ -1,4 +1,10 @@
+from collections.abc import Sequence
+from functools import cached_property
+from operator import itemgetter
 from typing import Any, Tuple, Callable, List
+from lukefi.metsi.app.utils import MetsiException
+
+CompiledConversion = Callable[[Sequence[Any], Any], Any]
 
 
 class Conversion():
@@ -11,24 +17,45 @@ class Conversion():
     def extract_index(self, data: List):
         return (data[i] for i in self.indices)
 
+    @cached_property
+    def compiled(self) -> CompiledConversion:
+        """ The conversion as a function of the source data and the object, specialized for the number of indices
+            and whether the object is passed to the declared function """
+        f = self.conf_f
+        with_object = self.object_type is not None
+        if not self.indices:
+            if with_object:
+                return lambda data, obj: f(obj)
+            return lambda data, obj: f()
+        if len(self.indices) == 1:
+            i = self.indices[0]
+            if with_object:
+                return lambda data, obj: f(data[i], obj)
+            return lambda data, obj: f(data[i])
+        getter = itemgetter(*self.indices)
+        if with_object:
+            return lambda data, obj: f(*getter(data), obj)
+        return lambda data, obj: f(*getter(data))
+
     def __call__(self, data: List, obj: Any):
-        datavars = self.extract_index(data)
-        obj = () if self.object_type is None else (obj,)
-        input_ = [*datavars, *obj]
-        return self.conf_f(*input_)
+        return self.compiled(data, obj)
 
 
 class ConversionMapper():
 
     def __init__(self, conversion_declaration: dict[str, Conversion]):
         self.declaration = conversion_declaration
+        self._compiled: dict[type, tuple[tuple[str, CompiledConversion], ...]] = {}
 
-    def _filter_declaration_by_instance(self, obj: Any) -> dict[str, Conversion]:
-        subset = {}
-        for k, dconv in self.declaration.items():
-            if not dconv.object_type or (dconv.object_type and isinstance(obj, dconv.object_type)):
-                subset.update({k: dconv})
-        return subset
+    def conversions_of(self, object_type: type) -> tuple[tuple[str, CompiledConversion], ...]:
+        """ The declared conversions applying to objects of the given type, in declaration order, as compiled
+            conversions by attribute name. The declaration is filtered once per type. """
+        result = self._compiled.get(object_type)
+        if result is None:
+            result = tuple((k, dconv.compiled) for k, dconv in self.declaration.items()
+                           if not dconv.object_type or issubclass(object_type, dconv.object_type))
+            self._compiled[object_type] = result
+        return result
 
     def apply_conversions[T](self, obj: T, source: list[Any]) -> T:
         """ Applies declared conversions with source data and
@@ -36,11 +63,26 @@ class ConversionMapper():
 
             return: Given object updated with the conversion results
             """
-        subset = self._filter_declaration_by_instance(obj)
-        for k, dconv in subset.items():
-            conv_result = dconv(source, obj)
-            setattr(obj, k, conv_result)
+        for k, conversion in self.conversions_of(type(obj)):
+            setattr(obj, k, conversion(source, obj))
         return obj
 
+    def apply_column_conversions(self, object_type: type, source: Sequence[Any]) -> dict[str, list[Any]]:
+        """ Applies the declared conversions of objects of the given type to each of the source data rows, for
+            objects represented as columns. Conversions declared for the objects of the type need the objects and
+            can not be applied.
+
+            return: The conversion results of the rows by attribute name
+            """
+        result = {}
+        for k, dconv in self.declaration.items():
+            if not dconv.object_type:
+                conversion = dconv.compiled
+                result[k] = [conversion(row, None) for row in source]
+            elif issubclass(object_type, dconv.object_type):
+                raise MetsiException(f"Declared conversion of '{k}' needs {object_type.__name__} objects and can not "
+                                     "be applied to columns")
+        return result
+
 
 __all__ = ['ConversionMapper', 'Conversion']
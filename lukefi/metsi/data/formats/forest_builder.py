@@ -1,10 +1,14 @@
-from collections.abc import Sequence, Iterable
+from collections.abc import Callable, Sequence, Iterable, Iterator
 from abc import ABC, abstractmethod
-from typing import overload
+from functools import partial
+from pathlib import Path
+from typing import IO, overload
 import xml.etree.ElementTree as ET
+import numpy as np
 from pandas import DataFrame, Series
 
 from lukefi.metsi.app.console_logging import print_logline
+from lukefi.metsi.app.utils import MetsiException
 from lukefi.metsi.data.enums.internal import OwnerCategory
 from lukefi.metsi.data.formats.vmi_const import (
     VMI12_STAND_INDICES,
@@ -15,8 +19,9 @@ from lukefi.metsi.data.formats.vmi_const import (
     VMI13_TREE_INDICES
 )
 from lukefi.metsi.data.model import ForestStand, ReferenceTree, TreeStratum
+from lukefi.metsi.data.vector_model import ReferenceTrees, Strata, VectorData
 from lukefi.metsi.data.conversion import vmi2internal, fc2internal
-from lukefi.metsi.data.formats import smk_util, util, vmi_util, gpkg_util
+from lukefi.metsi.data.formats import smk_util, util, vmi_util, gpkg_util, vmi_columns
 from lukefi.metsi.data.formats.declarative_conversion import ConversionMapper
 
 
@@ -30,6 +35,11 @@ class ForestBuilder(ABC):
 
 class VMIBuilder(ForestBuilder):
     """Shared functionality of VMI* builders"""
+    stand_indices: dict
+    stratum_indices: dict
+    tree_indices: dict
+    # number of rows parsed at once in build_vectorized
+    ROW_BLOCK = 10000
 
     def __init__(self, builder_flags: dict, declared_conversions: dict, data_rows: Iterable):
         """
@@ -170,13 +180,246 @@ class VMIBuilder(ForestBuilder):
         result = self.conversion_reader.apply_conversions(result, data_row)
         return result
 
+    def parse_row(self, raw: str) -> Sequence[str]:
+        """Pre-parse a raw data row into the form the indices of the format address"""
+        return raw
+
+    def stream(self, data_rows: Iterable[str], first_stand_id: int = 1) -> Iterator[ForestStand]:
+        """Build ForestStands with associated ReferenceTree and TreeStratum entries lazily from raw data rows.
+
+        Rows are consumed one at a time and the stands of a test area are yielded when the rows of the next test area
+        begin, so that only the rows and stands of one test area are held at a time. The rows of each stand must
+        follow its type 1 row within its test area, as in the VMI source files. The stands are the same as with
+        build() using the same rows.
+
+        :param data_rows: Iterable raw data rows from a VMI source file
+        :param first_stand_id: order number of the first stand of the rows within the source file
+        """
+        open_stands: dict[str, ForestStand] = {}
+        test_area = None
+        stand_id = first_stand_id
+        for raw in data_rows:
+            row = self.parse_row(raw)
+            row_type = self.addressable_row_type(row)
+            if row_type == 1:
+                stand = self.convert_stand_entry(self.stand_indices, row, stand_id)
+                stand_id += 1
+                stand_test_area = self.test_area(row)
+                if stand_test_area != test_area:
+                    yield from open_stands.values()
+                    open_stands = {}
+                    test_area = stand_test_area
+                open_stands[stand.identifier] = stand
+            elif row_type == 2 and self.builder_flags['strata']:
+                stratum = self.convert_stratum_entry(self.stratum_indices, row)
+                stratum.stand = self._open_stand(open_stands, row)
+                stratum.stand.tree_strata.append(stratum)
+            elif row_type == 3 and self.builder_flags['measured_trees']:
+                tree = self.convert_tree_entry(self.tree_indices, row)
+                tree.stand = self._open_stand(open_stands, row)
+                tree.stand.reference_trees.append(tree)
+        yield from open_stands.values()
+
+    def build_vectorized(self, data_rows: Iterable[str], first_stand_id: int = 1) -> list[ForestStand]:
+        """Build ForestStands with their reference trees and tree strata as ReferenceTrees and Strata containers.
+
+        Stand rows are converted one at a time as with stream(). Tree and stratum rows are converted in bulk, field by
+        field over all rows of the type, and grouped to the stands by their stand identifiers. The containers hold the
+        same values as the vectorized stands of stream(), while the reference_trees and tree_strata lists are left
+        empty. Declared conversions are applied to the containers for the attributes they hold.
+
+        :param data_rows: Iterable raw data rows from a VMI source file
+        :param first_stand_id: order number of the first stand of the rows within the source file
+        """
+        # the raw tree and stratum rows are kept instead of the parsed rows, which would be many more objects to hold
+        stands: list[ForestStand] = []
+        raw_rows: dict[int, list[str]] = {2: [], 3: []}
+        for raw in data_rows:
+            row = self.parse_row(raw)
+            row_type = self.addressable_row_type(row)
+            if row_type == 1:
+                stands.append(self.convert_stand_entry(self.stand_indices, row, first_stand_id + len(stands)))
+            elif row_type in raw_rows:
+                raw_rows[row_type].append(raw)
+        tree_rows = raw_rows[3] if self.builder_flags['measured_trees'] else []
+        stratum_rows = raw_rows[2] if self.builder_flags['strata'] else []
+        trees, tree_stands = self._vectorized(ReferenceTrees(), ReferenceTree, self.convert_tree_columns,
+                                              self.tree_indices, tree_rows)
+        strata, stratum_stands = self._vectorized(Strata(), TreeStratum, self.convert_stratum_columns,
+                                                  self.stratum_indices, stratum_rows)
+        self._group_to_stands(stands, tree_stands, trees, "reference_trees_soa")
+        self._group_to_stands(stands, stratum_stands, strata, "tree_strata_soa")
+        return stands
+
+    def convert_tree_columns(self, source: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        """Columns converted as with convert_tree_entry out of given source field columns of VMI type 3 data rows"""
+        size = len(source["tree_number"])
+        ages = (source["d13_age"], source["age_increase"], source["total_age"])
+        return {
+            "tree_category": source["tree_category"],
+            "identifier": vmi_columns.joined(
+                source["lohkomuoto"], source["section_y"], source["section_x"], source["test_area_number"],
+                source["stand_number"], source["tree_number"], np.full(size, "tree")),
+            "species": vmi_columns.converted(vmi2internal.convert_species, np.int32, source["species"]),
+            "breast_height_diameter": vmi_columns.converted(
+                vmi_util.transform_tree_diameter, np.float64, source["diameter"]),
+            "breast_height_age": vmi_columns.converted(
+                lambda *values: vmi_util.determine_tree_age_values(*values)[0], np.float64, *ages),
+            "biological_age": vmi_columns.converted(
+                lambda *values: vmi_util.determine_tree_age_values(*values)[1], np.float64, *ages),
+            "pruning_year": np.zeros(size, np.int16),
+            "age_when_10cm_diameter_at_breast_height": np.zeros(size, np.int16),
+            "origin": np.zeros(size, np.int32),
+            "tree_number": vmi_columns.converted(
+                lambda value: util.parse_type(value, int), np.int32, source["tree_number"]),
+            "stand_origin_relative_position": np.zeros((size, 3)),
+            "lowest_living_branch_height": vmi_columns.converted(
+                lambda value: util.get_or_default(util.parse_type(value, float), 0.0) / 10.0,
+                np.float64, source["living_branches_height"]),
+            "management_category": vmi_columns.converted(
+                vmi_util.determine_tree_management_category, np.int32, source["latvuskerros"]),
+            "storey": vmi_columns.converted(vmi_util.determine_storey_for_tree, np.int32, source["latvuskerros"]),
+            "tree_type": vmi_columns.converted(vmi_util.determine_tree_type, np.dtype("U20"), source["tree_type"]),
+            "tuhon_ilmiasu": vmi_columns.converted(
+                lambda value: None if value in ('  ', ' ', '.', '') else value.strip(),
+                np.dtype("U20"), source["tuhon_ilmiasu"]),
+        }
+
+    def convert_stratum_columns(self, source: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        """Columns converted as with convert_stratum_entry out of given source field columns of VMI type 2 data
+        rows"""
+        size = len(source["stratum_number"])
+        ages = (source["biological_age"], source["d13_age"], source["avg_height"])
+
+        def age_values(biological_age: str, d13_age: str, avg_height: str) -> tuple[float, float]:
+            return vmi_util.determine_stratum_age_values(
+                biological_age, d13_age, vmi_util.determine_stratum_tree_height(avg_height))
+
+        sapling_stems_per_ha = vmi_columns.converted(
+            lambda value: util.get_or_default(util.parse_type(value, float), 0.0),
+            np.float64, source["sapling_stems_per_ha"])
+        return {
+            "identifier": vmi_columns.joined(
+                source["lohkomuoto"], source["section_y"], source["section_x"], source["test_area_number"],
+                source["stand_number"], source["stratum_number"], np.full(size, "stratum")),
+            "species": vmi_columns.converted(vmi2internal.convert_species, np.int32, source["species"]),
+            "origin": vmi_columns.converted(vmi_util.determine_stratum_origin, np.int32, source["origin"]),
+            "stems_per_ha": vmi_columns.converted(
+                lambda value: util.get_or_default(util.parse_type(value, float), 0.0),
+                np.float64, source["stems_per_ha"]),
+            "sapling_stems_per_ha": sapling_stems_per_ha,
+            "sapling_stratum": sapling_stems_per_ha > 0.0,
+            "mean_diameter": vmi_columns.converted(
+                lambda value: util.parse_type(value, float), np.float64, source["avg_diameter"]),
+            "mean_height": vmi_columns.converted(
+                vmi_util.determine_stratum_tree_height, np.float64, source["avg_height"]),
+            "breast_height_age": vmi_columns.converted(lambda *values: age_values(*values)[1], np.float64, *ages),
+            "biological_age": vmi_columns.converted(lambda *values: age_values(*values)[0], np.int32, *ages),
+            "basal_area": vmi_columns.converted(
+                lambda value: util.parse_type(value, float), np.float64, source["basal_area"]),
+            "cutting_year": np.zeros(size, np.int32),
+            "age_when_10cm_diameter_at_breast_height": np.zeros(size, np.int16),
+            "tree_number": vmi_columns.converted(util.parse_int, np.int32, source["stratum_number"]),
+            "stand_origin_relative_position": np.zeros((size, 3)),
+            "lowest_living_branch_height": np.zeros(size),
+            "management_category": np.ones(size, np.int32),
+            "storey": vmi_columns.converted(
+                vmi_util.determine_storey_for_stratum, np.int32, source["stratum_rank"]),
+        }
+
+    def _vectorized[V: VectorData](self, container: V, object_type: type,
+                                   convert: Callable[[dict[str, np.ndarray]], dict[str, np.ndarray]],
+                                   indices: dict, raw_rows: Sequence[str]) -> tuple[V, np.ndarray]:
+        """Container of raw rows converted with the given column conversion and the declared conversions, and the stand
+        identifiers of the rows. Other attributes of the container are filled with the defaults of the object type.
+        The rows are parsed into source field columns a block at a time."""
+        blocks = []
+        declared: dict[str, list] = {}
+        for start in range(0, max(len(raw_rows), 1), self.ROW_BLOCK):
+            rows = [self.parse_row(raw) for raw in raw_rows[start:start + self.ROW_BLOCK]]
+            blocks.append(vmi_columns.row_columns(rows, indices))
+            for name, values in self.conversion_reader.apply_column_conversions(object_type, rows).items():
+                declared.setdefault(name, []).extend(values)
+        source = {name: np.concatenate([block[name] for block in blocks]) for name in blocks[0]}
+        identifiers = self._stand_identifiers(source)
+        columns = convert(source)
+        for name, values in declared.items():
+            if name in container.dtypes:
+                columns[name] = np.array(container.defaultify(values, container.dtypes[name]), container.dtypes[name])
+        defaults = object_type()
+        for name, dtype in container.dtypes.items():
+            if name not in columns and hasattr(defaults, name):
+                columns[name] = np.full(len(raw_rows), container.to_default(getattr(defaults, name), dtype), dtype)
+        return container.from_columns(columns), identifiers
+
+    def _stand_identifiers(self, source: dict[str, np.ndarray]) -> np.ndarray:
+        """Stand identifiers of rows of any type out of their source field columns, as with
+        vmi_util.generate_stand_identifier"""
+        fields = ("lohkomuoto", "section_y", "section_x", "test_area_number", "stand_number")
+        return vmi_columns.joined(*(source[field] for field in fields))
+
+    def _group_to_stands(self, stands: list[ForestStand], identifiers: np.ndarray, container: VectorData,
+                         attribute: str):
+        """Set the rows of the container to the given attribute of their stands by the stand identifiers of the rows,
+        keeping the order of the rows. The rows of a stand are taken as a slice when they are consecutive, as in the
+        VMI source files."""
+        groups: dict[str, slice | np.ndarray] = {}
+        if len(identifiers) > 0:
+            starts = np.flatnonzero(np.concatenate(([True], identifiers[1:] != identifiers[:-1])))
+            keys = identifiers[starts].tolist()
+            bounds = [*starts.tolist(), len(identifiers)]
+            if len(set(keys)) == len(keys):
+                groups = {key: slice(start, end) for key, start, end in zip(keys, bounds[:-1], bounds[1:])}
+            else:
+                order = np.argsort(identifiers, kind="stable")
+                keys, first = np.unique(identifiers[order], return_index=True)
+                bounds = [*first.tolist(), len(identifiers)]
+                for key, start, end in zip(keys.tolist(), bounds[:-1], bounds[1:]):
+                    positions = order[start:end]
+                    low, high = int(positions[0]), int(positions[-1])
+                    groups[key] = slice(low, high + 1) if high - low == end - start - 1 else positions
+        by_identifier = {stand.identifier: stand for stand in stands}
+        for key in groups:
+            if key not in by_identifier:
+                raise MetsiException(f"VMI rows of stand {key} have no stand row")
+        empty = slice(0, 0)
+        for stand in stands:
+            setattr(stand, attribute, container.take(groups.get(stand.identifier, empty)))
+
+    def addressable_row_type(self, row: Sequence[str]) -> int | None:
+        """Data type of the row, or None with a warning if the row is not addressable"""
+        try:
+            return self.find_row_type(row)
+        except (IndexError, TypeError) as e:
+            print(e)
+            print('warning: VMI row not addressable: ')
+            print('    ' + str(row))
+            return None
+
+    def is_stand_row(self, raw: str) -> bool:
+        """Whether a raw data row is a type 1 row, as stream() numbers them as stands"""
+        try:
+            return self.find_row_type(self.parse_row(raw)) == 1
+        except (IndexError, TypeError, ValueError):
+            return False
+
+    def test_area(self, row: Sequence[str]) -> str:
+        """Identifier of the test area of a row of any type, ie. the stand identifier without the stand number"""
+        return vmi_util.generate_stand_identifier(row, self.stand_indices).rsplit('-', 1)[0]
+
+    def _open_stand(self, open_stands: dict[str, ForestStand], row: Sequence[str]) -> ForestStand:
+        stand_id = vmi_util.generate_stand_identifier(row, self.stand_indices)
+        if stand_id not in open_stands:
+            raise MetsiException(f"VMI row of stand {stand_id} is not in the test area of its stand row")
+        return open_stands[stand_id]
+
     def remove_strata(self, stands: list[ForestStand]):
         """Empties the stands' `tree_strata` lists."""
         for stand in stands:
             stand.tree_strata.clear()
 
     @abstractmethod
-    def find_row_type(self, row: str) -> int:
+    def find_row_type(self, row: Sequence[str]) -> int:
         ...
 
     @abstractmethod
@@ -186,6 +429,9 @@ class VMIBuilder(ForestBuilder):
 
 class VMI12Builder(VMIBuilder):
     """VMI12 specific builder implementation"""
+    stand_indices = VMI12_STAND_INDICES
+    stratum_indices = VMI12_STRATUM_INDICES
+    tree_indices = VMI12_TREE_INDICES
 
     def __init__(self,
                  builder_flags: dict,
@@ -255,7 +501,19 @@ class VMI12Builder(VMIBuilder):
         result = self.conversion_reader.apply_conversions(result, data_row)
         return result
 
-    def find_row_type(self, row: str) -> int:
+    def convert_tree_columns(self, source):
+        # Fixed conversions
+        result = super().convert_tree_columns(source)
+        result["height"] = vmi_columns.converted(
+            partial(vmi_util.determine_tree_height, conversion_factor=100.0), np.float64, source["height"])
+        result["measured_height"] = vmi_columns.converted(
+            partial(vmi_util.determine_tree_height, conversion_factor=10.0), np.float64, source["measured_height"])
+        result["stems_per_ha"] = vmi_columns.converted(
+            lambda value: vmi_util.determine_stems_per_ha(vmi_util.transform_tree_diameter(value), True),
+            np.float64, source["diameter"])
+        return result
+
+    def find_row_type(self, row: Sequence[str]) -> int:
         """Return VMI12 data type of the row"""
         return int(row[13])
 
@@ -291,6 +549,9 @@ class VMI12Builder(VMIBuilder):
 
 class VMI13Builder(VMIBuilder):
     """VMI13 specific builder implementation"""
+    stand_indices = VMI13_STAND_INDICES
+    stratum_indices = VMI13_STRATUM_INDICES
+    tree_indices = VMI13_TREE_INDICES
 
     def __init__(self,
                  builder_flags: dict,
@@ -298,14 +559,25 @@ class VMI13Builder(VMIBuilder):
                  data_rows: list[str] | None = None):
         if data_rows is None:
             data_rows = []
-        pre_parsed_rows = map(lambda raw: raw.split(), data_rows)
+        pre_parsed_rows = map(self.parse_row, data_rows)
         # TODO: data_rows sanity check for VMI13
         super().__init__(builder_flags, declared_conversions, pre_parsed_rows)
 
-    def find_row_type(self, row: str) -> int:
+    def parse_row(self, raw: str) -> Sequence[str]:
+        return raw.split()
+
+    def find_row_type(self, row: Sequence[str]) -> int:
         """Return VMI13 data type of the row"""
         return int(row[0])
 
+    def is_stand_row(self, raw: str) -> bool:
+        # only the leading field of the row is split off
+        fields = raw.split(maxsplit=1)
+        try:
+            return len(fields) > 0 and int(fields[0]) == 1
+        except ValueError:
+            return False
+
     def convert_stand_entry(self, indices, data_row, stand_id: int | None = None) -> ForestStand:
         """Create a ForestStand out of given VMI13 type 1 data row using given data indices and order number"""
         # Fixed conversions
@@ -366,6 +638,18 @@ class VMI13Builder(VMIBuilder):
         result = self.conversion_reader.apply_conversions(result, data_row)
         return result
 
+    def convert_tree_columns(self, source):
+        # Fixed conversions
+        result = super().convert_tree_columns(source)
+        result["height"] = vmi_columns.converted(
+            partial(vmi_util.determine_tree_height, conversion_factor=100.0), np.float64, source["height"])
+        result["measured_height"] = vmi_columns.converted(
+            partial(vmi_util.determine_tree_height, conversion_factor=10.0), np.float64, source["measured_height"])
+        result["stems_per_ha"] = vmi_columns.converted(
+            lambda value: vmi_util.determine_stems_per_ha(vmi_util.transform_tree_diameter(value), False),
+            np.float64, source["diameter"])
+        return result
+
     def build(self) -> list[ForestStand]:
         """Populate a list of ForestStand with associated ReferenceTree and TreeStratum entries.
         Using constructor initialized instance variables as source.
@@ -417,9 +701,16 @@ class XMLBuilder(ForestCentreBuilder):
 
     xpath_strata = './ts:TreeStandData/ts:TreeStandDataDate[@type="{}"]/tst:TreeStrata/tst:TreeStratum'
     xpath_stand = "st:Stands/st:Stand"
+    stands_tag = f"{{{smk_util.NS['st']}}}Stands"
+    stand_tag = f"{{{smk_util.NS['st']}}}Stand"
 
-    def __init__(self, builder_flags: dict, declared_conversions: dict, data: str):
-        self.root: ET.Element = ET.fromstring(data)
+    def __init__(self, builder_flags: dict, declared_conversions: dict, data: str | None = None):
+        """
+        :param builder_flags: building process spesific flags
+        :param declared_conversions: not in use
+        :param data: XML document for build(). Not needed for stream().
+        """
+        self.root: ET.Element | None = None if data is None else ET.fromstring(data)
         self.builder_flags = builder_flags
         self.xpath_strata = self.xpath_strata.format(builder_flags['strata_origin'].value)
         self.declared_conversions = declared_conversions  # NOTE: not in use
@@ -520,35 +811,54 @@ class XMLBuilder(ForestCentreBuilder):
         stratum.storey = fc2internal.convert_storey(stratum_data.Storey)
         return stratum
 
+    def convert_stand(self, estand: ET.Element) -> ForestStand:
+        """Create a ForestStand with its TreeStratum entries out of a complete stand element"""
+        stand = self.convert_stand_entry(estand)
+        strata = []
+        estrata = estand.findall(self.xpath_strata, smk_util.NS)
+        for estratum in estrata:
+            stratum = self.convert_stratum_entry(estratum)
+            stratum.identifier = f"{stand.identifier}.{stratum.tree_number or stratum.identifier}-stratum"
+            stratum.stand = stand
+            strata.append(stratum)
+        stand.tree_strata = strata
+        stand.basal_area = smk_util.calculate_stand_basal_area(stand.tree_strata)
+        return stand
+
     def build(self) -> list[ForestStand]:
-        stands = []
-        estands = self.root.findall(self.xpath_stand, smk_util.NS)
-        for estand in estands:
-            stand = self.convert_stand_entry(estand)
-            strata = []
-            estrata = estand.findall(self.xpath_strata, smk_util.NS)
-            for estratum in estrata:
-                stratum = self.convert_stratum_entry(estratum)
-                stratum.identifier = f"{stand.identifier}.{stratum.tree_number or stratum.identifier}-stratum"
-                stratum.stand = stand
-                strata.append(stratum)
-            stand.tree_strata = strata
-            stand.basal_area = smk_util.calculate_stand_basal_area(stand.tree_strata)
-            stands.append(stand)
-        return stands
+        if self.root is None:
+            raise MetsiException("XMLBuilder.build needs the XML document. Use stream for XML files.")
+        return [self.convert_stand(estand) for estand in self.root.findall(self.xpath_stand, smk_util.NS)]
+
+    def stream(self, source: str | Path | IO[bytes]) -> Iterator[ForestStand]:
+        """Build ForestStands lazily from an XML file with ElementTree.iterparse.
+
+        Each stand element is converted as soon as it is complete and is then removed from the parsed tree, so that
+        only the elements of one stand are held at a time. The stands are the same as with build() for the same
+        document.
+
+        :param source: XML file path or binary file object
+        """
+        path: list[ET.Element] = []
+        for event, element in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                path.append(element)
+                continue
+            path.pop()
+            if len(path) == 2 and element.tag == self.stand_tag and path[1].tag == self.stands_tag:
+                stand = self.convert_stand(element)
+                path[1].remove(element)
+                yield stand
 
 
 class GeoPackageBuilder(ForestCentreBuilder):
     """ ForestBuilder for geopackage format spesification """
-    stands: DataFrame
-    strata: DataFrame
     type_value = None
 
     def __init__(self, builder_flags: dict, declared_conversions: dict, db_path: str):
-        """ Reads Geopackage format into pandas dataframe representing stands and strata """
+        """ Prepares reading Geopackage format into pandas dataframes representing stands and strata """
         self.type_value = builder_flags['strata_origin'].value
-        (self.stands,
-         self.strata) = gpkg_util.read_geopackage(db_path, self.type_value)
+        self.db_path = db_path
         self.declared_conversions = declared_conversions  # NOTE: not in use
 
     def convert_stand_entry(self, entry: Series) -> ForestStand:
@@ -609,22 +919,34 @@ class GeoPackageBuilder(ForestCentreBuilder):
         stratum.storey = entry.storey
         return stratum
 
-    def build(self) -> list[ForestStand]:
-        """ Converts geopackage into list of ForestStand objects.
-        :return: List of ForestStand objects
-        """
-        stands = []
-        for _, rowi in self.stands.iterrows():
+    def convert_stands(self, stands: DataFrame, strata: DataFrame) -> Iterator[ForestStand]:
+        """ Converts stand rows with the stratum rows of the stands into ForestStand objects """
+        strata_by_stand = dict(iter(strata.groupby('standid', sort=False)))
+        for _, rowi in stands.iterrows():
             # for each stand row
             stand = self.convert_stand_entry(rowi)
-            strata = []
-            i_strata = self.strata[self.strata['standid'] == stand.identifier]
+            strata_list = []
+            i_strata = strata_by_stand.get(stand.identifier, strata.iloc[:0])
             for _, rowj in i_strata.iterrows():
                 # for each strata row
                 stratum = self.convert_stratum_entry(rowj)
                 stratum.stand = stand
-                strata.append(stratum)
-            stand.tree_strata = strata
+                strata_list.append(stratum)
+            stand.tree_strata = strata_list
             stand.basal_area = smk_util.calculate_stand_basal_area(stand.tree_strata)
-            stands.append(stand)
-        return stands
+            yield stand
+
+    def build(self) -> list[ForestStand]:
+        """ Converts geopackage into list of ForestStand objects.
+        :return: List of ForestStand objects
+        """
+        (stands, strata) = gpkg_util.read_geopackage(self.db_path, self.type_value)
+        return list(self.convert_stands(stands, strata))
+
+    def stream(self, chunksize: int = 1000) -> Iterator[ForestStand]:
+        """ Converts geopackage into ForestStand objects incrementally, reading the stands in chunks in the order of
+        their standid. Only a chunk of source rows is held at a time.
+        :return: Iterator of ForestStand objects
+        """
+        for stands, strata in gpkg_util.stream_geopackage(self.db_path, self.type_value, chunksize):
+            yield from self.convert_stands(stands, strata)
@@ -1,20 +1,17 @@
-from typing import Any, NamedTuple, TypedDict
+from collections.abc import Iterable, Iterator
+from typing import Any, TypedDict
+import math
 import sqlite3
+import struct
 import pandas as pd
-import geopandas
-from shapely.geometry.polygon import Polygon
 import numpy as np
+from lukefi.metsi.app.utils import MetsiException
 
-
-def _read_stand_geometry(path: str) -> geopandas.GeoDataFrame:
-    '''
-    NOTE: Stand geometry is read with geopandas. This could be done purely with SQLite using spatialite library
-    but as installation of spatialite would assume manual it was desided to be done with geopandas. Problems with
-    using geopandas to read geometry information is that it is 100-times slower than pure SQL request.
-    In other words the reading the geometry from source could be optimized,
-    but now (24.8.2023) a very little need for this was seen.
-    '''
-    return geopandas.read_file(path, layer="stand")
+# number of envelope doubles by the envelope contents indicator of the GeoPackage binary header flags
+_ENVELOPE_SIZES = (0, 4, 6, 6, 8)
+_EMPTY_GEOMETRY = 0b10000
+_WKB_POLYGON = 3
+_WKB_MULTIPOLYGON = 6
 
 
 def _read_from_gpkg(query, conn) -> pd.DataFrame:
@@ -32,33 +29,136 @@ class Centroid(TypedDict):
     crs: str
 
 
-def _extract_centroid(geometry: Polygon) -> Centroid:
+def _read_wkb_polygons(wkb: bytes, offset: int = 0) -> tuple[list[list[np.ndarray]], int]:
+    """ Reads a WKB Polygon or MultiPolygon at the offset into lists of rings of xy coordinates per polygon.
+    Z and M coordinates are dropped. ISO and extended WKB dimension codes are supported.
+    :returns: polygons and the offset after the geometry
+    """
+    byte_order = '<' if wkb[offset] == 1 else '>'
+    (code,) = struct.unpack_from(f'{byte_order}I', wkb, offset + 1)
+    offset += 5
+    dimensions = 2 + (code & 0x80000000 != 0) + (code & 0x40000000 != 0)
+    if code & 0x20000000:
+        offset += 4
+    code &= 0x0FFFFFFF
+    dimensions += {0: 0, 1: 1, 2: 1, 3: 2}[code // 1000]
+    geometry_type = code % 1000
+    if geometry_type == _WKB_MULTIPOLYGON:
+        (count,) = struct.unpack_from(f'{byte_order}I', wkb, offset)
+        offset += 4
+        polygons = []
+        for _ in range(count):
+            parts, offset = _read_wkb_polygons(wkb, offset)
+            polygons.extend(parts)
+        return polygons, offset
+    if geometry_type != _WKB_POLYGON:
+        raise MetsiException(f"Unsupported stand geometry type {geometry_type}, expected a polygon")
+    (ring_count,) = struct.unpack_from(f'{byte_order}I', wkb, offset)
+    offset += 4
+    rings = []
+    for _ in range(ring_count):
+        (point_count,) = struct.unpack_from(f'{byte_order}I', wkb, offset)
+        offset += 4
+        coordinates = np.frombuffer(wkb, np.dtype(f'{byte_order}f8'), point_count * dimensions, offset)
+        rings.append(coordinates.reshape(point_count, dimensions)[:, :2])
+        offset += coordinates.nbytes
+    return [rings], offset
+
+
+def decode_gpkg_geometry(blob: bytes) -> tuple[int, list[list[np.ndarray]]]:
+    """ Decodes a GeoPackage binary geometry of polygons without spatialite.
+    :returns: the spatial reference system id and the rings of xy coordinates per polygon, no polygons for an empty
+    geometry
+    """
+    if blob[:2] != b'GP':
+        raise MetsiException("Invalid GeoPackage geometry")
+    flags = blob[3]
+    (srs_id,) = struct.unpack_from('<i' if flags & 1 else '>i', blob, 4)
+    envelope = (flags >> 1) & 0b111
+    if envelope >= len(_ENVELOPE_SIZES):
+        raise MetsiException(f"Invalid GeoPackage geometry envelope contents indicator {envelope}")
+    if flags & _EMPTY_GEOMETRY:
+        return srs_id, []
+    polygons, _ = _read_wkb_polygons(blob, 8 + 8 * _ENVELOPE_SIZES[envelope])
+    return srs_id, polygons
+
+
+def polygon_centroid(polygons: list[list[np.ndarray]]) -> tuple[float, float]:
+    """ Area weighted centroid (x, y) of polygons given as rings of xy coordinates. The first ring of each polygon is
+    its exterior and the rest are holes, regardless of their orientation. Coordinates are taken relative to the first
+    point for precision. The centroid of an empty geometry is missing, (nan, nan). """
+    polygons = [rings for rings in polygons if rings and len(rings[0]) > 0]
+    if not polygons:
+        return math.nan, math.nan
+    origin = polygons[0][0][0]
+    area, moment = 0.0, np.zeros(2)
+    for rings in polygons:
+        for i, ring in enumerate(rings):
+            xy = ring - origin
+            cross = xy[:-1, 0] * xy[1:, 1] - xy[1:, 0] * xy[:-1, 1]
+            ring_area = cross.sum() / 2.0
+            if ring_area == 0.0:
+                continue
+            sign = (1.0 if i == 0 else -1.0) * np.sign(ring_area)
+            area += sign * ring_area
+            moment += sign * ((xy[:-1] + xy[1:]) * cross[:, np.newaxis]).sum(axis=0) / 6.0
+    if area == 0.0:
+        centroid = np.concatenate([rings[0] for rings in polygons]).mean(axis=0)
+    else:
+        centroid = origin + moment / area
+    return float(centroid[0]), float(centroid[1])
+
+
+def _extract_centroid(polygons: list[list[np.ndarray]], crs: str) -> Centroid:
     """ Extracts centroid information from polygon coordinates """
-    cid = geometry.centroid
-    latitude = round(float(cid.y), 2)
-    longitude = round(float(cid.x), 2)
-    return {"centroid": (longitude, latitude), "crs": cid.crs.srs.upper()}
-
-
-def _attach_location(df: pd.DataFrame, gdf: geopandas.GeoDataFrame) -> pd.DataFrame:
-    """ Inserts into df the centroid information from gdf """
-    centroids = []
-    for sid in df['standid']:
-        stand_geometry = gdf[gdf['standid'] == sid]
-        cid = _extract_centroid(stand_geometry['geometry'])
-        centroids.append(cid)
-    df.insert(0, 'centroid', centroids)
+    (x, y) = polygon_centroid(polygons)
+    return {"centroid": (round(x, 2), round(y, 2)), "crs": crs}
+
+
+def _geometry_column(conn: sqlite3.Connection) -> str:
+    """ Name of the geometry column of the stand table """
+    (column,) = conn.execute(
+        "SELECT column_name FROM gpkg_geometry_columns WHERE table_name = 'stand'").fetchone()
+    return column
+
+
+def _crs_names(conn: sqlite3.Connection) -> dict[int, str]:
+    """ Names of the spatial reference systems of the GeoPackage by srs_id, eg. EPSG:3067 """
+    return {
+        srs_id: f"{organization.upper()}:{coordsys_id}"
+        for srs_id, organization, coordsys_id in conn.execute(
+            "SELECT srs_id, organization, organization_coordsys_id FROM gpkg_spatial_ref_sys")
+    }
+
+
+def _stand_centroids(rows: Iterable[tuple[Any, bytes]], crs_names: dict[int, str]) -> dict[Any, Centroid]:
+    """ Centroids of (standid, geometry blob) rows by standid """
+    centroids = {}
+    for standid, blob in rows:
+        srs_id, polygons = decode_gpkg_geometry(blob)
+        centroids[standid] = _extract_centroid(polygons, crs_names.get(srs_id, str(srs_id)))
+    return centroids
+
+
+def _read_stand_centroids(conn: sqlite3.Connection) -> dict[Any, Centroid]:
+    """ Reads the centroids of the stand geometries by standid. The geometry blobs are read with SQL and decoded
+    without spatialite. """
+    column = _geometry_column(conn)
+    return _stand_centroids(
+        conn.execute(f'SELECT standid, "{column}" FROM stand WHERE "{column}" IS NOT NULL'), _crs_names(conn))
+
+
+def _attach_location(df: pd.DataFrame, centroids: dict[Any, Centroid]) -> pd.DataFrame:
+    """ Inserts into df the centroid information of its stands, joined on standid """
+    df.insert(0, 'centroid', [centroids.get(sid) for sid in df['standid']])
     return df
 
 
-def read_geopackage(path: str, type_value: int = 1) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """ Reads stands and strata from Forest Centre (FC) gpkg format.
-    path: string path to SQLite .gpkg format
-    type_value: FC strata origin type value 1(=invented), 2(=calculated) or 3(=forecasted).
-    :returns: Stand and stratum tuple of pandas Dataframe.
-    """
-    RESTRICTION_TYPE_CUTTINGS = 1
-    stands_query = f'''
+RESTRICTION_TYPE_CUTTINGS = 1
+
+
+def _stands_query(type_value: int) -> str:
+    return f'''
         SELECT DISTINCT s.standid,
             s.maingroup,
             s.subgroup,
@@ -75,7 +175,10 @@ def read_geopackage(path: str, type_value: int = 1) -> tuple[pd.DataFrame, pd.Da
         JOIN treestand AS sd ON s.standid=sd.standid AND sd.type={type_value}
         LEFT JOIN restriction AS r ON s.standid=r.standid AND r.restrictiontype={RESTRICTION_TYPE_CUTTINGS}
     '''
-    strata_query = f'''
+
+
+def _strata_query(type_value: int) -> str:
+    return f'''
         SELECT s.standid,
             ts.treestratumid,
             ts.stratumnumber,
@@ -90,12 +193,87 @@ def read_geopackage(path: str, type_value: int = 1) -> tuple[pd.DataFrame, pd.Da
         JOIN treestand AS sd ON ts.treestandid=sd.treestandid AND sd.type={type_value}
         JOIN stand AS s ON sd.standid=s.standid
     '''
+
+
+def read_geopackage(path: str, type_value: int = 1) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """ Reads stands and strata from Forest Centre (FC) gpkg format.
+    path: string path to SQLite .gpkg format
+    type_value: FC strata origin type value 1(=invented), 2(=calculated) or 3(=forecasted).
+    :returns: Stand and stratum tuple of pandas Dataframe.
+    """
     conn = sqlite3.connect(path)
-    stands = _read_from_gpkg(stands_query, conn)
-    strata = _read_from_gpkg(strata_query, conn)
+    stands = _read_from_gpkg(_stands_query(type_value), conn)
+    strata = _read_from_gpkg(_strata_query(type_value), conn)
+    centroids = _read_stand_centroids(conn)
     conn.close()
-    stand_geometries = _read_stand_geometry(path)
-    stands = _attach_location(stands, stand_geometries)
+    stands = _attach_location(stands, centroids)
     stands = _replace_nan(stands)
     strata = _replace_nan(strata)
     return (stands, strata)
+
+
+class _OrderedRows:
+    """ Rows of a query ordered by standid, fetched in chunks and taken in order up to a given standid """
+
+    def __init__(self, cursor: sqlite3.Cursor, chunksize: int):
+        self.cursor = cursor
+        self.chunksize = chunksize
+        self.pending: list[tuple] = []
+        self.position = 0
+
+    def take_until(self, standid: Any) -> list[tuple]:
+        result: list[tuple] = []
+        while True:
+            if self.position == len(self.pending):
+                self.pending = self.cursor.fetchmany(self.chunksize)
+                self.position = 0
+                if not self.pending:
+                    return result
+            row = self.pending[self.position]
+            if row[0] > standid:
+                return result
+            result.append(row)
+            self.position += 1
+
+
+def stream_geopackage(path: str, type_value: int = 1, chunksize: int = 1000) -> Iterator[tuple[pd.DataFrame,
+                                                                                                  pd.DataFrame]]:
+    """ Reads stands and strata from Forest Centre (FC) gpkg format in chunks of stands ordered by standid.
+    The stand, stratum and stand geometry queries are read with cursors ordered by standid and merged in lockstep, so
+    that only a chunk of rows of each query is held at a time. All rows of a standid are in the same chunk.
+    path: string path to SQLite .gpkg format
+    type_value: FC strata origin type value 1(=invented), 2(=calculated) or 3(=forecasted).
+    chunksize: number of stand rows fetched at a time
+    :returns: Iterator of stand and stratum tuples of pandas Dataframe, as with read_geopackage for the chunk.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        column = _geometry_column(conn)
+        crs_names = _crs_names(conn)
+        stands_cursor = conn.execute(f"{_stands_query(type_value)} ORDER BY s.standid")
+        stand_columns = [d[0] for d in stands_cursor.description]
+        strata_cursor = conn.execute(f"{_strata_query(type_value)} ORDER BY s.standid, ts.rowid")
+        strata_columns = [d[0] for d in strata_cursor.description]
+        strata = _OrderedRows(strata_cursor, chunksize)
+        geometries = _OrderedRows(conn.execute(
+            f'SELECT standid, "{column}" FROM stand WHERE "{column}" IS NOT NULL ORDER BY standid'), chunksize)
+        carry: list[tuple] = []
+        while True:
+            fetched = stands_cursor.fetchmany(chunksize)
+            rows = carry + fetched
+            if not rows:
+                break
+            # rows of the last standid may continue in the next chunk
+            last = rows[-1][0]
+            complete = rows if not fetched else [row for row in rows if row[0] != last]
+            carry = [] if not fetched else [row for row in rows if row[0] == last]
+            if not complete:
+                continue
+            until = complete[-1][0]
+            stands = pd.DataFrame.from_records(complete, columns=stand_columns, coerce_float=True)
+            stands = _attach_location(stands, _stand_centroids(geometries.take_until(until), crs_names))
+            stratum_rows = pd.DataFrame.from_records(
+                strata.take_until(until), columns=strata_columns, coerce_float=True)
+            yield (_replace_nan(stands), _replace_nan(stratum_rows))
+    finally:
+        conn.close()
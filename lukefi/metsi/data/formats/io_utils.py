@@ -149,16 +149,13 @@ def csv_content_to_stands(csv_content: list[list[str]]) -> StandList:
         if row[0] == "stand":
             stands.append(ForestStand.from_csv_row(row))
         elif row[0] == "tree":
-            stands[-1].reference_trees.append(ReferenceTree.from_csv_row(row))
+            tree = ReferenceTree.from_csv_row(row)
+            tree.stand = stands[-1]
+            stands[-1].reference_trees.append(tree)
         elif row[0] == "stratum":
-            stands[-1].tree_strata.append(TreeStratum.from_csv_row(row))
-
-    # once all stands are recreated, add the stand reference to trees and strata
-    for stand in stands:
-        for tree in stand.reference_trees:
-            tree.stand = stand
-        for stratum in stand.tree_strata:
-            stratum.stand = stand
+            stratum = TreeStratum.from_csv_row(row)
+            stratum.stand = stands[-1]
+            stands[-1].tree_strata.append(stratum)
     return stands
 
 
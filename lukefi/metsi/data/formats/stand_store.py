@@ -0,0 +1,85 @@
+""" Random access to the stands of a columnar container by stand identifier or position """
+from collections.abc import Iterable, Iterator
+from functools import cached_property
+from pathlib import Path
+from typing import Optional, overload
+import numpy as np
+import numpy.typing as npt
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.formats import columnar
+from lukefi.metsi.data.model import ForestStand
+
+
+class StandStore:
+    """
+    Sequence of the stands of a columnar container file, or of a subset of its stands. The columns of the file are
+    memory-mapped when the store is opened and stands are built only when they are accessed, with their reference
+    trees and tree strata as views of the mapped columns.
+
+    Slicing a store or selecting stands by identifier gives a new store of the subset of stands, sharing the mapped
+    columns. A store is pickled as its file path and stand positions, so that it can be passed to worker processes,
+    which map the file again when unpickling it.
+    """
+
+    def __init__(self, path: str | Path, rows: Optional[npt.NDArray[np.intp]] = None):
+        self.path = path
+        self.columns = columnar.mapped_columns(path)
+        self.rows = np.arange(columnar.stand_count(self.columns)) if rows is None else np.asarray(rows, np.intp)
+
+    @cached_property
+    def index(self) -> dict[str, int]:
+        """ Positions within the file of the stands of the store by stand identifier """
+        identifiers = self.columns["stands/identifier"][self.rows].tolist()
+        return dict(zip(identifiers, self.rows.tolist()))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @overload
+    def __getitem__(self, key: int) -> ForestStand: ...
+
+    @overload
+    def __getitem__(self, key: slice) -> 'StandStore': ...
+
+    def __getitem__(self, key: int | slice) -> 'ForestStand | StandStore':
+        if isinstance(key, slice):
+            return self._subset(self.rows[key])
+        return columnar.stands_from_columns(self.columns, self.rows[[key]])[0]
+
+    def __iter__(self) -> Iterator[ForestStand]:
+        return iter(self.stands())
+
+    def stands(self) -> list[ForestStand]:
+        """ Build the stands of the store """
+        return columnar.stands_from_columns(self.columns, self.rows)
+
+    def stand(self, identifier: str) -> ForestStand:
+        """ Build the stand of the given identifier among the stands of the store """
+        return columnar.stands_from_columns(self.columns, np.array([self.position(identifier)]))[0]
+
+    def position(self, identifier: str) -> int:
+        """ Position within the file of the stand of the given identifier among the stands of the store """
+        position = self.index.get(identifier)
+        if position is None:
+            raise MetsiException(f"Stand '{identifier}' not found in the stands of {self.path}")
+        return position
+
+    def select(self, identifiers: Iterable[str]) -> 'StandStore':
+        """ Store of the stands of the store with the given identifiers, in the given order """
+        return self._subset(np.fromiter((self.position(i) for i in identifiers), np.intp))
+
+    def _subset(self, rows: npt.NDArray[np.intp]) -> 'StandStore':
+        result = object.__new__(StandStore)
+        result.__dict__.update(self.__dict__)
+        result.__dict__.pop("index", None)
+        result.rows = rows
+        return result
+
+    def __getstate__(self) -> dict:
+        return {"path": self.path, "rows": self.rows}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state["path"], state["rows"])  # pylint: disable=unnecessary-dunder-call
+
+
+__all__ = ['StandStore']
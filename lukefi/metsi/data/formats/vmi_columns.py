@@ -0,0 +1,85 @@
+""" Columnar extraction and conversion of VMI source rows.
+
+Source fields are sliced out of all rows of a data type at once into string columns. Conversions of source values are
+evaluated once per distinct value, or combination of values, and spread to the rows with the inverse index of the
+distinct values, so that the results are the same as with the row-wise conversions of vmi_util and vmi2internal. """
+import math
+from collections.abc import Callable, Sequence
+from operator import itemgetter
+from typing import Any
+import numpy as np
+import numpy.typing as npt
+from lukefi.metsi.data.vector_model import VectorData
+
+
+def fixed_width_columns(rows: Sequence[str], indices: dict[str, slice]) -> dict[str, npt.NDArray[np.str_]]:
+    """ String columns of the fields of fixed width rows. The rows are laid out into a character matrix, which is
+    sliced by the field positions. """
+    chars = np.array(rows, dtype=np.str_).reshape(len(rows))
+    width = chars.dtype.itemsize // np.dtype((np.str_, 1)).itemsize
+    matrix = chars.view(np.uint32).reshape(len(rows), width)
+    result = {}
+    for name, field in indices.items():
+        start, stop = min(field.start, width), min(field.stop, width)
+        if stop > start:
+            column: npt.NDArray[np.str_] = np.ascontiguousarray(matrix[:, start:stop]).view(f"U{stop - start}")
+            result[name] = narrowed(column.reshape(len(rows)))
+        else:
+            result[name] = np.full(len(rows), '')
+    return result
+
+
+def split_columns(rows: Sequence[Sequence[str]], indices: dict[str, int]) -> dict[str, npt.NDArray[np.str_]]:
+    """ String columns of the fields of rows split into values """
+    getter = itemgetter(*indices.values())
+    table = np.array([getter(row) for row in rows], dtype=np.str_).reshape(len(rows), len(indices))
+    return {name: narrowed(table[:, i]) for i, name in enumerate(indices)}
+
+
+def narrowed(column: npt.NDArray[np.str_]) -> npt.NDArray[np.str_]:
+    """ String column with the width of its longest value, as when created out of the values """
+    return column.astype(np.dtype((np.str_, max(1, int(np.char.str_len(column).max(initial=0))))))
+
+
+def row_columns(rows: Sequence, indices: dict) -> dict[str, npt.NDArray[np.str_]]:
+    """ String columns of the indexed fields of the rows, using slice indices for fixed width rows and integer indices
+    for split rows """
+    if any(isinstance(index, slice) for index in indices.values()):
+        return fixed_width_columns(rows, indices)
+    return split_columns(rows, indices)
+
+
+def joined(*columns: npt.NDArray[np.str_], separator: str = '-') -> npt.NDArray[np.str_]:
+    """ Elementwise concatenation of string columns with a separator """
+    result = columns[0]
+    for column in columns[1:]:
+        result = np.char.add(np.char.add(result, separator), column)
+    return result
+
+
+def converted(fn: Callable[..., Any], dtype: npt.DTypeLike, *columns: npt.NDArray[np.str_]) -> np.ndarray:
+    """ Column of the given type of fn applied to the values of the given columns row by row. fn is called once for
+    each distinct combination of values. None results are replaced with the defaults of the vectorized data. """
+    if len(columns[0]) == 0:
+        return np.empty(0, dtype)
+    if len(columns) == 1:
+        keys, inverse = np.unique(columns[0], return_inverse=True)
+        values = [VectorData.to_default(fn(key), dtype) for key in keys.tolist()]
+        return np.array(values, dtype)[inverse.reshape(-1)]
+    distinct = [np.unique(column, return_inverse=True) for column in columns]
+    if math.prod(len(keys) for keys, _ in distinct) >= 2 ** 63:
+        keys, inverse = np.unique(np.stack(columns, axis=1), axis=0, return_inverse=True)
+        values = [VectorData.to_default(fn(*key), dtype) for key in keys.tolist()]
+        return np.array(values, dtype)[inverse.reshape(-1)]
+    # combinations are numbered by the positions of their values among the distinct values of each column, which is
+    # faster than finding the distinct rows of the stacked string columns
+    codes: npt.NDArray[np.signedinteger] = np.zeros(len(columns[0]), np.int64)
+    for keys, positions in distinct:
+        codes = codes * len(keys) + positions.reshape(-1)
+    _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    combinations = zip(*(keys[positions.reshape(-1)[first]].tolist() for keys, positions in distinct))
+    values = [VectorData.to_default(fn(*key), dtype) for key in combinations]
+    return np.array(values, dtype)[inverse.reshape(-1)]
+
+
+__all__ = ['fixed_width_columns', 'split_columns', 'narrowed', 'row_columns', 'joined', 'converted']
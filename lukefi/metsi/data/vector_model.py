@@ -56,6 +56,9 @@ DTYPES_STRATA: dict[str, npt.DTypeLike] = {
 class VectorData():
     def __init__(self, dtypes: dict[str, npt.DTypeLike]):
         self.dtypes = dtypes
+        self.size = 0
+        # source container and rows of a container taken as a slice, see take
+        self._view_of: Optional[tuple[VectorData, slice]] = None
 
     def vectorize(self, attr_dict):
         for k, v in attr_dict.items():
@@ -65,10 +68,65 @@ class VectorData():
         self.set_size(attr_dict)
         return self
 
+    def from_columns(self, columns: dict[str, np.ndarray]):
+        """ Set attribute arrays from columns that are already arrays, casting them to the declared types without
+        converting the values one by one. """
+        for k, v in columns.items():
+            setattr(self, k, np.ascontiguousarray(v, np.dtype(self.dtypes[k]).base))
+        self.set_size(columns)
+        return self
+
     def is_contiguous(self, name):
         arr = getattr(self, name)
         return bool(arr.flags['CONTIGUOUS']) and bool(arr.flags['C_CONTIGUOUS'])
 
+    def select(self, mask: npt.NDArray[np.bool_]):
+        """ Compact all attribute arrays in-place to the rows where mask is True. """
+        for k in self.dtypes:
+            arr = getattr(self, k, None)
+            if arr is not None:
+                setattr(self, k, arr[mask])
+        self.size = int(np.count_nonzero(mask))
+        return self
+
+    def take(self, rows: slice | npt.NDArray[np.intp]):
+        """ New container of the same type with the rows at the given positions. A slice of rows is taken as views of
+        the attribute arrays, which are created when the attributes are first accessed, so that taking the rows of many
+        stands out of one container does not cost a view of every attribute of every stand. """
+        result = object.__new__(type(self))
+        result.dtypes = self.dtypes
+        result._view_of = None
+        if isinstance(rows, slice):
+            result._view_of = (self, rows)
+            result.size = len(range(self.size)[rows])
+            return result
+        for k in self.dtypes:
+            arr = getattr(self, k, None)
+            if arr is not None:
+                setattr(result, k, arr[rows])
+        result.size = len(rows)
+        return result
+
+    def __getattr__(self, name: str):
+        # only called for attributes not set on the container: views of the attributes of a container taken as a
+        # slice are created on first access
+        view_of = self.__dict__.get("_view_of")
+        if view_of is None or name not in self.__dict__["dtypes"]:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        source, rows = view_of
+        arr = getattr(source, name, None)
+        if arr is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        setattr(self, name, arr[rows])
+        return self.__dict__[name]
+
+    def __getstate__(self):
+        if self._view_of is None:
+            return self.__dict__
+        for k in self.dtypes:
+            getattr(self, k, None)
+        return {**self.__dict__, "_view_of": None}
+
     def set_size(self, attr_dict):
         size = len(attr_dict.get('identifier', []))
         setattr(self, 'size', size)
@@ -76,7 +134,8 @@ class VectorData():
     def defaultify(self, values: list, dtype: npt.DTypeLike) -> list:
         return [self.to_default(v, dtype) for v in values]
 
-    def to_default(self, value: Optional[Any], field_type: npt.DTypeLike) -> Any:
+    @staticmethod
+    def to_default(value: Optional[Any], field_type: npt.DTypeLike) -> Any:
         """ Replace None with appropriate defaults based on field type. """
         int_default = -1
         str_default = ""
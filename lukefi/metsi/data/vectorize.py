@@ -1,7 +1,8 @@
 from typing import Any
 from lukefi.metsi.data.model import ForestStand
-from lukefi.metsi.data.vector_model import ReferenceTrees, Strata
+from lukefi.metsi.data.vector_model import ReferenceTrees, Strata, VectorData
 from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.sim.operations import stand_local
 
 
 CONTAINERS = {
@@ -10,6 +11,7 @@ CONTAINERS = {
 }
 
 
+@stand_local()
 def vectorize(stands: list[ForestStand], **operation_params) -> list[ForestStand]:
     """
     Modifies a list of ForestStand objects' reference_trees and tree_strata into a struct-of-arrays style.
@@ -50,4 +52,25 @@ def vectorize(stands: list[ForestStand], **operation_params) -> list[ForestStand
     return stands
 
 
-__all__ = ["vectorize"]
+def vectorize_objects[V: ReferenceTrees | Strata](objects: list, container: type[V]) -> V:
+    """
+    Create a struct-of-arrays container from a list of ReferenceTree or TreeStratum objects without modifying them.
+    Attributes that the container does not declare, such as the back reference to the stand, are left out.
+
+    Args:
+        objects (list): List of ReferenceTree or TreeStratum objects
+        container (type[VectorData]): The container type, ReferenceTrees or Strata
+
+    Returns:
+        VectorData: A new container of the given type
+    """
+    result = container()
+    attr_dict: dict[str, Any] = {}
+    for data in objects:
+        for k, v in data.__dict__.items():
+            if k in result.dtypes:
+                attr_dict.setdefault(k, []).append(v)
+    return result.vectorize(attr_dict)
+
+
+__all__ = ["vectorize", "vectorize_objects"]
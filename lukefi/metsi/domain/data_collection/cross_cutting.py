@@ -96,14 +96,11 @@ def cross_cut_felled_trees(payload: OpTuple[ForestStand], /, **operation_paramet
 
     results = []
 
-    previous_cross_cutting_results = collected_data.get_list_result("cross_cutting")
-    previous_cross_cutting_results = filter(lambda r: r.source == "harvested", previous_cross_cutting_results)
-    previous_cross_cutting_results = list(map(lambda r: r.time_point, previous_cross_cutting_results))
-    if len(previous_cross_cutting_results) == 0:
-        last_time = 0
-    else:
-        last_time = max(previous_cross_cutting_results)
-    felled_trees = filter(lambda x: x.time_point > last_time, collected_data.get_list_result("felled_trees"))
+    previous_harvest_time_points = [
+        r.time_point for r in collected_data.get_list_result("cross_cutting") if r.source == "harvested"
+    ]
+    last_time = max(previous_harvest_time_points, default=0)
+    felled_trees = collected_data.get_list_result("felled_trees").after(last_time)
 
     for tree in felled_trees:
         res = cross_cut_tree(tree, stand.area, timber_price_table, impl)
@@ -53,8 +53,7 @@ def collect_properties(input_: OpTuple[ForestStand], **operation_parameters) ->
         elif key == "stratum":
             objects = stand.tree_strata
         else:
-            objects = list(filter(lambda obj: obj.time_point == collected_data.current_time_point,
-                           collected_data.get_list_result(key)))
+            objects = collected_data.get_list_result(key).at(collected_data.current_time_point)
         collected = property_collector(objects, properties)
         result_rows.extend(collected)
     collected_data.store(output_name, result_rows)
@@ -41,10 +41,9 @@ def clearcutting(input_: OpTuple[ForestStand], /, **operation_parameters) -> OpT
         diameter_limits_path = operation_parameters.get('clearcutting_limits_diameters', None)
 
         (age_limit, diameter_limit) = get_clearcutting_limits(stand, age_limits_path, diameter_limits_path)
-        age_limit_reached = age_limit <= futil.mean_age_stand(stand)
-        diameter_limit_reached = diameter_limit <= futil.calculate_basal_area_weighted_attribute_sum(
-            stand.reference_trees,
-            f=lambda x: x.breast_height_diameter * futil.calculate_basal_area(x))
+        aggregates = futil.StandAggregates(stand.reference_trees)
+        age_limit_reached = age_limit <= aggregates.mean_age
+        diameter_limit_reached = diameter_limit <= aggregates.basal_area_weighted_diameter
 
         if age_limit_reached or diameter_limit_reached:
             stand, collected_data = _clearcut_with_output(stand, collected_data, 'clearcutting')
@@ -14,6 +14,7 @@ from lukefi.metsi.data.model import ForestStand
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.forestry import forestry_utils as futil
 from lukefi.metsi.domain.forestry_operations.thinning_limits import SiteTypeKey, SpeciesKey, site_type_to_key
+from lukefi.metsi.domain.utils.parameter_tables import parameter_table
 from lukefi.metsi.app.utils import MetsiException
 
 
@@ -86,6 +87,7 @@ def create_clearcutting_limits_table(file_path: str) -> list:
         return table
 
 
+@parameter_table('clearcutting_limits_ages')
 def get_clearcutting_agelimits_from_parameter_file_contents(
     file_path: str,
 ) -> dict:
@@ -122,6 +124,7 @@ def get_clearcutting_agelimits_from_parameter_file_contents(
     return RENEWAL_AGES
 
 
+@parameter_table('clearcutting_limits_diameters')
 def get_clearcutting_diameterlimits_from_parameter_file_contents(
     file_path: str,
 ) -> dict:
@@ -1,10 +1,10 @@
-from functools import cache
 from lukefi.metsi.sim.core_types import CollectedData, OpTuple
 from lukefi.metsi.data.model import ForestStand, ReferenceTree, create_layered_tree
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.domain.utils.enums import SiteTypeKey, SoilPreparationKey, RegenerationKey
 from lukefi.metsi.domain.utils.conversion import site_type_to_key
 from lukefi.metsi.domain.collected_types import PriceableOperationInfo
+from lukefi.metsi.domain.utils.parameter_tables import parameter_table
 from lukefi.metsi.app.utils import MetsiException
 
 
@@ -32,7 +32,6 @@ DEFAULT_INSTRUCTIONS = {
 }
 
 
-@cache
 def create_planting_instructions_table(file_path: str) -> list:
     contents = None
     with open(file_path, "r") as f:
@@ -47,6 +46,7 @@ def create_planting_instructions_table(file_path: str) -> list:
         return table
 
 
+@parameter_table('planting_instructions')
 def get_planting_instructions_from_parameter_file_contents(
     file_path: str,
 ) -> dict:
@@ -1,4 +1,5 @@
 from collections.abc import Callable
+from typing import Literal
 from lukefi.metsi.data.model import ForestStand
 from lukefi.metsi.domain.collected_types import CrossCuttableTree
 from lukefi.metsi.domain.forestry_operations.thinning_limits import (
@@ -16,14 +17,15 @@ def iterative_thinning_with_output(
     stand: ForestStand,
     collected_data: CollectedData,
     thinning_factor: float,
-    thin_predicate: Callable[[ForestStand], bool],
+    bound: float,
     extra_factor_solver: Callable[[int, int, float], float],
     tag: str,
+    measure: Literal['basal_area', 'stems_per_ha'] = 'basal_area',
 ) -> OpTuple[ForestStand]:
-    """Run iterative thinning and save output for trees that had their stem count reduced.
-    No output is written for unchanged trees."""
+    """Run iterative thinning while the measure of the stand is at least the bound and save output for trees that had
+    their stem count reduced. No output is written for unchanged trees."""
     f0 = [t.stems_per_ha for t in stand.reference_trees]
-    stand = thinning.iterative_thinning(stand, thinning_factor, thin_predicate, extra_factor_solver)
+    stand = thinning.iterative_thinning_to_bound(stand, thinning_factor, bound, extra_factor_solver, measure)
 
     thinning_output = [
         CrossCuttableTree(
@@ -54,13 +56,14 @@ def first_thinning(input_: OpTuple[ForestStand], /, **operation_parameters) -> O
     hdom_0 = 11 if hdom_0 is None else hdom_0
     hdom_n = 16 if hdom_n is None else hdom_n
 
-    residue_stems = resolve_first_thinning_residue(stand)
+    aggregates = futil.StandAggregates(stand.reference_trees)
+    residue_stems = resolve_first_thinning_residue(stand, aggregates)
 
     def stems_over_limit():
-        return residue_stems < futil.overall_stems_per_ha(stand.reference_trees)
+        return residue_stems < aggregates.stems_per_ha
 
     def hdom_in_between():
-        return hdom_0 <= futil.solve_dominant_height_c_largest(stand) <= hdom_n
+        return hdom_0 <= aggregates.dominant_height_c_largest() <= hdom_n
 
     predicates = [stems_over_limit, hdom_in_between]
 
@@ -70,9 +73,10 @@ def first_thinning(input_: OpTuple[ForestStand], /, **operation_parameters) -> O
             stand=stand,
             collected_data=collected_data,
             thinning_factor=operation_parameters['thinning_factor'],
-            thin_predicate=lambda s: (residue_stems + epsilon) <= futil.overall_stems_per_ha(s.reference_trees),
+            bound=residue_stems + epsilon,
             extra_factor_solver=lambda i, n, c: (1.0-c) * i/n,
             tag='first_thinning',
+            measure='stems_per_ha',
         )
     else:
         raise UserWarning("Unable to perform first thinning")
@@ -87,8 +91,9 @@ def thinning_from_above(input_: OpTuple[ForestStand], /, **operation_parameters)
 
     stand.reference_trees.sort(key=lambda rt: rt.breast_height_diameter, reverse=True)
 
-    (lower_limit, upper_limit) = resolve_thinning_bounds(stand, thinning_limits)
-    def upper_limit_reached(): return upper_limit < futil.overall_basal_area(stand.reference_trees)
+    aggregates = futil.StandAggregates(stand.reference_trees)
+    (lower_limit, upper_limit) = resolve_thinning_bounds(stand, thinning_limits, aggregates)
+    def upper_limit_reached(): return upper_limit < aggregates.basal_area
     predicates = [upper_limit_reached]
 
     if evaluate_thinning_conditions(predicates):
@@ -96,7 +101,7 @@ def thinning_from_above(input_: OpTuple[ForestStand], /, **operation_parameters)
             stand=stand,
             collected_data=collected_data,
             thinning_factor=operation_parameters['thinning_factor'],
-            thin_predicate=lambda s: (lower_limit + epsilon) <= futil.overall_basal_area(s.reference_trees),
+            bound=lower_limit + epsilon,
             extra_factor_solver=lambda i, n, c: (1.0-c) * i/n,
             tag='thinning_from_above',
         )
@@ -113,10 +118,11 @@ def thinning_from_below(input_: OpTuple[ForestStand], /, **operation_parameters)
 
     stand.reference_trees.sort(key=lambda rt: rt.breast_height_diameter)
 
-    (lower_limit, upper_limit) = resolve_thinning_bounds(stand, thinning_limits)
+    aggregates = futil.StandAggregates(stand.reference_trees)
+    (lower_limit, upper_limit) = resolve_thinning_bounds(stand, thinning_limits, aggregates)
 
     def upper_limit_reached():
-        return upper_limit < futil.overall_basal_area(stand.reference_trees)
+        return upper_limit < aggregates.basal_area
 
     predicates = [upper_limit_reached]
 
@@ -125,7 +131,7 @@ def thinning_from_below(input_: OpTuple[ForestStand], /, **operation_parameters)
             stand=stand,
             collected_data=collected_data,
             thinning_factor=operation_parameters['thinning_factor'],
-            thin_predicate=lambda s: (lower_limit + epsilon) <= futil.overall_basal_area(s.reference_trees),
+            bound=lower_limit + epsilon,
             extra_factor_solver=lambda i, n, c: (1.0-c) * i/n,
             tag='thinning_from_below',
         )
@@ -140,10 +146,11 @@ def even_thinning(input_: OpTuple[ForestStand], /, **operation_parameters) -> Op
     epsilon = operation_parameters['e']
     thinning_limits = operation_parameters.get('thinning_limits', None)
 
-    (lower_limit, upper_limit) = resolve_thinning_bounds(stand, thinning_limits)
+    aggregates = futil.StandAggregates(stand.reference_trees)
+    (lower_limit, upper_limit) = resolve_thinning_bounds(stand, thinning_limits, aggregates)
 
     def upper_limit_reached():
-        return upper_limit < futil.overall_basal_area(stand.reference_trees)
+        return upper_limit < aggregates.basal_area
     
     predicates = [upper_limit_reached]
 
@@ -152,7 +159,7 @@ def even_thinning(input_: OpTuple[ForestStand], /, **operation_parameters) -> Op
             stand=stand,
             collected_data=collected_data,
             thinning_factor=operation_parameters['thinning_factor'],
-            thin_predicate=lambda s: (lower_limit + epsilon) <= futil.overall_basal_area(s.reference_trees),
+            bound=lower_limit + epsilon,
             extra_factor_solver=lambda i, n, c: 0,
             tag='even_thinning',
         )
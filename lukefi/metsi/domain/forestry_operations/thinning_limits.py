@@ -4,7 +4,8 @@ The module is basicly a utility file for thinning operations that are basal area
 Thinning limits lookup table is used for solving lower (y0) and upper (y1) bound
 of basal area thinnings.
 """
-from functools import cache, lru_cache
+from typing import Optional
+from functools import lru_cache
 from enum import Enum
 from collections.abc import KeysView
 from bisect import bisect
@@ -13,6 +14,7 @@ from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.forestry import forestry_utils as futil
 from lukefi.metsi.domain.utils.enums import SiteTypeKey
 from lukefi.metsi.domain.utils.conversion import site_type_to_key
+from lukefi.metsi.domain.utils.parameter_tables import parameter_table
 from lukefi.metsi.app.utils import MetsiException
 
 class CountyKey(Enum):
@@ -484,7 +486,7 @@ LIMITS_SLICE_LOOKUP = {
     }
 }
 
-@cache
+@parameter_table('thinning_limits')
 def create_thinning_limits_table(file_path: str) -> list:
     contents = None
     with open(file_path, "r") as f:
@@ -540,19 +542,22 @@ def get_thinning_limits_from_parameter_file_contents(
     return limits_for_species
 
 
-def resolve_thinning_bounds(stand: ForestStand, thinning_limits_file: str = None) -> tuple[float, float]:
+def resolve_thinning_bounds(stand: ForestStand, thinning_limits_file: str = None,
+                            aggregates: Optional[futil.StandAggregates] = None) -> tuple[float, float]:
     """ Resolves lower and upper bound for thinning. Values are in meters (m).
     :thinning_limits: thinning limits from a file parameter defined in control.py It is user's responsibility to provide it in correct format. 
     Parsing failure will raise an exception. 
-    If file not provided in control.py, the hardcoded THINNING_LIMITS structure will be used."""
+    If file not provided in control.py, the hardcoded THINNING_LIMITS structure will be used.
+    :aggregates: (optional) aggregates of the stand reference trees, computed if not given."""
+    aggregates = aggregates or futil.StandAggregates(stand.reference_trees)
     county_key = CountyKey.EASTERN_FINLAND
     sp_category_key = soil_peatland_category_to_key(stand.soil_peatland_category)
     site_type_key = site_type_to_key(stand.site_type_category)
-    sdom = futil.solve_dominant_species(stand.reference_trees)
+    sdom = aggregates.dominant_species
     if sdom is None:
         raise UserWarning(f"Unable to resolve thinning bounds with no dominant species found.")
     species_key = species_to_key(sdom)
-    hdom = futil.solve_dominant_height_c_largest(stand)
+    hdom = aggregates.dominant_height_c_largest()
 
     if thinning_limits_file is not None:
         spe_limits = get_thinning_limits_from_parameter_file_contents(
@@ -598,9 +603,9 @@ FIRST_THINNING_RESIDUE_STEMS = {
 }
 
 
-def resolve_first_thinning_residue(stand: ForestStand) -> float:
+def resolve_first_thinning_residue(stand: ForestStand, aggregates: Optional[futil.StandAggregates] = None) -> float:
     """ Resolves stem count residue for first thinning operation. Values are stems per hectare. """
-    sdom = futil.solve_dominant_species(stand.reference_trees)
+    sdom = (aggregates or futil.StandAggregates(stand.reference_trees)).dominant_species
     if sdom is None:
         raise UserWarning(f"Unable to resolve first thinning residue with no dominant species found.")
     st_key = site_type_to_key(stand.site_type_category)
@@ -1,8 +1,11 @@
 from lukefi.metsi.data.conversion import internal2mela
 from lukefi.metsi.data.enums.internal import TreeSpecies
-from lukefi.metsi.data.model import ForestStand
+from lukefi.metsi.data.model import ForestStand, ReferenceTree
 from lukefi.metsi.domain.natural_processes.util import update_stand_growth
-from functools import cached_property
+from functools import cache, cached_property
+from typing import Any, Callable
+import numpy as np
+import numpy.typing as npt
 import pymotti
 
 
@@ -18,6 +21,35 @@ def spe2motti(spe: int) -> pymotti.Species:
     return pymotti.Species(spe if spe <= 6 else spe + 1)
 
 
+@cache
+def motti_species_table() -> npt.NDArray[np.object_]:
+    """Lookup table from internal species code to Motti species, as converted by spe2motti.
+    Codes without a Motti counterpart map to None."""
+    table = np.full(max(TreeSpecies) + 1, None, dtype=object)
+    for spe in internal2mela.species_map:
+        table[spe] = spe2motti(spe)
+    return table
+
+
+def species2motti(species: npt.ArrayLike) -> list[pymotti.Species]:
+    """Convert an array of internal species codes to Motti with a single table lookup."""
+    table = motti_species_table()
+    codes = np.asarray(species, dtype=np.int64)
+    known = (codes >= 0) & (codes < len(table))
+    result = table[np.where(known, codes, 0)]
+    unknown = ~known | (result == None)  # pylint: disable=singleton-comparison
+    if unknown.any():
+        # raise the conversion error of the first unconvertible code
+        spe2motti(int(codes[unknown][0]))
+    return result.tolist()
+
+
+def tree_column(trees: list[ReferenceTree], fn: Callable[[ReferenceTree], Any],
+                dtype: npt.DTypeLike = np.float64) -> npt.NDArray:
+    """Collect a tree variable of all trees into an array"""
+    return np.fromiter(map(fn, trees), dtype=dtype, count=len(trees))
+
+
 class MottiGrowthPredictor(pymotti.Predict):
     """
     Extend pymotti.Predict to provide properties from forest-data-model based ForestStand and ReferenceTree objects
@@ -109,34 +141,35 @@ class MottiGrowthPredictor(pymotti.Predict):
     # -- tree variables --------------------
 
     @cached_property
-    def trees_f(self) -> list[float]:
+    def trees_f(self) -> npt.NDArray[np.float64]:
         """Tree stem count per hectare"""
-        return [t.stems_per_ha for t in self.stand.reference_trees]
+        return tree_column(self.stand.reference_trees, lambda t: t.stems_per_ha)
 
     @cached_property
-    def trees_d(self) -> list[float]:
+    def trees_d(self) -> npt.NDArray[np.float64]:
         """Breast height diameter (cm). Force at least 0.01, pymotti just crashes with 0 basal area otherwise."""
-        return [(t.breast_height_diameter or 0.01) for t in self.stand.reference_trees]
+        return tree_column(self.stand.reference_trees, lambda t: t.breast_height_diameter or 0.01)
 
     @cached_property
-    def trees_h(self) -> list[float]:
+    def trees_h(self) -> npt.NDArray[np.float64]:
         """Height (m)"""
-        return [t.height for t in self.stand.reference_trees]
+        return tree_column(self.stand.reference_trees, lambda t: t.height)
 
     @cached_property
     def trees_spe(self) -> list[pymotti.Species]:
         """species code converted to Motti compatible coding"""
-        return [spe2motti(t.species) for t in self.stand.reference_trees]
+        return species2motti(tree_column(
+            self.stand.reference_trees, lambda t: -1 if t.species is None else t.species, np.int64))
 
     @cached_property
-    def trees_t0(self) -> list[float]:
+    def trees_t0(self) -> npt.NDArray[np.float64]:
         """Year of birth computed from stand year and tree age"""
-        return [self.year - t.biological_age for t in self.stand.reference_trees]
+        return self.year - tree_column(self.stand.reference_trees, lambda t: t.biological_age)
 
     @cached_property
-    def trees_t13(self) -> list[float]:
+    def trees_t13(self) -> npt.NDArray[np.float64]:
         """Breast height achievement year computed from stand year and breast height age"""
-        return [self.year - (t.breast_height_age or 0.0) for t in self.stand.reference_trees]
+        return self.year - tree_column(self.stand.reference_trees, lambda t: t.breast_height_age or 0.0)
 
     @cached_property
     def trees_storie(self) -> list[pymotti.Storie]:
@@ -144,7 +177,7 @@ class MottiGrowthPredictor(pymotti.Predict):
 
         We don't have this yet, should be set in regeneration.
         For imported trees, should either come from data, be computed or just set to NONE."""
-        return [pymotti.Storie.NONE for _ in self.stand.reference_trees]
+        return [pymotti.Storie.NONE] * len(self.stand.reference_trees)
 
     @cached_property
     def trees_snt(self) -> list[pymotti.Origin]:
@@ -160,12 +193,14 @@ class MottiGrowthPredictor(pymotti.Predict):
 def grow_motti(input: tuple[ForestStand, None], **operation_parameters) -> tuple[ForestStand, None]:
     step = operation_parameters.get('step', 5)
     stand, _ = input
-    growth = MottiGrowthPredictor(stand).evolve()
+    predictor = MottiGrowthPredictor(stand)
+    trees = stand.reference_trees
+    growth = predictor.evolve()
     # Motti returns deltas.
-    diameters = list(map(lambda x: x[0].breast_height_diameter + x[1], zip(stand.reference_trees, growth.trees_id)))
-    heights = list(map(lambda x: x[0].height + x[1], zip(stand.reference_trees, growth.trees_ih)))
-    stems = list(map(lambda x: x[0].stems_per_ha + x[1], zip(stand.reference_trees, growth.trees_if)))
-    update_stand_growth(stand, diameters, heights, stems, step)
+    diameters = tree_column(trees, lambda t: t.breast_height_diameter) + np.asarray(growth.trees_id)
+    heights = predictor.trees_h + np.asarray(growth.trees_ih)
+    stems = predictor.trees_f + np.asarray(growth.trees_if)
+    update_stand_growth(stand, diameters.tolist(), heights.tolist(), stems.tolist(), step)
     # prune dead trees
     stand.reference_trees = [t for t in stand.reference_trees if t.stems_per_ha >= 1.0]
     return stand, None
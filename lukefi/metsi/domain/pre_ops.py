@@ -1,39 +1,63 @@
+import copy
 import traceback
 from typing import Any
-from lukefi.metsi.data.model import ForestStand, ReferenceTree
+from lukefi.metsi.data.model import ForestStand, ReferenceTree, TreeStratum
 from lukefi.metsi.data.enums.internal import LandUseCategory
 from lukefi.metsi.domain.utils.filter import applyfilter
-from lukefi.metsi.forestry.forestry_utils import find_matching_storey_stratum_for_tree
+from lukefi.metsi.forestry.forestry_utils import StratumIndex
 from lukefi.metsi.forestry.preprocessing import tree_generation, pre_util
-from lukefi.metsi.forestry.preprocessing.coordinate_conversion import convert_location_to_ykj, CRS
-from lukefi.metsi.forestry.preprocessing.age_supplementing import supplement_age_for_reference_trees
+from lukefi.metsi.forestry.preprocessing.coordinate_conversion import convert_locations_to_ykj, CRS
+from lukefi.metsi.forestry.preprocessing.age_supplementing import supplement_ages
 from lukefi.metsi.forestry.preprocessing.naslund import naslund_height
+from lukefi.metsi.forestry.preprocessing.location_cache import get_grid_cache
 from lukefi.metsi.forestry.preprocessing.tree_generation_validation import create_stratum_tree_comparison_set, \
     debug_output_row_from_comparison_set, debug_output_header_row
 from lukefi.metsi.data.vectorize import vectorize
+from lukefi.metsi.app.console_logging import ProgressReporter, print_logline
 from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.sim.operations import stand_local
 
 
+@stand_local()
 def preproc_filter(stands: list[ForestStand], **operation_params) -> list[ForestStand]:
+    """ Filter stands, trees and strata with the given filter expressions. With `"vectorized": True` the expressions
+    are evaluated as boolean masks over tree and stratum columns instead of once per object. """
     named = operation_params.get("named", {})
+    vectorized = operation_params.get("vectorized", False)
     for k, v in operation_params.items():
-        if k != "named":
-            stands = applyfilter(stands, k, v, named)
+        if k not in ("named", "vectorized"):
+            stands = applyfilter(stands, k, v, named, vectorized)
     return stands
 
 
+@stand_local()
 def compute_location_metadata(stands: list[ForestStand], **operation_params) -> list[ForestStand]:
     """
     This operation sets in-place the location based metadata properties for each given ForestStand, where missing.
     These properties are: height above sea level, temperature sum, sea effect, lake effect, monthly temperature and
     monthly rainfall
+
+    The elevation and weather lookups are memoized in a process wide LRU cache:
+
+    :location_cache_resolution (optional): Grid resolution (km) for sharing lookups between nearby stands. Lookups are
+        made at the grid points and altitudes rounded to whole meters. Default 0, ie. exact locations.
+    :location_cache_size (optional): Maximum number of cached lookups. Default 100000.
+    :location_cache_file (optional): File for persisting the cache between runs.
     """
-    _ = operation_params
     # import constrained to here as pymotti is an optional dependency
     from pymotti.lasum import ilmanor  # type: ignore # pylint: disable=import-error,import-outside-toplevel
     from pymotti.coord import etrs_tm35_to_ykj as conv  # type: ignore # pylint: disable=import-error,import-outside-toplevel
     from pymotti.kor import xkor  # type: ignore # pylint: disable=import-error,import-outside-toplevel
 
+    def weather(lon: float, lat: float, altitude: float) -> tuple:
+        wi = ilmanor(lon, lat, altitude)
+        return wi.dd, wi.sea, wi.lake, wi.temp, wi.rain
+
+    cache = get_grid_cache(operation_params.get('location_cache_resolution', 0.0),
+                           operation_params.get('location_cache_size', 100000),
+                           operation_params.get('location_cache_file'))
+    hits, misses = cache.hits, cache.misses
+
     for stand in stands:
         if stand.geo_location is not None and stand.geo_location[0] is not None and stand.geo_location[1] is not None:
             if stand.geo_location[3] == 'EPSG:3067':
@@ -45,28 +69,43 @@ def compute_location_metadata(stands: list[ForestStand], **operation_params) ->
         else:
             raise MetsiException("No geolocation data")
 
-        if stand.geo_location[2] is None:
+        height = stand.geo_location[2]
+        if height is None:
+            height = cache.lookup('xkor', xkor, lat, lon)
             stand.geo_location = (
                 stand.geo_location[0],
                 stand.geo_location[1],
-                xkor(lat, lon),
+                height,
                 stand.geo_location[3]
             )
-        wi = ilmanor(lon, lat, stand.geo_location[2])
+        altitude = height if cache.resolution <= 0 else round(height)
+        dd, sea, lake, temp, rain = cache.lookup('ilmanor', weather, lon, lat, altitude)
 
         if stand.degree_days is None:
-            stand.degree_days = wi.dd
+            stand.degree_days = dd
         if stand.sea_effect is None:
-            stand.sea_effect = wi.sea
+            stand.sea_effect = sea
         if stand.lake_effect is None:
-            stand.lake_effect = wi.lake
+            stand.lake_effect = lake
         if stand.monthly_temperatures is None:
-            stand.monthly_temperatures = wi.temp
+            stand.monthly_temperatures = copy.copy(temp)
         if stand.monthly_rainfall is None:
-            stand.monthly_rainfall = wi.rain
+            stand.monthly_rainfall = copy.copy(rain)
+
+    cache.save()
+    hits, misses = cache.hits - hits, cache.misses - misses
+    # logged regardless of ProgressReporter.enabled, so that the lookups of worker processes are reported as well
+    if hits + misses > 0:
+        print_logline(f"Location metadata cache hit rate {hits / (hits + misses):.1%} "
+                      f"({hits} hits, {misses} misses, {len(cache.entries)} cached)")
     return stands
 
 
+def _identifier_order(obj: ReferenceTree | TreeStratum) -> str:
+    return obj.identifier if obj.identifier is not None else ""
+
+
+@stand_local("debug")
 def generate_reference_trees(stands: list[ForestStand], **operation_params) -> list[ForestStand]:
     """ Operation function that generates (N * stratum) reference trees for each stand """
     debug = operation_params.get('debug', False)
@@ -74,19 +113,18 @@ def generate_reference_trees(stands: list[ForestStand], **operation_params) -> l
     debug_strata_rows = []
     debug_tree_rows = []
     stratum_association_diameter_threshold = operation_params.get('stratum_association_diameter_threshold', 2.5)
-    for i, stand in enumerate(stands):
-        print(f"\rGenerating trees for stand {stand.identifier}    {i}/{len(stands)}", end="")
-        stand_trees = sorted(stand.reference_trees, key=lambda tree: tree.identifier if
-                             tree.identifier is not None else "")
-        for tree in stand_trees:
-            stratum = find_matching_storey_stratum_for_tree(
-                tree, stand.tree_strata, stratum_association_diameter_threshold)
+    # source trees associated with each stratum, keyed by id() of the stratum
+    associated_trees: dict[int, list[ReferenceTree]] = {}
+    for stand in stands:
+        if not (stand.reference_trees and stand.tree_strata):
+            stand.tree_strata.sort(key=_identifier_order)
+            continue
+        index = StratumIndex(stand.tree_strata, stratum_association_diameter_threshold)
+        for tree in sorted(stand.reference_trees, key=_identifier_order):
+            stratum = index.find(tree)
             if stratum is None:
                 continue
-            if stratum.__dict__.get('_trees') is not None:
-                stratum._trees.append(tree)
-            else:
-                stratum._trees = [tree]
+            associated_trees.setdefault(id(stratum), []).append(tree)
             if debug:
                 debug_tree_rows.append([
                     stratum.identifier,
@@ -94,12 +132,19 @@ def generate_reference_trees(stands: list[ForestStand], **operation_params) -> l
                     tree.measured_height or 'NA',
                     tree.stems_per_ha or 'NA'
                 ])
-        stand.tree_strata.sort(key=lambda stratum: stratum.identifier if stratum.identifier is not None else "")
+        stand.tree_strata.sort(key=_identifier_order)
+    # weibull and lm trees of all strata are generated in one batch per strategy
+    generated_trees = tree_generation.generate_batched_trees(
+        [stratum for stand in stands for stratum in stand.tree_strata], associated_trees, **operation_params)
+    progress = ProgressReporter("Generating trees for stands", len(stands))
+    for stand in stands:
         new_trees: list[ReferenceTree] = []
         for stratum in stand.tree_strata:
             stratum_trees: list[ReferenceTree] = []
             try:
-                stratum_trees = tree_generation.reference_trees_from_tree_stratum(stratum, **operation_params)
+                stratum_trees = tree_generation.reference_trees_from_tree_stratum(
+                    stratum, generated_trees.get(id(stratum)), associated_trees.get(id(stratum), []),
+                    **operation_params)
             except Exception as e:  # pylint: disable=broad-exception-caught
                 print(
                     f"\nError generating trees for stratum {stratum.identifier} with diameter {stratum.mean_diameter}, "
@@ -127,7 +172,8 @@ def generate_reference_trees(stands: list[ForestStand], **operation_params) -> l
                 ])
                 debug_output_rows.append(debug_output_row_from_comparison_set(stratum, validation_set))
         stand.reference_trees = new_trees
-    print()
+        progress.update()
+    progress.finish()
     if debug:
         import csv  # pylint: disable=import-outside-toplevel
         with open('debug_generated_tree_results.csv', 'w', newline='\n', encoding="utf-8") as csvfile:
@@ -147,6 +193,7 @@ def generate_reference_trees(stands: list[ForestStand], **operation_params) -> l
     return stands
 
 
+@stand_local()
 def supplement_missing_tree_heights(stands: list[ForestStand], **operation_params) -> list[ForestStand]:
     """ Fill in missing (None or nonpositive) tree heights from Näslund height curve """
     _ = operation_params
@@ -157,14 +204,15 @@ def supplement_missing_tree_heights(stands: list[ForestStand], **operation_param
     return stands
 
 
+@stand_local()
 def supplement_missing_tree_ages(stands: list[ForestStand], **operation_params) -> list[ForestStand]:
     """ Attempt to fill in missing (None or nonpositive) tree ages using strata ages or other reference tree ages"""
     _ = operation_params
-    for stand in stands:
-        supplement_age_for_reference_trees(stand.reference_trees, stand.tree_strata)
+    supplement_ages([stand.reference_trees for stand in stands], [stand.tree_strata for stand in stands])
     return stands
 
 
+@stand_local()
 def supplement_missing_stratum_diameters(stands: list[ForestStand], **operation_params) -> list[ForestStand]:
     """ Attempt to fill in missing (None) stratum mean diameters using mean height """
     _ = operation_params
@@ -178,6 +226,7 @@ def supplement_missing_stratum_diameters(stands: list[ForestStand], **operation_
     return stands
 
 
+@stand_local()
 def generate_sapling_trees_from_sapling_strata(stands: list[ForestStand], **operation_params) -> list[ForestStand]:
     """ Create sapling reference trees from sapling strata """
     _ = operation_params
@@ -192,6 +241,7 @@ def generate_sapling_trees_from_sapling_strata(stands: list[ForestStand], **oper
     return stands
 
 
+@stand_local()
 def scale_area_weight(stands: list[ForestStand], **operation_params):
     """ Scales area weight of a stand.
 
@@ -204,6 +254,7 @@ def scale_area_weight(stands: list[ForestStand], **operation_params):
     return stands
 
 
+@stand_local()
 def convert_coordinates(stands: list[ForestStand], **operation_params: dict[str, Any]) -> list[ForestStand]:
     """ Preprocessing operation for converting the current coordinate system to target system
 
@@ -212,8 +263,8 @@ def convert_coordinates(stands: list[ForestStand], **operation_params: dict[str,
     defaults = CRS.EPSG_2393.value
     target_system = operation_params.get('target_system', defaults[0])
     if target_system in defaults:
-        for s in stands:
-            s.geo_location = convert_location_to_ykj(s)
+        for s, geo_location in zip(stands, convert_locations_to_ykj(stands)):
+            s.geo_location = geo_location
     else:
         raise MetsiException("Check definition of operation params.\n"
                              f"{defaults[0]}\' conversion supported.")
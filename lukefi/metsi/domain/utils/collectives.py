@@ -2,9 +2,10 @@ import builtins
 from enum import Enum
 from functools import lru_cache, cache
 from typing import Any, Optional
-from collections.abc import Iterator, Callable
+from collections.abc import Collection, Iterator, Callable
 import numpy as np
 from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.sim.core_types import TimeIndexedResults
 
 GetVarFn = Callable[[str], Any]
 """A function that returns the value of a global variable given its name."""
@@ -115,6 +116,18 @@ class LazyListDataFrame:
         return self._xs.__iter__()
 
 
+def select_time_points(results: list, time_points: Collection[int]) -> list:
+    """
+    Select the results whose `time_point` is in `time_points`. TimeIndexedResults are sliced by bisection,
+    other lists are scanned.
+    """
+    if isinstance(results, TimeIndexedResults):
+        if isinstance(time_points, range) and time_points.step == 1:
+            return results.between(time_points.start, time_points.stop)
+        return [item for time_point in sorted(set(time_points)) for item in results.at(time_point)]
+    return [item for item in results if item.time_point in time_points]
+
+
 def autocollective(x: Any, **list_filters) -> Any:
     """
     Automagically turn `x` into a LazyListDataFrame if it's a list.
@@ -123,6 +136,9 @@ def autocollective(x: Any, **list_filters) -> Any:
     """
     if isinstance(x, list):
         if list_filters:
+            time_points = list_filters.pop('time_point', None)
+            if time_points is not None:
+                x = select_time_points(x, time_points)
             for key, values in list_filters.items():
                 x = [item for item in x if getattr(item, key) in values]
         return LazyListDataFrame(x)
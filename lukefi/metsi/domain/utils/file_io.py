@@ -1,16 +1,16 @@
-from functools import cache
 import numpy as np
 import csv
 import json
+from lukefi.metsi.domain.utils.parameter_tables import parameter_table
 
 
-@cache
+@parameter_table('timber_price_table')
 def get_timber_price_table(file_path: str) -> np.ndarray:
     """Converts the string representation of a timber price table csv to a numpy.ndarray."""
     table = np.genfromtxt(file_path, delimiter=';', skip_header=1)
     return table
 
-@cache
+@parameter_table('renewal_costs')
 def get_renewal_costs_as_dict(file_path: str) -> dict[str, float]:
     """Returns the csv at :file_path: as a dictionary, where key is the operation name and value ie the cost."""
     costs = {}
@@ -21,7 +21,7 @@ def get_renewal_costs_as_dict(file_path: str) -> dict[str, float]:
             costs[row[0]] = float(row[1]) # operation: cost
     return costs
     
-@cache
+@parameter_table('land_values')
 def get_land_values_as_dict(file_path: str) -> dict:
     with open(file_path, "r") as f:
         return json.load(f)
@@ -1,6 +1,13 @@
-from typing import Any, Literal
+import ast
+from functools import cache, lru_cache
+from itertools import compress
+from numbers import Number
+from typing import Any, Literal, Optional
+import numpy as np
+import numpy.typing as npt
+from lukefi.metsi.app.utils import MetsiException
 from lukefi.metsi.data.model import ForestStand
-from lukefi.metsi.domain.utils.collectives import GetVarFn, compile_collector, getvarfn
+from lukefi.metsi.domain.utils.collectives import CollectFn, GetVarFn, Globals, compile_collector, getvarfn
 
 Verb = Literal["select", "remove"]
 Object = Literal["stands", "trees", "strata"]
@@ -31,8 +38,12 @@ def applyfilter(
     stands: list[ForestStand],
     command: str,
     expr: str,
-    named: dict[str, str] = {}
+    named: Optional[dict[str, str]] = None,
+    vectorized: bool = False
 ) -> list[ForestStand]:
+    named = named or {}
+    if vectorized:
+        return applyfilter_vectorized(stands, command, expr, named)
     predicate = compile_collector(expr)
     verb, object = parsecommand(command)
     if verb == "remove":
@@ -59,3 +70,160 @@ def applyfilter(
                 if predicate(makegetvarfn(named, t, stand=s))
             ]
     return stands
+
+#---- vectorized filtering ----------------------------------------
+
+def _truth(x: Any) -> npt.NDArray[np.bool_]:
+    arr = np.asarray(x)
+    if arr.dtype == object:
+        return np.fromiter((bool(v) for v in arr.flat), dtype=np.bool_, count=arr.size).reshape(arr.shape)
+    return arr.astype(np.bool_, copy=False)
+
+
+def _all(*xs: Any) -> npt.NDArray[np.bool_]:
+    result = _truth(xs[0])
+    for x in xs[1:]:
+        result = np.logical_and(result, _truth(x))
+    return result
+
+
+def _any(*xs: Any) -> npt.NDArray[np.bool_]:
+    result = _truth(xs[0])
+    for x in xs[1:]:
+        result = np.logical_or(result, _truth(x))
+    return result
+
+
+def _not(x: Any) -> npt.NDArray[np.bool_]:
+    return np.logical_not(_truth(x))
+
+
+def _isin(x: Any, values: Any) -> npt.NDArray[np.bool_]:
+    return np.isin(x, list(values))
+
+
+def _notin(x: Any, values: Any) -> npt.NDArray[np.bool_]:
+    return np.logical_not(_isin(x, values))
+
+
+class _ElementwiseTransformer(ast.NodeTransformer):
+    """Rewrites the short-circuiting boolean operators, chained comparisons and membership tests of a filter
+    expression into calls of their elementwise NumPy counterparts."""
+
+    @staticmethod
+    def _call(fn: str, args: list[ast.expr], node: ast.AST) -> ast.Call:
+        return ast.copy_location(ast.Call(func=ast.Name(id=fn, ctx=ast.Load()), args=args, keywords=[]), node)
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.AST:
+        self.generic_visit(node)
+        return self._call("_all" if isinstance(node.op, ast.And) else "_any", node.values, node)
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return self._call("_not", [node.operand], node)
+        return node
+
+    def visit_Compare(self, node: ast.Compare) -> ast.AST:
+        self.generic_visit(node)
+        parts: list[ast.expr] = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            if isinstance(op, ast.In):
+                parts.append(self._call("_isin", [left, right], node))
+            elif isinstance(op, ast.NotIn):
+                parts.append(self._call("_notin", [left, right], node))
+            else:
+                parts.append(ast.copy_location(ast.Compare(left=left, ops=[op], comparators=[right]), node))
+            left = right
+        return parts[0] if len(parts) == 1 else self._call("_all", parts, node)
+
+
+@lru_cache
+def compile_mask(expr: str) -> CollectFn:
+    """Compile a filter expression `expr` into a function returning a boolean mask.
+
+    The expression is evaluated once over whole columns instead of once per object. Boolean operators, chained
+    comparisons and `in` are evaluated elementwise.
+
+    :param expr: A python expression over column arrays and scalars.
+    :return: A collector function for the mask."""
+    tree = ast.fix_missing_locations(_ElementwiseTransformer().visit(ast.parse(expr.strip(), mode="eval")))
+    code = compile(tree, "<filter>", "eval")
+    globals = Globals()
+    globals.update(_all=_all, _any=_any, _not=_not, _isin=_isin, _notin=_notin)
+    def fn(getvar: GetVarFn) -> Any:
+        globals.delegate = getvar
+        return eval(code, globals)  # pylint: disable=eval-used
+    return fn
+
+
+def makemaskgetvarfn(named: dict[str, str], *args: Any, **kwargs: Any) -> GetVarFn:
+    def getnamed(name: str) -> Any:
+        return compile_mask(named[name])(getvar)
+    getvar: GetVarFn = cache(getvarfn(*args, getnamed, **kwargs))
+    return getvar
+
+
+def _stand_column(stands: list[ForestStand], name: str) -> np.ndarray:
+    values = [getattr(s, name) for s in stands]
+    if all(isinstance(v, Number) for v in values):
+        return np.array(values)
+    # keep the python values (None, enums, strings, lists) as is to retain the semantics of the row-wise filter
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def _select(stands: list[ForestStand], attr: str, predicate: CollectFn, named: dict[str, str]):
+    for s in stands:
+        soa = getattr(s, f"{attr}_soa")
+        if soa.size == 0:
+            continue
+        mask = np.broadcast_to(_truth(predicate(makemaskgetvarfn(named, soa, stand=s))), (soa.size,))
+        objects = getattr(s, attr)
+        # stands read into SoA containers only have no object list to compact
+        if objects and len(objects) != len(mask):
+            raise MetsiException(f"Stand {s.identifier} has {len(objects)} {attr} objects but {len(mask)} "
+                                 f"vectorized {attr}")
+        soa.select(mask)
+        if objects:
+            setattr(s, attr, list(compress(objects, mask)))
+
+
+def applyfilter_vectorized(
+    stands: list[ForestStand],
+    command: str,
+    expr: str,
+    named: Optional[dict[str, str]] = None
+) -> list[ForestStand]:
+    """Vectorized variant of `applyfilter`.
+
+    Tree and stratum filters are evaluated as one boolean mask per stand over the columns of the stand's
+    `ReferenceTrees`/`Strata` SoA container. The selection is then applied as a single compaction of the SoA container
+    and object list. Stands without a SoA container are filtered row-wise with `applyfilter`, as vectorizing their
+    objects for each filter would cost more than the filter itself. Stand filters are evaluated once over stand
+    attribute columns of the whole batch. Missing values of vectorized stands are compared as their SoA defaults, eg.
+    NaN for floats."""
+    named = named or {}
+    predicate = compile_mask(expr)
+    verb, target = parsecommand(command)
+    if verb == "remove":
+        selected = predicate
+
+        def predicate(getvar: GetVarFn) -> Any:
+            return _not(selected(getvar))
+    if target == "stands":
+        if not stands:
+            return stands
+
+        @cache
+        def getcolumn(name: str) -> np.ndarray:
+            return _stand_column(stands, name)
+        mask = np.broadcast_to(_truth(predicate(makemaskgetvarfn(named, getcolumn))), (len(stands),))
+        stands = list(compress(stands, mask))
+    else:
+        attr = "reference_trees" if target == "trees" else "tree_strata"
+        vectorized = [s for s in stands if getattr(s, f"{attr}_soa") is not None]
+        _select(vectorized, attr, predicate, named)
+        if len(vectorized) < len(stands):
+            applyfilter([s for s in stands if getattr(s, f"{attr}_soa") is None], command, expr, named)
+    return stands
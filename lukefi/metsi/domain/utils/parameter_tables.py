@@ -0,0 +1,56 @@
+""" Registry of the parsers of parameter files given in the operation_file_params section of the control file.
+
+Each parameter file is parsed once per process and served as an immutable lookup structure, so that operations can
+look up their tables on every invocation without file I/O. """
+from functools import cache, wraps
+from types import MappingProxyType
+from typing import Any, Callable
+import numpy as np
+from lukefi.metsi.app.utils import ConfigurationException
+
+PARAMETER_TABLES: dict[str, Callable[[str], Any]] = {}
+
+
+def freeze(value: Any) -> Any:
+    """ Immutable copy of a parsed parameter table: dicts as read-only mappings, lists as tuples and numpy arrays as
+    read-only arrays """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    return value
+
+
+def parameter_table(*names: str) -> Callable[[Callable[[str], Any]], Callable[[str], Any]]:
+    """ Registers the decorated parser for the given operation_file_params names. The parser is called once per file
+    path and its result is frozen. """
+    def decorator(parser: Callable[[str], Any]) -> Callable[[str], Any]:
+        @cache
+        @wraps(parser)
+        def table(file_path: str) -> Any:
+            return freeze(parser(file_path))
+        for name in names:
+            PARAMETER_TABLES[name] = table
+        return table
+    return decorator
+
+
+def validate_parameter_files(operation_file_params: dict[Any, dict[str, str]]):
+    """ Parse the registered parameter files of all operations, raising ConfigurationException for invalid files.
+    Names without a registered parser are passed to the operations as is. """
+    for operation, file_params in operation_file_params.items():
+        for name, file_path in file_params.items():
+            parser = PARAMETER_TABLES.get(name)
+            if parser is None:
+                continue
+            try:
+                parser(file_path)
+            except Exception as e:
+                operation_name = getattr(operation, '__name__', operation)
+                raise ConfigurationException(
+                    f"Invalid parameter file '{file_path}' given as {name} for {operation_name}: {e}") from e
+
+
+__all__ = ['PARAMETER_TABLES', 'freeze', 'parameter_table', 'validate_parameter_files']
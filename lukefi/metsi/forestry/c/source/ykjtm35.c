@@ -224,6 +224,27 @@ int tm35fin_to_ykj(double u, double v, double* x, double* y)
     return ykjtm35fin(u, v, x, y, 0);
 }
 
+/* Converts n points at once. Points that can not be converted are left
+   untouched in the output arrays. Returns the number of failed points. */
+long ykjtm35fin_array(const double* x, const double* y, double* u, double* v, long n, int ykjtotm35)
+{
+    long i, failed = 0;
+    for(i = 0; i < n; i++)
+        if(!ykjtm35fin(x[i], y[i], u + i, v + i, ykjtotm35))
+            failed++;
+    return failed;
+}
+
+long ykj_to_tm35fin_array(const double* x, const double* y, double* u, double* v, long n)
+{
+    return ykjtm35fin_array(x, y, u, v, n, 1);
+}
+
+long tm35fin_to_ykj_array(const double* u, const double* v, double* x, double* y, long n)
+{
+    return ykjtm35fin_array(u, v, x, y, n, 0);
+}
+
 #ifdef TEST
 int main(int argc, char** argv)
 {
@@ -1,6 +1,8 @@
 import math
 import statistics
+from bisect import bisect_left
 from enum import Enum
+from functools import cached_property
 from lukefi.metsi.data.enums.internal import TreeSpecies, DECIDUOUS_SPECIES, CONIFEROUS_SPECIES
 from lukefi.metsi.data.model import ReferenceTree, ForestStand, TreeStratum
 from typing import Optional
@@ -16,11 +18,13 @@ def compounded_growth_factor(growth_percent: float, years: int) -> float:
 
 def solve_dominant_height_c_largest(stand, c: int = 100):
     """ Calculate stands weighted average of c largest stems (100 by default) """
-    sorted_trees = sorted(stand.reference_trees, key=lambda rt: rt.breast_height_diameter, reverse=True)
+    return _dominant_height_c_largest(((rt.breast_height_diameter, rt.stems_per_ha) for rt in stand.reference_trees), c)
+
+
+def _dominant_height_c_largest(diameters_and_stems: Iterable[tuple[float, float]], c: int) -> float:
+    sorted_trees = sorted(diameters_and_stems, key=lambda dw: dw[0], reverse=True)
     dw_sum, n = 0, 0
-    for rt in sorted_trees:
-        d = rt.breast_height_diameter
-        w = rt.stems_per_ha
+    for d, w in sorted_trees:
         if n + w >= c:
             wn = (c - n)  # notice only portion of stems as last weight
             dw_sum += d * wn
@@ -129,6 +133,62 @@ def override_from_diameter(initial_stratum: TreeStratum, candidate_stratum: Tree
     return initial_stratum
 
 
+class StandAggregates:
+    """
+    Numeric aggregates of a set of reference trees, such as those used for thinning and clearcutting decisions. The
+    tree attributes are gathered in one pass and each aggregate is computed once on first use, with the same results
+    as the corresponding function of this module.
+
+    The aggregates are a snapshot of the trees: create new aggregates after modifying the trees.
+    """
+
+    def __init__(self, trees: list[ReferenceTree]):
+        self.trees = trees
+        self.diameters = [rt.breast_height_diameter for rt in trees]
+        self.stems = [rt.stems_per_ha for rt in trees]
+
+    @cached_property
+    def basal_areas(self) -> list[float]:
+        meters_factor = 0.01
+        return [math.pi * math.pow(d * 0.5 * meters_factor, 2) * f for d, f in zip(self.diameters, self.stems)]
+
+    @cached_property
+    def basal_area(self) -> float:
+        """ see overall_basal_area """
+        return sum(self.basal_areas)
+
+    @cached_property
+    def stems_per_ha(self) -> float:
+        """ see overall_stems_per_ha """
+        return sum(self.stems)
+
+    @cached_property
+    def dominant_species(self) -> Optional[Enum]:
+        """ see solve_dominant_species """
+        if len(self.trees) == 0:
+            return None
+        bucket = {}
+        for rt, basal_area in zip(self.trees, self.basal_areas):
+            bucket[rt.species] = bucket.get(rt.species, 0.0) + basal_area
+        return max(bucket, key=bucket.get)
+
+    def dominant_height_c_largest(self, c: int = 100) -> float:
+        """ see solve_dominant_height_c_largest """
+        return _dominant_height_c_largest(zip(self.diameters, self.stems), c)
+
+    @cached_property
+    def mean_age(self) -> float:
+        """ see mean_age_stand """
+        if self.stems_per_ha > 0:
+            return sum(f * rt.biological_age for f, rt in zip(self.stems, self.trees)) / self.stems_per_ha
+        return 0
+
+    @cached_property
+    def basal_area_weighted_diameter(self) -> float:
+        """ see calculate_basal_area_weighted_attribute_sum """
+        return sum(d * ba for d, ba in zip(self.diameters, self.basal_areas)) / sum(self.basal_areas)
+
+
 def find_matching_stratum_by_diameter(
         reference_tree: ReferenceTree,
         strata: list[TreeStratum]) -> Optional[TreeStratum]:
@@ -246,3 +306,91 @@ def find_matching_storey_stratum_for_tree(
         selected_stratum = None
 
     return selected_stratum
+
+
+class _DiameterIndex:
+    """ Strata with diameter sorted by mean diameter, for finding the stratum closest to a tree diameter by factor of
+    difference. Ties are resolved by the original order of the strata, as in find_matching_stratum_by_diameter_lm. """
+
+    def __init__(self, strata: list[tuple[int, TreeStratum]]):
+        ordered = sorted(((s.mean_diameter, i, s) for i, s in strata if s.has_diameter()), key=lambda e: e[:2])
+        self.diameters = [d for d, _, _ in ordered]
+        self.entries = ordered
+
+    def closest(self, diameter: float) -> Optional[TreeStratum]:
+        if not self.entries:
+            return None
+        if not diameter > 0:
+            # the factor of difference is constant for all strata, fall back to scanning in original order
+            return min(self.entries, key=lambda e: (abs(diameter / e[0] - 1), e[1]))[2]
+        # the factor of difference is monotonic on both sides of the diameter, so the closest stratum is next to it
+        pos = bisect_left(self.diameters, diameter)
+        candidates = []
+        for start, step in ((pos - 1, -1), (pos, 1)):
+            j = start
+            if not 0 <= j < len(self.entries):
+                continue
+            value = abs(diameter / self.entries[j][0] - 1)
+            # include strata whose factor of difference rounds to the same value
+            while 0 <= j < len(self.entries) and abs(diameter / self.entries[j][0] - 1) == value:
+                candidates.append((value, self.entries[j][1], self.entries[j][2]))
+                j += step
+        return min(candidates, key=lambda c: c[:2])[2]
+
+
+class StratumIndex:
+    """
+    Index of the strata of a stand for associating reference trees with strata as find_matching_storey_stratum_for_tree
+    does. Strata are grouped by storey and species, and the diameter match is binary searched within the candidate
+    group, making the association O(log strata) per tree. Groups are built lazily on first use.
+    """
+
+    def __init__(self, strata: list[TreeStratum], diameter_threshold: float = 2.5):
+        self.strata = strata
+        self.diameter_threshold = diameter_threshold
+        # the similar species groups require the species of all strata
+        self.indexable = all(stratum.species is not None for stratum in strata)
+        self._storeys: Optional[dict] = None
+        self._groups: dict[tuple, tuple[int, _DiameterIndex]] = {}
+
+    def _storey_strata(self) -> dict:
+        if self._storeys is None:
+            self._storeys = {}
+            for i, stratum in enumerate(self.strata):
+                self._storeys.setdefault(stratum.storey, []).append((i, stratum))
+        return self._storeys
+
+    def _group(self, storey, key, predicate: Callable[[TreeStratum], bool]) -> tuple[int, _DiameterIndex]:
+        if (storey, key) not in self._groups:
+            members = [(i, s) for i, s in self._storey_strata().get(storey, []) if predicate(s)]
+            self._groups[(storey, key)] = (len(members), _DiameterIndex(members))
+        return self._groups[(storey, key)]
+
+    def find(self, tree: ReferenceTree) -> Optional[TreeStratum]:
+        if not self.indexable:
+            return find_matching_storey_stratum_for_tree(tree, self.strata, self.diameter_threshold)
+        storey = tree.storey
+        if storey not in self._storey_strata():
+            return None
+        n_same, index = self._group(storey, ('species', tree.species), lambda s: s.species == tree.species)
+        if n_same == 0:
+            # no strata of the same species: use similar species, see find_strata_by_similar_species
+            if tree.species.is_deciduous():
+                if tree.species in (TreeSpecies.DOWNY_BIRCH, TreeSpecies.SILVER_BIRCH):
+                    other = TreeSpecies.SILVER_BIRCH if tree.species == TreeSpecies.DOWNY_BIRCH \
+                        else TreeSpecies.DOWNY_BIRCH
+                    _, index = self._group(storey, ('species', other), lambda s: s.species == other)
+                else:
+                    _, index = self._group(storey, 'deciduous', lambda s: s.species.is_deciduous())
+            elif tree.species.is_coniferous():
+                _, index = self._group(storey, 'coniferous', lambda s: s.species.is_coniferous())
+            else:
+                return None
+        candidate = index.closest(tree.breast_height_diameter)
+        if candidate is None:
+            return None
+        lower = candidate.mean_diameter / self.diameter_threshold
+        upper = candidate.mean_diameter * self.diameter_threshold
+        if lower < tree.breast_height_diameter < upper:
+            return candidate
+        return None
@@ -1,31 +1,85 @@
+import math
 from collections.abc import Callable
+from typing import Literal, Optional
+import numpy as np
 from lukefi.metsi.data.model import ForestStand
 
 
-def iterative_thinning(
+def _measure(stems: np.ndarray, weights: Optional[np.ndarray]) -> float:
+    # python sum over the list to match the summation of the tree by tree predicates exactly
+    return sum((stems if weights is None else weights * stems).tolist())
+
+
+def _estimate_iterations(stems: np.ndarray, factors: np.ndarray, weights: Optional[np.ndarray], bound: float) -> int:
+    """ Approximate number of thinning iterations, found by bisecting the measure of stems * factors ** k """
+    weighted = stems if weights is None else weights * stems
+
+    def measure(k: int) -> float:
+        return np.sum(weighted * np.power(factors, k))
+
+    lower, upper = 0, 1
+    while bound <= measure(upper):
+        lower, upper = upper, upper * 2
+    while upper - lower > 1:
+        middle = (lower + upper) // 2
+        if bound <= measure(middle):
+            lower = middle
+        else:
+            upper = middle
+    return upper
+
+
+def iterative_thinning_to_bound(
         stand: ForestStand,
         thinning_factor: float,
-        thin_predicate: Callable,
-        extra_factor_solver: Callable
+        bound: float,
+        extra_factor_solver: Callable,
+        measure: Literal['basal_area', 'stems_per_ha'] = 'basal_area'
 ) -> ForestStand:
-    """ Iteratively decreases the stem count of stand reference trees until stoppin condition is met.
+    """ Iteratively multiplies the stem count of each reference tree by its thinning factor while
+    bound <= overall_basal_area(stand.reference_trees) (or overall_stems_per_ha).
 
     The parameter :extra_factor_solver: may be used to customize the removal of stems.
     If given as (lambda i,n,c: 0) removes same amount of stems from each tree (a.k.a even thinning).
 
+    The number of iterations is bisected from the closed form stems * factor ** iterations, after which the stems are
+    thinned with repeated multiplication over arrays and the stopping condition is checked exactly around the
+    estimate. The thinned stems are written to the trees once.
+
     :param stand: Forest stand instance of forestdatamodel library
     :param thinning_factor: Intensity of the thinning on each iteration
-    :param thin_predicate: Condition to stop thinning
+    :param bound: Thinning continues while the measure of the stand is at least the bound
     :param extra_factor_solver: Gradually increasing proportion of removal
+    :param measure: 'basal_area' or 'stems_per_ha'
     """
-    n = len(stand.reference_trees)
+    trees = stand.reference_trees
+    n = len(trees)
     c = thinning_factor
+    factors = np.array([min(c + extra_factor_solver(i, n, c), 1.0) for i in range(n)], dtype=np.float64)
+    stems = np.array([rt.stems_per_ha for rt in trees], dtype=np.float64)
+    weights = None
+    if measure == 'basal_area':
+        weights = np.array([math.pi * math.pow(rt.breast_height_diameter * 0.5 * 0.01, 2) for rt in trees],
+                           dtype=np.float64)
+
+    if bound > _measure(stems, weights):
+        return stand
+    unthinned = factors >= 1.0
+    if bound <= _measure(stems[unthinned], None if weights is None else weights[unthinned]):
+        # the trees left untouched by the factors alone reach the bound, the thinning would never stop
+        raise UserWarning("Unable to thin the stand to the bound with the given thinning factors.")
 
-    while thin_predicate(stand):
-        # cut until lower bound reached
-        for i, rt in enumerate(stand.reference_trees):
-            thin_factor = c + extra_factor_solver(i, n, c)
-            thin_factor = 1.0 if thin_factor > 1.0 else thin_factor
-            rt.stems_per_ha *= thin_factor
+    initial = stems
+    start = max(_estimate_iterations(stems, factors, weights, bound) - 1, 0)
+    previous = stems
+    for _ in range(start):
+        previous, stems = stems, stems * factors
+    if start > 0 and bound > _measure(previous, weights):
+        # the estimate overshot, thin from the beginning
+        stems = initial
+    while bound <= _measure(stems, weights):
+        stems = stems * factors
 
+    for rt, f in zip(trees, stems.tolist()):
+        rt.stems_per_ha = f
     return stand
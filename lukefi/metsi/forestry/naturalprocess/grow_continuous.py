@@ -1,5 +1,8 @@
+import math
 from pathlib import Path
 
+import numpy as np
+
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.data.model import ForestStand, ReferenceTree
 from rpy2 import robjects as robjects
@@ -23,68 +26,105 @@ sitetype_map = {
 pukkala_loaded = False
 
 
-def continuous_growth_r(stand: ForestStand, step: int = 5) -> ForestStand:
-    """Pukkala growth models implemented by Lauri Mehtätalo"""
-    if len(stand.reference_trees) == 0:
-        return stand
+def load_pukkala_growth() -> Path:
+    """Sources the Pukkala growth R scripts once per process and returns their directory. The R session keeps
+    the sourced functions and the loaded model coefficients for the lifetime of the (worker) process."""
     global pukkala_loaded
     dir = Path(__file__).parent.parent.resolve() / "r" / "pukkala_growth"
-    growth_script_file = dir / "growthfuncs.R"
     if not pukkala_loaded:
-        robjects.r.source(str(growth_script_file))
+        robjects.r.source(str(dir / "growthfuncs.R"))
         pukkala_loaded = True
+    return dir
 
-    existing_count = len(stand.reference_trees)
-    last_tree_num = stand.reference_trees[-1].tree_number
+
+def continuous_growth_r(stand: ForestStand, step: int = 5) -> ForestStand:
+    """Pukkala growth models implemented by Lauri Mehtätalo"""
+    return continuous_growth_r_stands([stand], step)[0]
+
+
+def continuous_growth_r_stands(stands: list[ForestStand], step: int = 5) -> list[ForestStand]:
+    """Grow the given stands for step years with the Pukkala growth models.
+
+    The trees of all stands are sent to R in one data frame with a stand index column. R runs the yearly growth
+    loop for each stand and the grown trees are returned in one transfer. Ingrowth trees are appended to the stands
+    in the order they were born. As with growing year by year, ingrowth trees born on the last year are left as
+    saplings without height and breast height age."""
+    grown = [stand for stand in stands if len(stand.reference_trees) > 0]
+    if len(grown) == 0 or step <= 0:
+        return stands
+    dir = load_pukkala_growth()
+
+    trees = [(k, stand, tree) for k, stand in enumerate(grown, 1) for tree in stand.reference_trees]
     tree_data = {
-        'id': robjects.IntVector([i for i, _ in enumerate(stand.reference_trees)]),
-        'sp': robjects.IntVector([species_map.get(tree.species, 7) for tree in stand.reference_trees]),
-        'dbh': robjects.FloatVector([tree.breast_height_diameter for tree in stand.reference_trees]),
-        'Ntrees': robjects.FloatVector([tree.stems_per_ha for tree in stand.reference_trees]),
-        'sitetype': robjects.IntVector([stand.site_type_category for _ in range(len(stand.reference_trees))]),
-        'landclass': robjects.IntVector([stand.soil_peatland_category for _ in range(len(stand.reference_trees))]),
-        'TS': robjects.FloatVector([stand.degree_days for _ in range(len(stand.reference_trees))]),
-        'y': robjects.IntVector([stand.geo_location[0] for _ in range(len(stand.reference_trees))]),
-        'x': robjects.IntVector([stand.geo_location[1] for _ in range(len(stand.reference_trees))]),
-        'alt': robjects.FloatVector([stand.geo_location[2] for _ in range(len(stand.reference_trees))]),
+        'stand': robjects.IntVector([k for k, _, _ in trees]),
+        'id': robjects.IntVector([i for stand in grown for i, _ in enumerate(stand.reference_trees)]),
+        'sp': robjects.IntVector([species_map.get(tree.species, 7) for _, _, tree in trees]),
+        'dbh': robjects.FloatVector([tree.breast_height_diameter for _, _, tree in trees]),
+        'Ntrees': robjects.FloatVector([tree.stems_per_ha for _, _, tree in trees]),
+        'sitetype': robjects.IntVector([stand.site_type_category for _, stand, _ in trees]),
+        'landclass': robjects.IntVector([stand.soil_peatland_category for _, stand, _ in trees]),
+        'TS': robjects.FloatVector([stand.degree_days for _, stand, _ in trees]),
+        'y': robjects.IntVector([stand.geo_location[0] for _, stand, _ in trees]),
+        'x': robjects.IntVector([stand.geo_location[1] for _, stand, _ in trees]),
+        'alt': robjects.FloatVector([stand.geo_location[2] for _, stand, _ in trees]),
         # TODO: harv needs sourcing from cutting history; 0: no operations within last 5 a, 1: yes
-        'harv': robjects.IntVector([0 for _ in range(len(stand.reference_trees))]),
-        'yr': robjects.IntVector([tree.biological_age for tree in stand.reference_trees])
+        'harv': robjects.IntVector([0 for _ in trees]),
+        'yr': robjects.IntVector([tree.biological_age for _, _, tree in trees])
     }
-    df = robjects.DataFrame(tree_data)
-
-    for s in range(step):
-        df = robjects.r['grow'](df, path=str(dir) + '/', standArea=stand.area, perLength=1)
-        # TODO: R scripts need some refactoring; predheight is not quite usable
-        # robjects.r[f'source'](str(dir / "hdmod.R"))
-        # df = robjects.r['predheight'](df)
-        results = list(df)
-
-        for i in range(len(results[0])):
-            if i < existing_count:
-                tree = stand.reference_trees[i]
-                tree.breast_height_diameter = results[2][i]
-                tree.stems_per_ha = results[3][i]
-                tree.biological_age = results[11][i]
-                # defaulting to Näslund height while predheight is not useable
-                tree.height = naslund_height(tree.breast_height_diameter, tree.species)
-                tree.breast_height_age = results[11][i] if tree.sapling and tree.height is not None and tree.height >= 1.3 else tree.breast_height_age
-                tree.sapling = True if tree.height is None or tree.height < 1.3 else False
-            else:
-                new_number = last_tree_num + (i + 1 - existing_count)
-                stand.reference_trees.append(ReferenceTree(
-                    identifier=f"{stand.identifier}-{new_number}-tree",
-                    species={value: key for key, value in species_map.items()}[results[1][i]],
-                    breast_height_diameter=results[2][i],
-                    stems_per_ha=results[3][i],
-                    biological_age=results[11][i],
-                    tree_number=new_number,
-                    sapling=True
-                ))
-        existing_count = len(stand.reference_trees)
-        last_tree_num = stand.reference_trees[-1].tree_number
-
-    return stand
+    df = robjects.r['growStands'](
+        robjects.DataFrame(tree_data),
+        robjects.FloatVector([stand.area for stand in grown]),
+        step,
+        path=str(dir) + '/',
+        perLength=1)
+    # TODO: R scripts need some refactoring; predheight is not quite usable
+
+    stand_index = np.asarray(df.rx2('stand'))
+    columns = {name: np.asarray(df.rx2(name)) for name in ('sp', 'dbh', 'Ntrees', 'yr', 'yr13', 'v13', 'v0')}
+    bounds = np.searchsorted(stand_index, np.arange(1, len(grown) + 2))
+    for k, stand in enumerate(grown):
+        rows = slice(bounds[k], bounds[k + 1])
+        _update_grown_trees(stand, step, *(column[rows].tolist() for column in columns.values()))
+    return stands
+
+
+def _update_grown_trees(stand: ForestStand, step: int, sp: list[int], dbh: list[float], stems: list[float],
+                        yr: list[float], yr13: list[float], v13: list[int], v0: list[int]):
+    """Write the final state of the yearly grown trees of a stand back to its reference trees"""
+    species_by_code = {value: key for key, value in species_map.items()}
+    existing_count = len(stand.reference_trees)
+    last_tree_num = stand.reference_trees[-1].tree_number
+    for i in range(len(dbh)):
+        # breast height is reached in the first year with positive diameter, recorded in R as (yr13, v13)
+        reached_breast_height = not math.isnan(yr13[i])
+        if i < existing_count:
+            tree = stand.reference_trees[i]
+            # on the first year the breast height age is set only if the tree was a sapling to begin with
+            if reached_breast_height and (v13[i] > 1 or tree.sapling):
+                tree.breast_height_age = yr13[i]
+        else:
+            new_number = last_tree_num + (i + 1 - existing_count)
+            tree = ReferenceTree(
+                identifier=f"{stand.identifier}-{new_number}-tree",
+                species=species_by_code[sp[i]],
+                breast_height_diameter=dbh[i],
+                stems_per_ha=stems[i],
+                biological_age=yr[i],
+                tree_number=new_number,
+                sapling=True
+            )
+            stand.reference_trees.append(tree)
+            if v0[i] == step:
+                # trees born on the last year are updated only from the following year on
+                continue
+            tree.breast_height_age = yr13[i] if reached_breast_height else None
+        tree.breast_height_diameter = dbh[i]
+        tree.stems_per_ha = stems[i]
+        tree.biological_age = yr[i]
+        # defaulting to Näslund height while predheight is not useable
+        tree.height = naslund_height(tree.breast_height_diameter, tree.species)
+        tree.sapling = True if tree.height is None or tree.height < 1.3 else False
+
 
 # R script initialization, library deps
 # id missing -> str
@@ -1,3 +1,4 @@
+import numpy as np
 from lukefi.metsi.data.model import ReferenceTree, TreeStratum
 from lukefi.metsi.forestry.forestry_utils import find_matching_stratum_by_diameter
 
@@ -110,15 +111,125 @@ def solve_supplement_strategy(no_age_trees: list[ReferenceTree],
     return supplement_strategies
 
 
+def _float_column(objects: list, attr: str) -> np.ndarray:
+    values = (getattr(o, attr) for o in objects)
+    return np.fromiter((np.nan if v is None else v for v in values), dtype=np.float64, count=len(objects))
+
+
+def _species_column(objects: list) -> np.ndarray:
+    """ Species codes of the objects, -1 for missing species """
+    return np.fromiter((-1 if o.species is None else int(o.species) for o in objects), dtype=np.int64,
+                       count=len(objects))
+
+
+def _first_by_key(source_keys: np.ndarray, query_keys: np.ndarray) -> np.ndarray:
+    """ Index of the first source with the key of each query, or -1 if there is none """
+    if len(source_keys) == 0:
+        return np.full(len(query_keys), -1)
+    unique, first = np.unique(source_keys, return_index=True)
+    pos = np.minimum(np.searchsorted(unique, query_keys), len(unique) - 1)
+    return np.where(unique[pos] == query_keys, first[pos], -1)
+
+
+def _matching_strata_by_diameter(stratum_keys: np.ndarray,
+                                 stratum_diameters: np.ndarray,
+                                 tree_keys: np.ndarray,
+                                 tree_diameters: np.ndarray) -> np.ndarray:
+    """ find_matching_stratum_by_diameter for all trees at once. The strata of each key are folded in their original
+    order with override_from_diameter, one stratum position at a time for all trees. Each tree key must have strata.
+
+    :returns: index of the matching stratum of each tree
+    """
+    order = np.argsort(stratum_keys, kind='stable')
+    sorted_keys = stratum_keys[order]
+    diameters = stratum_diameters[order]
+    starts = np.searchsorted(sorted_keys, tree_keys, side='left')
+    ends = np.searchsorted(sorted_keys, tree_keys, side='right')
+    associated = starts.copy()
+    for k in range(1, int(np.max(ends - starts, initial=0))):
+        valid = starts + k < ends
+        candidate = np.where(valid, starts + k, starts)
+        greater = np.maximum(diameters[associated], diameters[candidate])
+        lesser = np.minimum(diameters[associated], diameters[candidate])
+        threshold = greater + (lesser - greater) * (greater / (lesser + greater))
+        associated = np.where(valid & (threshold > tree_diameters), candidate, associated)
+    return order[associated]
+
+
+def supplement_ages(reference_trees: list[list[ReferenceTree]],
+                    stratums: list[list[TreeStratum]]) -> list[list[ReferenceTree]]:
+    """ Supplementing of reference trees that have no d13 age for many stands in one pass.
+
+    The strategies are those of solve_supplement_strategy, solved over arrays of all trees and strata: trees are
+    grouped with the age strata and age trees of their stand and species, and the strategy of every tree is solved
+    before any tree is modified.
+
+    :param reference_trees: reference trees of each stand
+    :param stratums: strata of each stand
+    :returns: the supplemented trees of each stand
+    """
+    n_stands = len(reference_trees)
+    trees = [tree for stand_trees in reference_trees for tree in stand_trees]
+    strata = [stratum for stand_strata in stratums for stratum in stand_strata]
+    tree_stand = np.repeat(np.arange(n_stands), [len(stand_trees) for stand_trees in reference_trees])
+    stratum_stand = np.repeat(np.arange(n_stands), [len(stand_strata) for stand_strata in stratums])
+
+    tree_species = _species_column(trees)
+    stratum_species = _species_column(strata)
+    n_species = max(np.max(tree_species, initial=0), np.max(stratum_species, initial=0)) + 1
+    tree_keys = tree_stand * n_species + tree_species
+    stratum_keys = stratum_stand * n_species + stratum_species
+
+    tree_ages = _float_column(trees, 'breast_height_age')
+    tree_diameters = _float_column(trees, 'breast_height_diameter')
+    no_age = np.isnan(tree_ages) & (_float_column(trees, 'height') > 1.3)
+    age_tree = ~np.isnan(tree_ages) & (tree_ages != 0) & (tree_species >= 0)
+    age_stratum = (_float_column(strata, 'breast_height_age') > 0.0) & (_float_column(strata, 'mean_diameter') > 0.0) \
+        & (stratum_species >= 0)
+
+    supplemented = np.flatnonzero(no_age)
+    keys = tree_keys[supplemented]
+    source_strata = np.flatnonzero(age_stratum)
+    by_stratum = (_first_by_key(stratum_keys[source_strata], keys) >= 0) & (tree_species[supplemented] >= 0)
+    source_trees = np.flatnonzero(age_tree)
+    first_tree = _first_by_key(tree_keys[source_trees], keys)
+    by_tree = ~by_stratum & (first_tree >= 0) & (tree_species[supplemented] >= 0)
+    # trees to supplement are over 1.3 m, so only the diameter strategy of final_tree_strategy applies
+    by_diameter = ~by_stratum & ~by_tree & ~(_float_column(trees, 'biological_age')[supplemented] > 0.0)
+    unsolved = ~(by_stratum | by_tree | by_diameter)
+    if np.any(unsolved):
+        rt = trees[supplemented[np.argmax(unsolved)]]
+        raise UserWarning('error: supplement strategy for tree number' + str(rt.identifier) + ' can not be solved')
+
+    matching_strata = np.full(len(supplemented), -1)
+    matching_strata[by_stratum] = source_strata[_matching_strata_by_diameter(
+        stratum_keys[source_strata], _float_column(strata, 'mean_diameter')[source_strata],
+        keys[by_stratum], tree_diameters[supplemented][by_stratum])]
+
+    for i, tree_index in enumerate(supplemented):
+        rt = trees[tree_index]
+        if by_stratum[i]:
+            source = strata[matching_strata[i]]
+            rt.breast_height_age = source.breast_height_age
+            rt.biological_age = source.biological_age
+        elif by_tree[i]:
+            source = trees[source_trees[first_tree[i]]]
+            rt.breast_height_age = source.breast_height_age
+            rt.biological_age = source.biological_age
+        else:
+            rt.breast_height_age = 2 * rt.breast_height_diameter
+            rt.biological_age = 9 + 2 * rt.breast_height_diameter
+    result: list[list[ReferenceTree]] = [[] for _ in range(n_stands)]
+    for tree_index in supplemented:
+        result[tree_stand[tree_index]].append(trees[tree_index])
+    return result
+
+
 def supplement_age_for_reference_trees(reference_trees: list[ReferenceTree],
                                        stratums: list[TreeStratum]) -> list[ReferenceTree]:
     """ Supplementing of reference trees that have no d13 age.
     Supplementing happens from subsets of stratums and trees that have d13 age.
     Based on a priority a strategy to supplement is selected and supplementing is performed.
     """
-    no_age_trees = list(filter(lambda t: t.breast_height_age is None and t.has_height_over_130_cm(), reference_trees))
-    age_trees = list(filter(lambda t: t.breast_height_age or 0 > 0.0, reference_trees))
-    age_stratums = list(filter(lambda s: s.breast_height_age > 0.0, stratums))
-    trees_and_strategies = solve_supplement_strategy(no_age_trees, age_trees, age_stratums)
-    return perform_supplementing(trees_and_strategies, age_trees, age_stratums)
+    return supplement_ages([reference_trees], [stratums])[0]
     # TODO: Remove zero stem stratums. See vmi-data-converter issue #55.
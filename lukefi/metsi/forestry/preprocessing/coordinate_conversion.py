@@ -2,6 +2,10 @@ import ctypes as cts
 import sys
 from pathlib import Path
 from enum import Enum
+from typing import Optional
+import numpy as np
+import numpy.typing as npt
+from lukefi.metsi.app.utils import MetsiException
 from lukefi.metsi.data.model import ForestStand
 
 
@@ -17,10 +21,35 @@ def load_library(path):
 lib_name = 'ykjtm35.dll' if sys.platform == "win32" else 'ykjtm35.so'
 DLL_PATH = Path('lukefi', 'metsi', 'forestry', 'c', 'lib', lib_name)
 
+_double_array = np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags='C_CONTIGUOUS')
+# whether the loaded library has the array conversion, libraries built without it are converted point by point
+_ARRAY_CONVERSION = False
+
 try:
     DLL = load_library(DLL_PATH)
+    # function prototypes are declared once when the library is loaded
+    DLL.tm35fin_to_ykj.argtypes = [
+        cts.c_double,
+        cts.c_double,
+        cts.POINTER(cts.c_double),
+        cts.POINTER(cts.c_double)
+    ]
+    DLL.tm35fin_to_ykj.restype = cts.c_int
 except OSError as e:
     print(f"Failed to load {lib_name}: {e}")
+else:
+    try:
+        DLL.tm35fin_to_ykj_array.argtypes = [
+            _double_array,
+            _double_array,
+            _double_array,
+            _double_array,
+            cts.c_long
+        ]
+        DLL.tm35fin_to_ykj_array.restype = cts.c_long
+        _ARRAY_CONVERSION = True
+    except (AttributeError, OSError) as e:
+        print(f"Array conversion not available in {lib_name}, converting point by point: {e}")
 
 
 def _is_error(flag: int) -> bool:
@@ -34,16 +63,7 @@ def _erts_tm35_to_ykj(u: float, v: float) -> tuple[float, float]:
     :param v: longitude coordinate
     :return YKJ coordinates tuple
     """
-
-    # Type initialization for the input
     f = DLL.tm35fin_to_ykj
-    f.argtypes = [
-        cts.c_double,
-        cts.c_double,
-        cts.POINTER(cts.c_double),
-        cts.POINTER(cts.c_double)
-    ]
-    f.restype = cts.c_int
 
     # Pointer initialization (memory allocation)
     x_ptr = cts.c_double()
@@ -63,6 +83,32 @@ def _erts_tm35_to_ykj(u: float, v: float) -> tuple[float, float]:
     return (x_ptr.value, y_ptr.value)
 
 
+def _erts_tm35_to_ykj_array(u: npt.ArrayLike, v: npt.ArrayLike) -> tuple[npt.NDArray[np.float64],
+                                                                         npt.NDArray[np.float64]]:
+    """ Convert arrays of ETRS-TM35FIN (EPSG:3067) coordinates to YKJ with a single library call.
+
+    :param u: latitude coordinates
+    :param v: longitude coordinates
+    :return YKJ coordinate arrays. Points that can not be converted are 0.0.
+    """
+    u = np.ascontiguousarray(u, dtype=np.float64)
+    v = np.ascontiguousarray(v, dtype=np.float64)
+    if not _ARRAY_CONVERSION:
+        converted = [_erts_tm35_to_ykj(ui, vi) for ui, vi in zip(u.tolist(), v.tolist())]
+        return (np.array([xy[0] for xy in converted], dtype=np.float64),
+                np.array([xy[1] for xy in converted], dtype=np.float64))
+    x = np.zeros_like(u)
+    y = np.zeros_like(v)
+    failed = DLL.tm35fin_to_ykj_array(u, v, x, y, len(u))
+    if failed > 0:
+        print("Error in call function {f} located in {dll} for {n} points".format(
+            f=DLL.tm35fin_to_ykj_array.__name__,
+            dll=str(DLL_PATH),
+            n=failed)
+        )
+    return x, y
+
+
 class CRS(Enum):
     EPSG_3067 = ('EPSG:3067', 'ERTS-TM35', 'ETRS-TM35FIN')
     EPSG_2393 = ('EPSG:2393', 'YKJ')
@@ -72,11 +118,11 @@ class CRS(Enum):
         return ':'.join(self._name_.split('_'))
 
 
-def _is_ykj(crs: str) -> bool:
+def _is_ykj(crs: Optional[str]) -> bool:
     return True if crs in CRS.EPSG_2393.value else False
 
 
-def _is_erts(crs: str) -> bool:
+def _is_erts(crs: Optional[str]) -> bool:
     return True if crs in CRS.EPSG_3067.value else False
 
 
@@ -99,4 +145,31 @@ def convert_location_to_ykj(stand: ForestStand) -> tuple[float, float, float, st
                 target_crs=CRS.EPSG_2393.name))
 
 
-__all__ = ['convert_location_to_ykj', 'CRS']
+GeoLocation = tuple[Optional[float], Optional[float], Optional[float], Optional[str]]
+
+
+def convert_locations_to_ykj(stands: list[ForestStand]) -> list[GeoLocation]:
+    """ Batch variant of convert_location_to_ykj. All ETRS-TM35FIN locations are converted in a single call. """
+    result: list[GeoLocation] = []
+    erts: list[int] = []
+    latitudes: list[float] = []
+    longitudes: list[float] = []
+    for i, stand in enumerate(stands):
+        if stand.geo_location is None:
+            raise MetsiException(f"Stand {stand.identifier} has no geo location to convert")
+        (latitude, longitude, height_above_sea_level, crs) = stand.geo_location
+        if _is_erts(crs) and latitude is not None and longitude is not None:
+            erts.append(i)
+            latitudes.append(latitude)
+            longitudes.append(longitude)
+            result.append(stand.geo_location)
+        else:
+            result.append(convert_location_to_ykj(stand))
+    if erts:
+        x, y = _erts_tm35_to_ykj_array(latitudes, longitudes)
+        for i, xi, yi in zip(erts, x.tolist(), y.tolist()):
+            result[i] = (xi, yi, result[i][2], CRS.EPSG_2393.name)
+    return result
+
+
+__all__ = ['convert_location_to_ykj', 'convert_locations_to_ykj', 'CRS']
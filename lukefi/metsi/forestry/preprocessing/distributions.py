@@ -6,6 +6,8 @@
 """
 import math
 from typing import Optional
+import numpy as np
+import numpy.typing as npt
 from lukefi.metsi.data.model import ReferenceTree, TreeStratum
 from lukefi.metsi.forestry.preprocessing import pre_util
 
@@ -82,6 +84,56 @@ def weibull(n_samples: int, diameter: float, basal_area: float, height: float,
     return result
 
 
+def _weibull_classes(n_samples: int, diameter: float, basal_area: float,
+                     min_diameter: Optional[float]) -> tuple[float, float, float, float, float]:
+    """ Weight coefficients, x-axis upper limit and class interval of weibull, NaN if they can not be computed. """
+    try:
+        (a, b, c) = weibull_coeffs(diameter, basal_area, min_diameter)
+        ax = a + b * math.pow(4.60517, (1.0 / c))
+    except (ValueError, TypeError, ZeroDivisionError, OverflowError):
+        return math.nan, math.nan, math.nan, math.nan, math.nan
+    interval = (ax - a) / float(n_samples)
+    if interval < 0.0:
+        interval = 1.0
+    return a, b, c, ax, interval
+
+
+def weibull_arrays(n_samples: int, diameter: npt.ArrayLike, basal_area: npt.ArrayLike, height: npt.ArrayLike,
+                   min_diameter: Optional[float] = None) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """ Array variant of weibull. Computes the stems per hectare and diameters of n_samples reference trees for
+    all given strata at once.
+
+    The class borders are derived per stratum exactly as in weibull, as the truncation at the x-axis upper limit
+    is sensitive to rounding. Samples of strata whose distribution can not be computed (eg. zero diameters or
+    scale) are left non-finite.
+
+    :param n_samples: Number of trees to be created per stratum
+    :param diameter: Average diameters (cm) of the strata
+    :param basal_area: Basal areas of the strata
+    :param height: Average heights (m) of the strata
+    :param min_diameter: (optional) Minimum diameter used in weight calculation.
+    :return: Tuple of (stems per hectare, diameters (cm)) arrays of shape (number of strata, n_samples)
+    """
+    basal_area = np.asarray(basal_area, dtype=np.float64)
+    height = np.asarray(height, dtype=np.float64)
+    classes = [_weibull_classes(n_samples, d, ba, min_diameter)
+               for d, ba in zip(np.asarray(diameter).tolist(), basal_area.tolist())]
+    a, b, c, ax, interval = np.array(classes, dtype=np.float64).reshape(-1, 5).T[:, :, np.newaxis]
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # cumulative sum reproduces the stepwise accumulation of the class borders
+        xx = np.cumsum(np.concatenate((a, np.repeat(interval, n_samples, axis=1)), axis=1), axis=1)[:, 1:]
+        computed_diameter = xx - (interval / 2.0)
+        computed_diameter[height < 1.3] = 0.0
+
+        f = 1 - np.exp(-np.power(((xx - a) / b), c))
+        f[xx >= ax] = 1.0
+        p = np.diff(f, axis=1, prepend=0.0)  # precentual ratio of stems in each sample
+
+        stems = (12732.4 * basal_area[:, np.newaxis]) / np.power(computed_diameter, 2.0)
+        return p * stems, computed_diameter
+
+
 # ---- Simple height distribution model ----
 
 # NOTE: Debricated, only for test purposes
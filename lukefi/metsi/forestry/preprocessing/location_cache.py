@@ -0,0 +1,122 @@
+""" Module contains a spatial memoization layer for location based model lookups """
+import os
+import pickle
+import tempfile
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from contextlib import contextmanager
+from typing import Any, Optional
+
+
+class GridCache:
+    """
+    LRU cache for functions of a location. Locations are snapped to a grid of the given resolution and the function
+    is evaluated at the grid point, so that all locations within a grid cell share one result regardless of the order
+    of the lookups. With resolution 0 locations are used as is.
+
+    The cache can be persisted into a pickle file between runs. Saving merges the entries with the current content of
+    the file under an exclusive lock file, so that concurrent processes sharing a file do not lose each others entries.
+    A lock older than lock_timeout seconds is assumed to be left by a crashed process and is removed. The merged
+    entries are capped at maxsize, preferring the entries of the saving cache and the most recent ones of the file.
+    """
+
+    lock_timeout = 10.0
+
+    def __init__(self, resolution: float = 0.0, maxsize: int = 100000, path: Optional[str] = None):
+        self.resolution = resolution
+        self.maxsize = maxsize
+        self.path = path
+        self.entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.exists(path):
+            self.entries.update(self._read(path))
+            self._evict()
+
+    def snap(self, value: float) -> float:
+        if self.resolution <= 0:
+            return value
+        return round(value / self.resolution) * self.resolution
+
+    def lookup(self, name: str, fn: Callable[..., Any], x: float, y: float, *args: Hashable) -> Any:
+        """ Return the memoized result of fn(x, y, *args) for the grid point of (x, y). Other arguments are used as
+        is. The name separates the results of different functions sharing the cache. """
+        point = (self.snap(x), self.snap(y), *args)
+        key = (name, point)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        result = fn(*point)
+        self.entries[key] = result
+        self._evict()
+        return result
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock():
+            entries = OrderedDict(self._read(self.path) if os.path.exists(self.path) else {})
+            for key, value in self.entries.items():
+                entries.pop(key, None)
+                entries[key] = value
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as file:
+                pickle.dump(entries, file)
+            os.replace(file.name, self.path)
+
+    @contextmanager
+    def _lock(self):
+        lock = f"{self.path}.lock"
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                descriptor = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if time.monotonic() < deadline:
+                    time.sleep(0.01)
+                    continue
+                try:
+                    os.remove(lock)
+                except FileNotFoundError:
+                    pass
+                deadline = time.monotonic() + self.lock_timeout
+        try:
+            yield
+        finally:
+            os.close(descriptor)
+            os.remove(lock)
+
+    def _evict(self):
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    @staticmethod
+    def _read(path: str) -> dict[Hashable, Any]:
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+
+
+_caches: dict[tuple[float, int, Optional[str]], GridCache] = {}
+
+
+def get_grid_cache(resolution: float = 0.0, maxsize: int = 100000, path: Optional[str] = None) -> GridCache:
+    """ Return the process wide cache for the given configuration, so that the cache lives across operation calls
+    (and preprocessing chunks in worker processes). """
+    key = (resolution, maxsize, path)
+    if key not in _caches:
+        _caches[key] = GridCache(resolution, maxsize, path)
+    return _caches[key]
+
+
+__all__ = ['GridCache', 'get_grid_cache']
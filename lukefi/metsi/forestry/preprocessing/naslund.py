@@ -1,5 +1,7 @@
 """ Module contains forestry domain spesific model functions """
 from typing import Optional
+import numpy as np
+import numpy.typing as npt
 from lukefi.metsi.data.enums.internal import TreeSpecies
 
 
@@ -47,6 +49,39 @@ def naslund_height(diameter: float | None, species: TreeSpecies | None) -> Optio
         return None
 
 
+# (a, b, exponent) of the model for pine or other coniferous, norway spruce and other species
+_NASLUND_PARAMETERS = np.array([
+    (0.894, 0.185, 2.0),
+    (1.811, 0.308, 3.0),
+    (0.898, 0.242, 2.0),
+])
+
+
+def _naslund_group(species: TreeSpecies | None) -> int:
+    if species in NASLUND_PINE_OR_OTHER_CONIFEROUS:
+        return 0
+    if species == TreeSpecies.SPRUCE:
+        return 1
+    return 2
+
+
+def naslund_heights(diameters: npt.ArrayLike, species: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    """
+    Array variant of naslund_height.
+    :param diameters: diameters of the trees at 1.3m height
+    :param species: species codes of the trees, broadcastable against diameters
+    :return estimated heights of the trees in meters, NaN where diameter is missing or not positive
+    """
+    diameters = np.asarray(diameters, dtype=np.float64)
+    species_codes = np.asarray(species, dtype=object)
+    groups = np.fromiter(map(_naslund_group, species_codes.flat), dtype=np.int64, count=species_codes.size)
+    parameters = _NASLUND_PARAMETERS[groups.reshape(species_codes.shape)]
+    a, b, exponent = parameters[..., 0], parameters[..., 1], parameters[..., 2]
+    with np.errstate(invalid='ignore'):
+        heights = np.round((diameters ** exponent) / (a + b * diameters) ** exponent + 1.3, 2)
+    return np.where(diameters > 0, heights, np.nan)
+
+
 def naslund_correction(species: TreeSpecies, diameter: float, height: float) -> float:
     ''' Height correction coefficient by Naslund height model
 
@@ -1,10 +1,15 @@
 """ Module contains tree generation logic that uses distribution based tree generation models
 (see. distributions module) """
 from enum import Enum
+from typing import Optional
+import numpy as np
+import numpy.typing as npt
+from rpy2.rinterface_lib.embedded import RRuntimeError
+from lukefi.metsi.app.console_logging import print_logline
 from lukefi.metsi.data.model import ReferenceTree, TreeStratum
 from lukefi.metsi.forestry.preprocessing import distributions
-from lukefi.metsi.forestry.preprocessing.naslund import naslund_height, naslund_correction
-from lukefi.metsi.forestry.preprocessing.tree_generation_lm import tree_generation_lm
+from lukefi.metsi.forestry.preprocessing.naslund import naslund_height, naslund_correction, naslund_heights
+from lukefi.metsi.forestry.preprocessing.tree_generation_lm import tree_generation_lm, tree_generation_lm_strata
 
 
 class TreeStrategy(Enum):
@@ -64,6 +69,54 @@ def trees_from_weibull(stratum: TreeStratum, **params) -> list[ReferenceTree]:
     return result
 
 
+def weibull_tree_arrays(strata: list[TreeStratum], n_trees: int) -> tuple[npt.NDArray[np.float64], ...]:
+    """ Array variant of trees_from_weibull for a batch of strata.
+
+    Stem counts and diameters of all strata are drawn from the weibull distribution at once and the heights
+    derived and corrected with the Näslund height model.
+
+    :return: Tuple of (stems per hectare, diameters (cm), heights (m)) arrays of shape (len(strata), n_trees).
+        The heights are not rounded, as np.round does not round like round() of trees_from_weibull. Rows of strata
+        whose distribution can not be computed contain non-finite values.
+    """
+    diameter = np.array([s.mean_diameter for s in strata], dtype=np.float64)
+    height = np.array([s.mean_height for s in strata], dtype=np.float64)
+    basal_area = np.array([s.basal_area for s in strata], dtype=np.float64)
+    species = np.fromiter((s.species for s in strata), dtype=object, count=len(strata))
+    stems, diameters = distributions.weibull_arrays(n_trees, diameter, basal_area, height)
+    heights = np.nan_to_num(naslund_heights(diameters, species[:, np.newaxis]), nan=0.0)
+    h_scalar = height / naslund_heights(diameter, species)
+    heights = h_scalar[:, np.newaxis] * heights
+    return stems, diameters, heights
+
+
+def trees_from_weibull_strata(strata: list[TreeStratum], **params) -> list[Optional[list[ReferenceTree]]]:
+    """ Generate N trees from weibull distribution for each of the given strata with one array computation.
+
+    :return: Trees of each stratum in the order of the given strata. None for strata whose trees could not be
+        computed; trees_from_weibull reports the cause for those.
+    """
+    n_trees = params.get('n_trees')
+    if not strata or n_trees is None:
+        return [None] * len(strata)
+    stems, diameters, heights = weibull_tree_arrays(strata, n_trees)
+    valid = np.isfinite(stems).all(axis=1) & np.isfinite(diameters).all(axis=1) & np.isfinite(heights).all(axis=1)
+    result: list[Optional[list[ReferenceTree]]] = []
+    for ok, row in zip(valid.tolist(), zip(stems.tolist(), diameters.tolist(), heights.tolist())):
+        if not ok:
+            result.append(None)
+            continue
+        trees = []
+        for stems_per_ha, diameter, height in zip(*row):
+            reference_tree = ReferenceTree()
+            reference_tree.stems_per_ha = stems_per_ha
+            reference_tree.breast_height_diameter = diameter
+            reference_tree.height = round(height, 2)
+            trees.append(reference_tree)
+        result.append(trees)
+    return result
+
+
 def trees_from_sapling_height_distribution(stratum: TreeStratum, **params) -> list[ReferenceTree]:
     """  Generate N trees from height distribution """
     return distributions.sapling_height_distribution(
@@ -94,7 +147,44 @@ def solve_tree_generation_strategy(stratum: TreeStratum, method='weibull') -> st
             return TreeStrategy.SKIP
 
 
-def reference_trees_from_tree_stratum(stratum: TreeStratum, **params) -> list[ReferenceTree]:
+def generate_batched_trees(strata: list[TreeStratum],
+                           associated_trees: Optional[dict[int, list[ReferenceTree]]] = None,
+                           **params) -> dict[int, Optional[list[ReferenceTree]]]:
+    """ Generates the trees of the weibull and lm strategy strata with one batched computation per strategy.
+
+    Strata missing from the result are left to be generated one by one.
+
+    :param associated_trees: (optional) Source trees of the lm strata keyed by the id() of the stratum
+
+    :return: Generated trees keyed by the id() of the stratum, to be passed to reference_trees_from_tree_stratum
+    """
+    method = params.get('method', 'weibull')
+    batches: dict[TreeStrategy, list[TreeStratum]] = {
+        TreeStrategy.WEIBULL_DISTRIBUTION: [],
+        TreeStrategy.LM_TREES: []
+    }
+    for stratum in strata:
+        batch = batches.get(solve_tree_generation_strategy(stratum, method))
+        if batch is not None:
+            batch.append(stratum)
+    result = dict(zip(map(id, batches[TreeStrategy.WEIBULL_DISTRIBUTION]),
+                      trees_from_weibull_strata(batches[TreeStrategy.WEIBULL_DISTRIBUTION], **params)))
+    try:
+        result.update(zip(map(id, batches[TreeStrategy.LM_TREES]),
+                          tree_generation_lm_strata(
+                              batches[TreeStrategy.LM_TREES],
+                              [(associated_trees or {}).get(id(s), []) for s in batches[TreeStrategy.LM_TREES]],
+                              **params)))
+    except RRuntimeError as e:
+        # the strata are generated one by one, which reports the failing stratum
+        print_logline(f"Batched lm tree generation failed, generating the strata one by one: {e}")
+    return result
+
+
+def reference_trees_from_tree_stratum(stratum: TreeStratum,
+                                      generated_trees: Optional[list[ReferenceTree]] = None,
+                                      source_trees: Optional[list[ReferenceTree]] = None,
+                                      **params) -> list[ReferenceTree]:
     """ Composes N number of reference trees based on values of the stratum.
 
     The tree generation strategies: weibull distribution, lm_trees and height distribution.
@@ -106,6 +196,8 @@ def reference_trees_from_tree_stratum(stratum: TreeStratum, **params) -> list[Re
     All other cases are skipped.
 
     :param stratum: Single stratum instance.
+    :param generated_trees: (optional) Weibull or lm trees of the stratum precomputed with generate_batched_trees.
+    :param source_trees: (optional) Measured trees associated with the stratum, used by lm tree generation.
     :return: list of reference trees derived from given stratum.
     """
     strategy = solve_tree_generation_strategy(stratum, params.get('method', 'weibull'))
@@ -113,9 +205,10 @@ def reference_trees_from_tree_stratum(stratum: TreeStratum, **params) -> list[Re
     if strategy == TreeStrategy.HEIGHT_DISTRIBUTION:
         result = trees_from_sapling_height_distribution(stratum, **params)
     elif strategy == TreeStrategy.WEIBULL_DISTRIBUTION:
-        result = trees_from_weibull(stratum, **params)
+        result = trees_from_weibull(stratum, **params) if generated_trees is None else generated_trees
     elif strategy == TreeStrategy.LM_TREES:
-        result = tree_generation_lm(stratum, stratum.stand.degree_days, stratum.stand.basal_area, **params)
+        result = tree_generation_lm(stratum, stratum.stand.degree_days, stratum.stand.basal_area, source_trees,
+                                    **params) if generated_trees is None else generated_trees
     elif strategy == TreeStrategy.SKIP:
         print(f"\nStratum {stratum.identifier} has no height or diameter usable for generating trees")
         return []
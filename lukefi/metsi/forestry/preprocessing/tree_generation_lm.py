@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Optional
 
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.data.model import TreeStratum, ReferenceTree
@@ -6,6 +7,8 @@ from rpy2 import robjects as robjects
 
 lm_tree_generation_loaded = False
 
+NO_HEIGHT_DAMAGE_CODES = ('2', '61', '62', '71', '72')
+
 
 def determine_hmalli_value(species: TreeSpecies):
     if species in (TreeSpecies.PINE, TreeSpecies.OTHER_PINE, TreeSpecies.SHORE_PINE):
@@ -16,17 +19,43 @@ def determine_hmalli_value(species: TreeSpecies):
         return 3
 
 
+def load_lm_tree_generation() -> Path:
+    """ Sources the lm tree generation R script once per process and returns its directory. """
+    global lm_tree_generation_loaded
+    dir = Path(__file__).parent.parent.resolve() / "r"
+    if not lm_tree_generation_loaded:
+        robjects.r.source(str(dir / "lm_tree_generation.R"))
+        lm_tree_generation_loaded = True
+    return dir
+
+
+def _source_tree_data(source_trees: list[ReferenceTree]) -> dict[str, list]:
+    return {
+        'lpm': [tree.breast_height_diameter or robjects.NA_Real for tree in source_trees],
+        'height': [robjects.NA_Real if tree.tuhon_ilmiasu in NO_HEIGHT_DAMAGE_CODES
+                   else (tree.measured_height or robjects.NA_Real) for tree in source_trees],
+        'lkm': [tree.stems_per_ha or robjects.NA_Real for tree in source_trees]
+    }
+
+
+def _generated_tree(stratum: TreeStratum, diameter: float, stems: float, height: float) -> ReferenceTree:
+    return ReferenceTree(
+        breast_height_diameter=diameter,
+        stems_per_ha=stems,
+        height=height,
+        species=stratum.species,
+        biological_age=stratum.biological_age,
+        sapling=height < 1.3
+    )
+
+
 def tree_generation_lm(
         stratum: TreeStratum,
         degree_days: float,
         stand_basal_area: float,
+        source_trees: Optional[list[ReferenceTree]] = None,
         **params) -> list[ReferenceTree]:
-    global lm_tree_generation_loaded
-    dir = Path(__file__).parent.parent.resolve() / "r"
-    growth_script_file = dir / "lm_tree_generation.R"
-    if not lm_tree_generation_loaded:
-        robjects.r.source(str(growth_script_file))
-        lm_tree_generation_loaded = True
+    dir = load_lm_tree_generation()
 
     stratum_data = {
         'DGM': robjects.FloatVector([stratum.mean_diameter]),
@@ -38,14 +67,8 @@ def tree_generation_lm(
         'Nos': robjects.FloatVector([stratum.stems_per_ha])
     }
 
-    source_trees = stratum.__dict__.get('_trees', [])
+    tree_data = {key: robjects.FloatVector(values) for key, values in _source_tree_data(source_trees or []).items()}
 
-    tree_data = {
-        'lpm': robjects.FloatVector([tree.breast_height_diameter or robjects.NA_Real for tree in source_trees]),
-        'height': robjects.FloatVector([robjects.NA_Real if tree.tuhon_ilmiasu in ('2', '61', '62', '71', '72')
-                                        else (tree.measured_height or robjects.NA_Real) for tree in source_trees]),
-        'lkm': robjects.FloatVector([tree.stems_per_ha or robjects.NA_Real for tree in source_trees])
-    }
     df = robjects.DataFrame(stratum_data)
     df2 = robjects.DataFrame(tree_data)
     result_df = robjects.r['generoi.kuvauspuut'](
@@ -60,13 +83,64 @@ def tree_generation_lm(
 
     trees = []
     for i in range(result_df.nrow):
-        trees.append(ReferenceTree(
-            breast_height_diameter=result_df.rx2(9)[i],
-            stems_per_ha=result_df.rx2(10)[i],
-            height=result_df.rx2(11)[i],
-            species=stratum.species,
-            biological_age=stratum.biological_age,
-            sapling=result_df.rx2(11)[i] < 1.3
-        ))
+        trees.append(_generated_tree(stratum, result_df.rx2(9)[i], result_df.rx2(10)[i], result_df.rx2(11)[i]))
+
+    return trees
+
+
+def tree_generation_lm_strata(strata: list[TreeStratum],
+                              source_trees: Optional[list[list[ReferenceTree]]] = None,
+                              **params) -> list[Optional[list[ReferenceTree]]]:
+    """ Batched variant of tree_generation_lm.
+
+    The strata and their source trees are sent to R in one call, with a stratum id column identifying the rows of
+    each stratum, and the generated trees are split back per stratum. The degree days and basal area are taken from
+    the stand of each stratum, and source_trees holds the measured trees associated with each stratum.
+
+    :return: Trees of each stratum in the order of the given strata. None for strata whose generation failed in R;
+        tree_generation_lm reports the cause for those.
+    """
+    if not strata:
+        return []
+    dir = load_lm_tree_generation()
+
+    tree_ids: list[int] = []
+    tree_data: dict[str, list] = {'lpm': [], 'height': [], 'lkm': []}
+    for i, stratum_trees in enumerate(source_trees or [[] for _ in strata], 1):
+        tree_ids.extend([i] * len(stratum_trees))
+        for key, values in _source_tree_data(stratum_trees).items():
+            tree_data[key].extend(values)
+
+    strata_df = robjects.DataFrame({
+        'osite': robjects.IntVector(range(1, len(strata) + 1)),
+        'DGM': robjects.FloatVector([s.mean_diameter for s in strata]),
+        'HGM': robjects.FloatVector([s.mean_height for s in strata]),
+        'G': robjects.FloatVector([s.stand.basal_area for s in strata]),
+        'Gos': robjects.FloatVector([s.basal_area for s in strata]),
+        'spe': robjects.FloatVector([s.species.value for s in strata]),
+        'DDY': robjects.FloatVector([s.stand.degree_days for s in strata]),
+        'Nos': robjects.FloatVector([s.stems_per_ha for s in strata]),
+        'hmalli': robjects.IntVector([determine_hmalli_value(s.species) for s in strata])
+    })
+    trees_df = robjects.DataFrame({
+        'osite': robjects.IntVector(tree_ids),
+        **{key: robjects.FloatVector(values) for key, values in tree_data.items()}
+    })
+    result = robjects.r['generoi.kuvauspuut.erat'](
+        strata_df,
+        trees_df,
+        path=str(dir) + '/',
+        tapa=params.get('lm_mode', 'dcons'),
+        n=params.get('n_trees', 10),
+        shdef=params.get('lm_shdef', 5),
+        shinit=0.1)
 
+    errors = list(result.rx2('virheet'))
+    trees: list[Optional[list[ReferenceTree]]] = [None if error else [] for error in errors]
+    generated = result.rx2('puut')
+    for i, diameter, stems, height in zip(generated.rx2('osite'), generated.rx2('lpm'), generated.rx2('lkm'),
+                                          generated.rx2('h')):
+        stratum_trees = trees[i - 1]
+        if stratum_trees is not None:
+            stratum_trees.append(_generated_tree(strata[i - 1], diameter, stems, height))
     return trees
@@ -1,6 +1,9 @@
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+import numpy.typing as npt
+
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.data.model import ForestStand
 
@@ -39,21 +42,37 @@ lmfor_species_map = {
 
 
 def lmfor_volume(stand: ForestStand) -> float:
+    volumes, _ = lmfor_volumes([stand])
+    return float(volumes.sum())
+
+
+def lmfor_volumes(stands: list[ForestStand]) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+    """Computes the lmfor volumes of all trees of the given stands in a single R call.
+
+    The volume models are read once per R session.
+
+    :return: tree volumes of all stands concatenated, and stand offsets such that the volumes of stand i are
+        volumes[offsets[i]:offsets[i + 1]]
+    """
+    offsets = np.zeros(len(stands) + 1, dtype=np.int64)
+    np.cumsum([len(stand.reference_trees) for stand in stands], out=offsets[1:])
+    if offsets[-1] == 0:
+        return np.zeros(0, dtype=np.float64), offsets
 
     r = get_r_with_sourced_scripts()
     volmods_path = Path(__file__).parent.resolve() / "r" / "vol_mods_final_LM.rds"
 
+    trees = [(stand, tree) for stand in stands for tree in stand.reference_trees]
     source_data = {
-        'height': robjects.FloatVector([tree.height for tree in stand.reference_trees]),
-        'breast_height_diameter': robjects.FloatVector([tree.breast_height_diameter for tree in stand.reference_trees]),
-        'degree_days': robjects.FloatVector([stand.degree_days for _ in range(len(stand.reference_trees))]),
-        'species': robjects.StrVector([lmfor_species_map.get(tree.species, 'birch') for tree in stand.reference_trees]),
-        'model_type': robjects.StrVector(['scanned' for _ in range(len(stand.reference_trees))])
+        'height': robjects.FloatVector([tree.height for _, tree in trees]),
+        'breast_height_diameter': robjects.FloatVector([tree.breast_height_diameter for _, tree in trees]),
+        'degree_days': robjects.FloatVector([stand.degree_days for stand, _ in trees]),
+        'species': robjects.StrVector([lmfor_species_map.get(tree.species, 'birch') for _, tree in trees]),
+        'model_type': robjects.StrVector(['scanned'] * len(trees))
     }
     df = robjects.DataFrame(source_data)
-    volumes = list(r['compute_tree_volumes'](df, str(volmods_path)))
-    total_volume = sum(volumes)
-    return total_volume
+    volumes = np.asarray(r['compute_tree_volumes'](df, str(volmods_path)), dtype=np.float64)
+    return volumes, offsets
 
 
 def convert_r_named_list_to_py_dict(named_list) -> dict[Any, Any]:
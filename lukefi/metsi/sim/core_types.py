@@ -1,8 +1,9 @@
+from bisect import bisect_left, bisect_right
 from collections import OrderedDict
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from copy import deepcopy, copy
 from types import SimpleNamespace
-from typing import NamedTuple, Optional, Any, TypeVar, Generic
+from typing import NamedTuple, Optional, Any, SupportsIndex, TypeVar, Generic
 import weakref
 
 from lukefi.metsi.data.layered_model import LayeredObject
@@ -145,6 +146,101 @@ class EventTree:
         self.add_branch(EventTree(operation, self))
 
 
+class TimeIndexedResults(list):
+    """
+    A list of collected result objects kept in ascending order of their `time_point` attribute. A parallel list of
+    time points is maintained so that point and period queries are bisect slices instead of full scans.
+
+    Results are usually appended in simulation order, which makes insertion amortized O(1). Out of order results are
+    inserted after any existing results with the same time point. Positional mutation (item assignment and deletion,
+    insert, in-place repetition, sort and reverse) would break the ordering and raises TypeError; as with other operation results, stored
+    items are not expected to be modified afterwards.
+    """
+
+    __slots__ = ('_time_points',)
+    _time_points: list[int]
+
+    def __new__(cls, *_args, **_kwargs):
+        instance = super().__new__(cls)
+        instance._time_points = []
+        return instance
+
+    def __init__(self, iterable: Iterable[Any] = ()):
+        super().__init__()
+        self._time_points.clear()
+        self.extend(iterable)
+
+    def append(self, item: Any):
+        time_point = item.time_point
+        if not self._time_points or time_point >= self._time_points[-1]:
+            super().append(item)
+            self._time_points.append(time_point)
+        else:
+            idx = bisect_right(self._time_points, time_point)
+            super().insert(idx, item)
+            self._time_points.insert(idx, time_point)
+
+    def extend(self, iterable: Iterable[Any]):
+        for item in iterable:
+            self.append(item)
+
+    def insert(self, index: SupportsIndex, item: Any):
+        raise TypeError(f"{type(self).__name__} is ordered by time_point, use append instead of insert")
+
+    def __setitem__(self, index, value):
+        raise TypeError(f"{type(self).__name__} does not support item assignment")
+
+    def __delitem__(self, index):
+        raise TypeError(f"{type(self).__name__} does not support item deletion")
+
+    def __imul__(self, n: SupportsIndex) -> "TimeIndexedResults":  # type: ignore[override, misc]
+        raise TypeError(f"{type(self).__name__} does not support in-place repetition")
+
+    def sort(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is ordered by time_point and can not be sorted")
+
+    def reverse(self):
+        raise TypeError(f"{type(self).__name__} is ordered by time_point and can not be reversed")
+
+    def pop(self, index: SupportsIndex = -1) -> Any:
+        item = super().pop(index)
+        self._time_points.pop(index)
+        return item
+
+    def remove(self, value: Any):
+        self.pop(self.index(value))
+
+    def __iadd__(self, iterable: Iterable[Any]) -> "TimeIndexedResults":  # type: ignore[override, misc]
+        self.extend(iterable)
+        return self
+
+    def clear(self):
+        super().clear()
+        self._time_points.clear()
+
+    def copy(self) -> "TimeIndexedResults":
+        result = TimeIndexedResults.__new__(TimeIndexedResults)
+        list.extend(result, self)
+        result._time_points = list(self._time_points)
+        return result
+
+    def __getstate__(self):
+        # the index is rebuilt from the items on deserialization
+        return None
+
+    def between(self, start: int, stop: int) -> list[Any]:
+        """Results with start <= time_point < stop"""
+        return self[bisect_left(self._time_points, start):bisect_left(self._time_points, stop)]
+
+    def at(self, time_point: int) -> list[Any]:
+        """Results with the given time_point"""
+        return self[bisect_left(self._time_points, time_point):bisect_right(self._time_points, time_point)]
+
+    def after(self, time_point: int) -> list[Any]:
+        """Results with time_point > the given time_point"""
+        return self[bisect_right(self._time_points, time_point):]
+
+
 class CollectedData:
 
     def __init__(
@@ -164,6 +260,8 @@ class CollectedData:
         """
         if isinstance(value, dict):
             return OrderedDict(value.items())
+        if isinstance(value, TimeIndexedResults):
+            return value.copy()
         if isinstance(value, list):
             return list(value)
         return deepcopy(value)
@@ -191,12 +289,14 @@ class CollectedData:
     def store(self, tag: str, collected_data: Any):
         self.get(tag)[self.current_time_point] = collected_data
 
-    def get_list_result(self, tag: str) -> list[Any]:
+    def get_list_result(self, tag: str) -> TimeIndexedResults:
         try:
-            return self.operation_results[tag]
+            result = self.operation_results[tag]
         except KeyError:
-            self.operation_results[tag] = []
-            return self.operation_results[tag]
+            result = self.operation_results[tag] = TimeIndexedResults()
+        if isinstance(result, list) and not isinstance(result, TimeIndexedResults):
+            result = self.operation_results[tag] = TimeIndexedResults(result)
+        return result
 
     def extend_list_result(self, tag: str, collected_data: list[Any]):
         self.get_list_result(tag).extend(collected_data)
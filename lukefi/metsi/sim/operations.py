@@ -16,6 +16,25 @@ def do_nothing(data: T, **kwargs) -> T:
     return data
 
 
+def stand_local(*serial_params: str):
+    """
+    Decorator declaring a preprocessing operation stand-local: the operation processes each stand of its input list
+    independently of the others, so the list may be split and processed in parallel. Truthy values for any of the
+    given operation parameters force the operation to run serially, eg. when it writes debug output into a shared file.
+    """
+    def decorator[F: Callable](operation: F) -> F:
+        operation.stand_local_serial_params = serial_params  # type: ignore[attr-defined]
+        return operation
+    return decorator
+
+
+def is_stand_local(operation: Callable, operation_parameters: dict) -> bool:
+    serial_params: Optional[tuple[str, ...]] = getattr(operation, "stand_local_serial_params", None)
+    if serial_params is None:
+        return False
+    return not any(operation_parameters.get(p) for p in serial_params)
+
+
 def prepared_operation(operation_entrypoint: Callable, **operation_parameters):
     """prepares an opertion entrypoint function with configuration parameters"""
     return lambda state: operation_entrypoint(state, **operation_parameters)
@@ -4,12 +4,21 @@ import shutil
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 from dataclasses import dataclass
+import numpy as np
 from lukefi.metsi.app import file_io
+from lukefi.metsi.data.formats.forest_builder import VMI13Builder
+from lukefi.metsi.data.formats.io_utils import csv_content_to_stands
 from lukefi.metsi.data.enums.internal import (DrainageCategory, LandUseCategory, OwnerCategory, SiteType,
                                               SoilPeatlandCategory, Storey, TreeSpecies)
 from lukefi.metsi.data.model import ForestStand, ReferenceTree, TreeStratum
 from lukefi.metsi.app.app_types import ExportableContainer
 from lukefi.metsi.app.app_io import MetsiConfiguration
+from lukefi.metsi.app.preprocessor import stream_stands_by_size
+from lukefi.metsi.data.formats.declarative_conversion import Conversion
+
+
+def stand_number(stand: ForestStand) -> str:
+    return f"stand {stand.stand_id}"
 
 
 @dataclass
@@ -110,7 +119,7 @@ class TestFileReading(unittest.TestCase):
 
         file_io.prepare_target_directory("outdir")
         file_io.csv_writer(Path("outdir", "output.csv"), ec)
-        result = file_io.csv_content_to_stands(
+        result = csv_content_to_stands(
             file_io.csv_file_reader(Path("outdir/output.csv")))
         data[0].reference_trees[0].stand = None
         result[0].reference_trees[0].stand = None
@@ -124,6 +133,28 @@ class TestFileReading(unittest.TestCase):
         self.assertDictEqual(data[0].__dict__, result[0].__dict__)
         shutil.rmtree('outdir')
 
+    def test_soa(self):
+        data = file_io.pickle_reader("tests/resources/file_io_test/forest_centre.pickle")
+        data[0].monthly_temperatures = [-5.0, 15.5]
+        ec = ExportableContainer(export_objects=data, additional_vars=None)
+
+        file_io.prepare_target_directory("outdir")
+        file_io.soa_writer(Path("outdir", "output.soa"), ec)
+        result = file_io.fdm_reader("soa")(Path("outdir", "output.soa"))
+        self.assertEqual(len(data), len(result))
+        for stand, restored in zip(data, result):
+            for name in ("identifier", "stand_id", "year", "area", "geo_location", "owner_category",
+                         "site_type_category", "drainage_feasibility", "fra_category", "monthly_temperatures"):
+                self.assertEqual(getattr(stand, name), getattr(restored, name))
+            self.assertEqual([], restored.reference_trees)
+            trees = restored.reference_trees_soa
+            self.assertEqual([t.identifier for t in stand.reference_trees], trees.identifier.tolist())
+            self.assertEqual([t.breast_height_diameter for t in stand.reference_trees],
+                             trees.breast_height_diameter.tolist())
+            self.assertEqual([s.mean_height for s in stand.tree_strata], restored.tree_strata_soa.mean_height.tolist())
+        self.assertIsInstance(result[0].tree_strata_soa.mean_height.base.base, np.memmap)
+        shutil.rmtree('outdir')
+
     def test_rst(self):
         data = [
             ForestStand(
@@ -252,6 +283,87 @@ class TestFileReading(unittest.TestCase):
         stands = file_io.read_stands_from_file(config, {})
         self.assertEqual(len(stands), 4)
 
+    def test_vmi_file_ranges(self):
+        path = Path("tests", "data", "resources", "VMI13_source_mini.dat")
+        builder = VMI13Builder({'measured_trees': True, 'strata': True}, {})
+        ranges = file_io.vmi_file_ranges(path, builder, 4)
+        self.assertEqual(0, ranges[0][0])
+        self.assertEqual(os.path.getsize(path), ranges[-1][1])
+        self.assertTrue(all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:])))
+        self.assertGreater(len(ranges), 1)
+        first_rows = [next(file_io.vmi_range_stream(path, start, end)) for start, end in ranges]
+        self.assertTrue(all(row.startswith('1 ') for row in first_rows))
+
+    def test_read_stands_from_vmi_file_in_parallel(self):
+        config = MetsiConfiguration(
+            input_path=Path("tests", "data", "resources", "VMI13_source_mini.dat"),
+            state_format="vmi13",
+            state_input_container="",
+            measured_trees=True
+        )
+        stands = file_io.read_stands_from_file(config, {})
+        config.multiprocessing = True
+        config.workers = 2
+        parallel_stands = file_io.read_stands_from_file(config, {})
+        summary = lambda stands: [
+            (s.identifier, s.stand_id, s.area, [t.identifier for t in s.reference_trees],
+             [(x.identifier, x.stand is s) for x in s.tree_strata])
+            for s in stands
+        ]
+        self.assertEqual(summary(stands), summary(parallel_stands))
+
+    def test_read_stands_from_vmi_file_in_parallel_with_conversions(self):
+        config = MetsiConfiguration(
+            input_path=Path("tests", "data", "resources", "VMI13_source_mini.dat"),
+            state_format="vmi13",
+            state_input_container="",
+            measured_trees=True
+        )
+        conversions = {"vmi13": {"fra_category": Conversion(stand_number, (), ForestStand)}}
+        stands = file_io.read_stands_from_file(config, conversions)
+        config.multiprocessing = True
+        config.workers = 2
+        parallel_stands = file_io.read_stands_from_file(config, conversions)
+        self.assertEqual([f"stand {i}" for i in range(1, len(stands) + 1)], [s.fra_category for s in stands])
+        self.assertEqual([s.fra_category for s in stands], [s.fra_category for s in parallel_stands])
+
+    def test_read_vectorized_stands_from_vmi_file(self):
+        config = MetsiConfiguration(
+            input_path=Path("tests", "data", "resources", "VMI13_source_mini.dat"),
+            state_format="vmi13",
+            state_input_container="",
+            measured_trees=True,
+            vectorized_input=True
+        )
+        stands = file_io.read_stands_from_file(config, {})
+        config.multiprocessing = True
+        config.workers = 2
+        parallel_stands = file_io.read_stands_from_file(config, {})
+        summary = lambda stands: [
+            (s.identifier, s.stand_id, len(s.reference_trees), s.reference_trees_soa.identifier.tolist(),
+             s.tree_strata_soa.identifier.tolist())
+            for s in stands
+        ]
+        self.assertEqual(summary(stands), summary(parallel_stands))
+        self.assertEqual([0, 3, 0, 3], [s.reference_trees_soa.size for s in stands])
+
+    def test_open_streamed_stands(self):
+        config = MetsiConfiguration(
+            input_path=Path("tests", "data", "resources", "VMI13_source_mini.dat"),
+            state_format="vmi13",
+            state_input_container="",
+            measured_trees=True
+        )
+        stands = file_io.read_stands_from_file(config, {})
+        streamed = file_io.open_stands(config, {}, streamed=True)
+        self.assertNotIsInstance(streamed, list)
+        batches = list(stream_stands_by_size(streamed, 3))
+        self.assertEqual([3, 1], [len(batch) for batch in batches])
+        summary = lambda stands: [(s.identifier, s.stand_id, [t.identifier for t in s.reference_trees]) for s in stands]
+        self.assertEqual(summary(stands), summary(s for batch in batches for s in batch))
+        config.vectorized_input = True
+        self.assertIsInstance(file_io.open_stands(config, {}, streamed=True), list)
+
     def test_read_stands_from_xml_file(self):
         config = MetsiConfiguration(
             input_path="tests/resources/file_io_test/forest_centre.xml",
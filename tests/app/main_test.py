@@ -78,3 +78,19 @@ class RemoveExistingExportFilesTest(unittest.TestCase):
         self.assertNotIn("data.cda", remaining_files)
         self.assertNotIn("custom_export.txt", remaining_files)
         self.assertNotIn("preprocessing_result.csv", remaining_files)
+
+
+class MainInputErrorTest(unittest.TestCase):
+    def test_malformed_streamed_input(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory)
+            (path / "input.xml").write_text('<ForestPropertyData><Stands><Stand id="1">')
+            (path / "control.py").write_text(
+                'control_structure = {\n'
+                '    "app_configuration": {"state_format": "xml", "run_modes": ["preprocess"]},\n'
+                '    "slice_size": 1,\n'
+                '    "preprocessing_operations": [],\n'
+                '    "preprocessing_params": {}\n'
+                '}\n')
+            sys.argv = ['metsi', str(path / "input.xml"), str(path / "output"), str(path / "control.py")]
+            self.assertEqual(1, metsi.main())
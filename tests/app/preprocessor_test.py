@@ -0,0 +1,50 @@
+import unittest
+from lukefi.metsi.app.preprocessor import operation_segments, preprocess_stands
+from lukefi.metsi.data.model import ForestStand
+from lukefi.metsi.sim.operations import stand_local
+
+
+@stand_local()
+def double_area(stands, **operation_params):
+    factor = operation_params.get("factor", 2.0)
+    for stand in stands:
+        stand.area = stand.area * factor
+    return stands
+
+
+@stand_local()
+def drop_small(stands, **operation_params):
+    _ = operation_params
+    return [stand for stand in stands if stand.area > 2.0]
+
+
+def renumber(stands, **operation_params):
+    _ = operation_params
+    for i, stand in enumerate(stands):
+        stand.stand_id = i
+    return stands
+
+
+class PreprocessorTest(unittest.TestCase):
+
+    declaration = {
+        "preprocessing_operations": [double_area, drop_small, renumber, double_area],
+        "preprocessing_params": {
+            double_area: [{"factor": 3.0}]
+        }
+    }
+
+    def test_operation_segments(self):
+        segments = operation_segments(self.declaration["preprocessing_operations"],
+                                      self.declaration["preprocessing_params"])
+        self.assertEqual([True, False, True], [local for local, _ in segments])
+        self.assertEqual([(double_area, {"factor": 3.0}), (drop_small, {})], segments[0][1])
+
+    def test_parallel_preprocessing_equals_serial(self):
+        def stands():
+            return [ForestStand(identifier=str(i), area=float(i % 3)) for i in range(25)]
+        serial = preprocess_stands(stands(), self.declaration)
+        parallel = preprocess_stands(stands(), self.declaration, workers=2)
+        self.assertEqual(
+            [(s.identifier, s.area, s.stand_id) for s in serial],
+            [(s.identifier, s.area, s.stand_id) for s in parallel])
@@ -50,4 +50,27 @@ class TestDeclarativeConvertter(unittest.TestCase):
         self.assertEqual(getattr(result[0], 'VAR6_ONLY_A'), 10)
         self.assertEqual(hasattr(result[1], 'VAR6_ONLY_A'), False)
         self.assertEqual(hasattr(result[0], 'VAR7_ONLY_B'), False)
-        self.assertEqual(getattr(result[1], 'VAR7_ONLY_B'), '1')
\ No newline at end of file
+        self.assertEqual(getattr(result[1], 'VAR7_ONLY_B'), '1')
+
+    def test_compiled_conversions(self):
+        class SubA(A):
+            pass
+        data_source = ['1', '2', '3', '4', '5']
+        declaration_mapping = {
+            'VAR0': Conversion(lambda: 0),
+            'VAR1': Conversion(lambda x: int(x) * 2, indices=(0,)),
+            'VAR2': Conversion(custom_f, indices=(0, 3, 4)),
+            'VAR3_ONLY_A': Conversion(lambda obj: obj.VAR1 + obj.a, object_type=A),
+            'VAR4_ONLY_A': Conversion(lambda x, y, obj: int(x) + int(y) + obj.VAR3_ONLY_A,
+                                      indices=(0, 1), object_type=A),
+            'VAR5_ONLY_B': Conversion(lambda x, _: x, indices=(0,), object_type=B),
+        }
+        CM = ConversionMapper(declaration_mapping)
+        self.assertEqual(['VAR0', 'VAR1', 'VAR2', 'VAR3_ONLY_A', 'VAR4_ONLY_A'],
+                         [name for name, _ in CM.conversions_of(SubA)])
+        self.assertIs(CM.conversions_of(SubA), CM.conversions_of(SubA))
+        result = CM.apply_conversions(SubA(), data_source)
+        self.assertEqual((0, 2, 10, 12, 15),
+                         (result.VAR0, result.VAR1, result.VAR2, result.VAR3_ONLY_A, result.VAR4_ONLY_A))
+        self.assertFalse(hasattr(result, 'VAR5_ONLY_B'))
+        self.assertEqual(10, declaration_mapping['VAR2'](data_source, None))
@@ -1,8 +1,14 @@
+import math
+import os
+import shutil
 import sqlite3
+import struct
+import tempfile
 import pandas as pd
 import numpy as np
-from geopandas import GeoDataFrame
-from shapely import Polygon
+import shapely
+from shapely import MultiPolygon, Polygon
+from lukefi.metsi.app.utils import MetsiException
 from lukefi.metsi.data.formats import gpkg_util
 from tests.data import test_util
 
@@ -33,19 +39,74 @@ class TestGeoPackageConversion(test_util.ConverterTestSuite):
         self.assertEqual(int(strata.iloc[3].treespecies), 2)
         self.assertEqual(float(strata.iloc[3].basalarea), 19.59)
 
-    def test_attach_location(self):
-        gpkg_util._attach_location()
+    def test_stream_geopackage(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'source.gpkg')
+            shutil.copy(self.GPKG_DB_PATH, path)
+            conn = sqlite3.connect(path)
+            # a second cutting restriction yields two rows for the stand
+            conn.execute("UPDATE restriction SET restrictioncode = 7 WHERE id = 2")
+            conn.commit()
+            conn.close()
+            (stands, strata) = gpkg_util.read_geopackage(path)
+            stands = stands.sort_values(['standid', 'restrictioncode'], ignore_index=True)
+            strata = strata.sort_values('standid', kind='stable', ignore_index=True)
+            for chunksize in (1, 2, 3, 100):
+                chunks = list(gpkg_util.stream_geopackage(path, chunksize=chunksize))
+                streamed_stands = pd.concat([c[0] for c in chunks]).sort_values(
+                    ['standid', 'restrictioncode'], ignore_index=True)
+                streamed_strata = pd.concat([c[1] for c in chunks], ignore_index=True)
+                self.assertEqual(10, len(streamed_stands))
+                self.assertEqual(stands.to_dict('records'), streamed_stands.to_dict('records'))
+                self.assertEqual(strata.to_dict('records'), streamed_strata.to_dict('records'))
+                for chunk_stands, chunk_strata in chunks:
+                    self.assertTrue(set(chunk_strata['standid']) <= set(chunk_stands['standid']))
+
+    def test_read_stand_centroids(self):
+        conn = sqlite3.connect(self.GPKG_DB_PATH)
+        centroids = gpkg_util._read_stand_centroids(conn)
+        (blob,) = conn.execute("SELECT geometry FROM stand WHERE standid = 42205670").fetchone()
+        conn.close()
+        self.assertEqual(9, len(centroids))
+        self.assertEqual({'centroid': (324268.1, 7059047.57), 'crs': 'EPSG:3067'}, centroids[42205670])
+        srs_id, polygons = gpkg_util.decode_gpkg_geometry(blob)
+        self.assertEqual(3067, srs_id)
+        (x, y) = gpkg_util.polygon_centroid(polygons)
+        self.assertAlmostEqual(324268.10274978995, x, places=6)
+        self.assertAlmostEqual(7059047.568198285, y, places=6)
+
+    def test_decode_gpkg_geometry(self):
+        hole = [(2, 2), (2, 4), (4, 4), (4, 2)]
+        geometries = [
+            Polygon([(0, 0), (10, 0), (10, 10), (0, 10)], [hole]),
+            MultiPolygon([Polygon([(0, 0), (6, 0), (0, 6)]), Polygon([(10, 10), (12, 10), (12, 14), (10, 14)])]),
+            Polygon([(0, 0, 1), (3, 0, 1), (3, 3, 2), (0, 0, 1)]),
+        ]
+        for geometry in geometries:
+            for byte_order, envelope, flavor in ((0, 0, 'extended'), (1, 1, 'iso'), (1, 2, 'extended')):
+                header = b'GP\x00' + bytes([(envelope << 1) | byte_order]) + \
+                    struct.pack('<i' if byte_order else '>i', 3067) + bytes(8 * (0, 4, 6)[envelope])
+                blob = header + shapely.to_wkb(geometry, byte_order=byte_order, output_dimension=3, flavor=flavor)
+                srs_id, polygons = gpkg_util.decode_gpkg_geometry(blob)
+                self.assertEqual(3067, srs_id)
+                (x, y) = gpkg_util.polygon_centroid(polygons)
+                self.assertAlmostEqual(geometry.centroid.x, x)
+                self.assertAlmostEqual(geometry.centroid.y, y)
 
-    def test_read_stand_geometry(self):
-        gdf = gpkg_util._read_stand_geometry(self.GPKG_DB_PATH)
-        self.assertEqual(len(gdf), 9)
-        self.assertEqual(int(gdf.iloc[0].standid), 41652739)
-        self.assertEqual(int(gdf.iloc[1].standid), 41652748)
-        self.assertEqual(int(gdf.iloc[2].standid), 42205670)
-        self.assertEqual(type(gdf.iloc[2].geometry), Polygon)
-        self.assertEqual(gdf.iloc[2].geometry.centroid.x, 324268.10274978995)
-        self.assertEqual(gdf.iloc[2].geometry.centroid.y, 7059047.568198285)
-        self.assertEqual(gdf.iloc[2].geometry.area, 9606.429926999523)
+    def test_decode_empty_gpkg_geometry(self):
+        header = b'GP\x00\x01' + struct.pack('<i', 3067)
+        for flags, geometry in (
+                (0b10001, Polygon()),
+                (0b00001, Polygon()),
+                (0b00001, MultiPolygon())):
+            blob = header[:3] + bytes([flags]) + header[4:] + shapely.to_wkb(geometry, byte_order=1)
+            srs_id, polygons = gpkg_util.decode_gpkg_geometry(blob)
+            self.assertEqual(3067, srs_id)
+            (x, y) = gpkg_util.polygon_centroid(polygons)
+            self.assertTrue(math.isnan(x) and math.isnan(y))
+        for envelope in (5, 6, 7):
+            blob = b'GP\x00' + bytes([(envelope << 1) | 1]) + struct.pack('<i', 3067) + bytes(64)
+            self.assertRaises(MetsiException, gpkg_util.decode_gpkg_geometry, blob)
 
     def test_read_from_gpkg(self):
         query = """ SELECT * FROM stand WHERE id=685 """
@@ -61,24 +122,18 @@ class TestGeoPackageConversion(test_util.ConverterTestSuite):
         self.assertEqual(result.a[1], None)
 
     def test_extract_centroid(self):
-        p = Polygon([(1,10), (3, 30), (1, 20)])
-        gdf = GeoDataFrame(dict(geometry=[p])).set_crs('EPSG:3067')
-        result = gpkg_util._extract_centroid(gdf['geometry'])
+        polygons = [[np.array([(1, 10), (3, 30), (1, 20), (1, 10)], dtype=float)]]
+        result = gpkg_util._extract_centroid(polygons, 'EPSG:3067')
         self.assertEqual(result.get('centroid'), (1.67, 20.0))
         self.assertEqual(result.get('crs'), 'EPSG:3067')
 
     def test_attach_location(self):
-        p = Polygon([(1,10), (3, 30), (1, 20)])
-        gdf = GeoDataFrame(
-            dict(
-                geometry=[p],
-                standid=[123]
-            )
-        ).set_crs('EPSG:3067')
+        polygons = [[np.array([(1, 10), (3, 30), (1, 20), (1, 10)], dtype=float)]]
+        centroids = {123: gpkg_util._extract_centroid(polygons, 'EPSG:3067')}
         df = pd.DataFrame(
-            dict(standid=[123])
+            dict(standid=[456, 123])
         )
-        result = gpkg_util._attach_location(df, gdf)
+        result = gpkg_util._attach_location(df, centroids).iloc[1:]
         self.assertEqual(type(result), pd.DataFrame)
         self.assertEqual(result.iloc[0].centroid.get('centroid'), (1.67, 20.0))
         self.assertEqual(result.iloc[0].centroid.get('crs'), 'EPSG:3067')
\ No newline at end of file
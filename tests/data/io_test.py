@@ -1,10 +1,16 @@
 import csv
+import random
+import re
 import unittest
 from io import StringIO
 from lukefi.metsi.data.formats.io_utils import *
 from tests.data.test_util import ConverterTestSuite, ForestBuilderTestBench
 from lukefi.metsi.data.formats.io_utils import c_var_rst_row
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.formats.csv_columns import read_csv_stands
 from lukefi.metsi.data.model import ForestStand
+from lukefi.metsi.data.vector_model import ReferenceTrees, Strata
+from lukefi.metsi.data.vectorize import vectorize_objects
 
 vmi13_builder = ForestBuilderTestBench.vmi13_builder()
 
@@ -116,3 +122,76 @@ class IoUtilsTest(ConverterTestSuite):
             stands_actual['tree_strata_soa'] = None
             self.assertTrue(stands_expected == stands_actual)
 
+    def test_read_csv_stands(self):
+        vmi13_stands = vmi13_builder.build()
+        serialized = '\n'.join(stands_to_csv_content(ExportableContainer(vmi13_stands, None), ";"))
+        expected = csv_content_to_stands(list(csv.reader(StringIO(serialized), delimiter=";")))
+        # blocks of a few rows each
+        result = read_csv_stands(StringIO(serialized), blocksize=1000)
+        self.assertEqual(len(expected), len(result))
+        for stand_expected, stand_actual in zip(expected, result):
+            for attr in ("reference_trees", "tree_strata"):
+                objects_expected = getattr(stand_expected, attr)
+                objects_actual = getattr(stand_actual, attr)
+                self.assertEqual(len(objects_expected), len(objects_actual))
+                for object_expected, object_actual in zip(objects_expected, objects_actual):
+                    self.assertIs(stand_actual, object_actual.stand)
+                    self.assertEqual({**object_expected.__dict__, 'stand': None},
+                                     {**object_actual.__dict__, 'stand': None})
+                    self.assertEqual(list(object_expected.__dict__), list(object_actual.__dict__))
+
+    def test_read_csv_stands_vectorized(self):
+        vmi13_stands = vmi13_builder.build()
+        serialized = '\n'.join(stands_to_csv_content(ExportableContainer(vmi13_stands, None), ";"))
+        expected = csv_content_to_stands(list(csv.reader(StringIO(serialized), delimiter=";")))
+        result = read_csv_stands(StringIO(serialized), vectorized=True, blocksize=1000)
+        for stand_expected, stand_actual in zip(expected, result):
+            self.assertEqual([], stand_actual.reference_trees)
+            for attr, container in (("reference_trees", ReferenceTrees), ("tree_strata", Strata)):
+                vectors_expected = vectorize_objects(getattr(stand_expected, attr), container)
+                vectors_actual = getattr(stand_actual, f"{attr}_soa")
+                self.assertEqual(vectors_expected.size, vectors_actual.size)
+                for name in vectors_expected.dtypes:
+                    if hasattr(vectors_expected, name):
+                        self.assertEqual(str(getattr(vectors_expected, name).tolist()),
+                                         str(getattr(vectors_actual, name).tolist()))
+
+    def test_read_csv_stands_missing_mark_as_value(self):
+        vmi13_stands = vmi13_builder.build()
+        stand = next(stand for stand in vmi13_stands if stand.reference_trees)
+        stand.reference_trees[0].identifier = "-nan"
+        serialized = '\n'.join(stands_to_csv_content(ExportableContainer(vmi13_stands, None), ";"))
+        expected = csv_content_to_stands(list(csv.reader(StringIO(serialized), delimiter=";")))
+        result = read_csv_stands(StringIO(serialized), blocksize=1000)
+        self.assertEqual("-nan", result[vmi13_stands.index(stand)].reference_trees[0].identifier)
+        for stand_expected, stand_actual in zip(expected, result):
+            for attr in ("reference_trees", "tree_strata"):
+                self.assertEqual([{**o.__dict__, 'stand': None} for o in getattr(stand_expected, attr)],
+                                 [{**o.__dict__, 'stand': None} for o in getattr(stand_actual, attr)])
+
+    def test_read_csv_stands_invalid_species_vectorized(self):
+        vmi13_stands = vmi13_builder.build()
+        next(stand for stand in vmi13_stands if stand.reference_trees).reference_trees[0].identifier = "invalid"
+        serialized = '\n'.join(stands_to_csv_content(ExportableContainer(vmi13_stands, None), ";"))
+        serialized = re.sub(r"tree;invalid;\d+;", "tree;invalid;99;", serialized)
+        self.assertIn("tree;invalid;99;", serialized)
+        self.assertRaises(MetsiException, read_csv_stands, StringIO(serialized), vectorized=True)
+
+    def test_read_csv_stands_full_precision(self):
+        vmi13_stands = vmi13_builder.build()
+        rng = random.Random(1)
+        for stand in vmi13_stands:
+            for tree in stand.reference_trees:
+                tree.breast_height_diameter = rng.uniform(0.0, 60.0)
+                tree.height = rng.uniform(0.0, 35.0)
+                tree.stems_per_ha = rng.expovariate(0.01)
+            for stratum in stand.tree_strata:
+                stratum.mean_diameter = rng.uniform(0.0, 60.0)
+                stratum.basal_area = rng.expovariate(0.1)
+        serialized = '\n'.join(stands_to_csv_content(ExportableContainer(vmi13_stands, None), ";"))
+        expected = csv_content_to_stands(list(csv.reader(StringIO(serialized), delimiter=";")))
+        result = read_csv_stands(StringIO(serialized))
+        for stand_expected, stand_actual in zip(expected, result):
+            for attr in ("reference_trees", "tree_strata"):
+                self.assertEqual([{**o.__dict__, 'stand': None} for o in getattr(stand_expected, attr)],
+                                 [{**o.__dict__, 'stand': None} for o in getattr(stand_actual, attr)])
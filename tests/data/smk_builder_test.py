@@ -187,6 +187,16 @@ class TestXMLBuilder(unittest.TestCase):
         self.assertEqual(Storey.REMOTE, self.smk_stands[0].tree_strata[0].storey)
         self.assertEqual(Storey.REMOTE, self.smk_stands[0].tree_strata[1].storey)
 
+    def test_smk_stream(self):
+        summary = lambda stands: [
+            (s.identifier, s.year, s.area, s.geo_location, s.cutting_year, s.basal_area,
+             [(x.identifier, x.species, x.stems_per_ha, x.stand is s) for x in s.tree_strata])
+            for s in stands
+        ]
+        streamed = XMLBuilder(builder_flags, declared_conversions).stream(self.absolute_resource_path)
+        self.assertEqual(summary(self.smk_stands), summary(streamed))
+
+
 class TestGeoPackageBuilder(unittest.TestCase):
     
     gpkg_data = 'SMK_source.gpkg'
@@ -211,6 +221,17 @@ class TestGeoPackageBuilder(unittest.TestCase):
             number_of_stratums = reduce(lambda acc, s: acc + len(s.tree_strata), stands, 0)
             self.assertEqual(number_of_stratums, a[1])
 
+    def test_geopackage_stream(self):
+        summary = lambda stands: sorted(
+            (s.identifier, s.year, s.area, s.geo_location, s.forest_management_category, s.basal_area,
+             [(x.identifier, x.species, x.stems_per_ha, x.stand is s) for x in s.tree_strata])
+            for s in stands
+        )
+        for chunksize in (1, 2, 4, 1000):
+            stands = list(self.gpkg_builder.stream(chunksize))
+            self.assertEqual(summary(self.gpkg_stands), summary(stands))
+            self.assertEqual(sorted(s.identifier for s in stands), [s.identifier for s in stands])
+
     def test_geopackage_builder_stands(self):
         self.assertEqual(len(self.gpkg_stands), 9)
 
@@ -0,0 +1,55 @@
+import os
+import pickle
+import tempfile
+import unittest
+from lukefi.metsi.app import file_io
+from lukefi.metsi.app.app_types import ExportableContainer
+from lukefi.metsi.app.preprocessor import slice_stands_by_size
+from lukefi.metsi.app.utils import MetsiException
+from lukefi.metsi.data.formats.forest_builder import VMI13Builder
+from lukefi.metsi.data.formats.stand_store import StandStore
+
+
+class TestStandStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        builder = VMI13Builder({'measured_trees': True, 'strata': True}, {})
+        cls.stands = file_io.vmi_stands(builder, file_io.vmi_file_stream('tests/data/resources/VMI13_source_mini.dat'))
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, 'stands.soa')
+        file_io.soa_writer(cls.path, ExportableContainer(cls.stands, None))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def summary(self, stands):
+        return [(s.identifier, s.stand_id, s.reference_trees_soa.identifier.tolist()) for s in stands]
+
+    def expected(self, stands):
+        return [(s.identifier, s.stand_id, [t.identifier for t in s.reference_trees]) for s in stands]
+
+    def test_random_access(self):
+        store = StandStore(self.path)
+        self.assertEqual(len(self.stands), len(store))
+        self.assertEqual(self.expected(self.stands), self.summary(store))
+        self.assertEqual(self.expected(self.stands[-1:]), self.summary([store[-1]]))
+        identifier = self.stands[1].identifier
+        self.assertEqual(1, store.position(identifier))
+        self.assertEqual(self.expected(self.stands[1:2]), self.summary([store.stand(identifier)]))
+        self.assertRaises(MetsiException, store.position, 'missing')
+
+    def test_subsets(self):
+        store = StandStore(self.path)
+        chunks = slice_stands_by_size(store, 3)
+        self.assertTrue(all(isinstance(chunk, StandStore) for chunk in chunks))
+        self.assertEqual(self.expected(self.stands), [s for chunk in chunks for s in self.summary(chunk)])
+        identifiers = [self.stands[3].identifier, self.stands[0].identifier]
+        selected = store.select(identifiers)
+        self.assertEqual(identifiers, [s.identifier for s in selected])
+        self.assertEqual(identifiers[0], selected.stand(identifiers[0]).identifier)
+        self.assertRaises(MetsiException, selected.stand, self.stands[1].identifier)
+        self.assertRaises(MetsiException, chunks[-1].position, self.stands[0].identifier)
+        self.assertEqual(3, chunks[1].position(self.stands[3].identifier))
+        restored = pickle.loads(pickle.dumps(chunks[-1]))
+        self.assertEqual(self.summary(chunks[-1]), self.summary(restored))
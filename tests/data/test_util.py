@@ -19,20 +19,19 @@ class ConverterTestSuite(unittest.TestCase):
 class ForestBuilderTestBench(unittest.TestCase):
 
     default_builder_flags = {"measured_trees": True, "strata": True}
+    vmi12_rows = [
+        'K0999999 99 11    66521333246174    1010   0041721         000059500417      1   0         40020618 B0          0   0 0   0              0  0                   6652133.85 C 102600.11 66521333246174                                                                                          0      0',
+        'K0999999 98 11    66521333246174    1010   1141721         140259100417404   6  99  1241271S1280818 101 1 30    0   0 0   0   00  0 10   0  0   111 011004322   6652133.94 J 118950.77 66521333246174 S1 5 1         09K10E10L09M09M19           24189 04506      1298460   0 0   0 0   00 222 1      1',
+        'K0999999 98 12 01  1 11             24 190  04606N17 1  84A1 0',
+        'K0999999 98 13001 1207217 2  01 15521741  020081711 00                                                              7725 3999  342                                                                                                                                           259959  134571   11515 39185 101864  4303 11769  8489 24696 4196',
+        'K0999999 97 11    66521333246174    1010   1117021         060059100170409   2   3  1891251S7260918 101 1 20    0   0 0   0   00  0 00   0  0   0   011004323   6652133.28 T  97955.34 66521333246174 S1 3 3         00M00M00M      00      1800 04050 00705 1000012940A    0 0   0 12  00 222 1      3   9383',
+        'K0999999 97 12 01  1 31 1800 5000   04 050  00705F00 1 714B2 0',
+        'K0999999 96 21    66521333246174    0100   1041721         000059100417      4  55         S0280818 101 3 4     0   0 0   0    132       0  0        1          6652133.05 T 117155.45 66521333246174    5 1                                                          0A                              3  19 21'
+    ]
 
     @classmethod
     def vmi12_builder(cls, vmi_builder_flags: dict = default_builder_flags) -> VMI12Builder:
-        vmi12_data = [
-            'K0999999 99 11    66521333246174    1010   0041721         000059500417      1   0         40020618 B0          0   0 0   0              0  0                   6652133.85 C 102600.11 66521333246174                                                                                          0      0',
-            'K0999999 98 11    66521333246174    1010   1141721         140259100417404   6  99  1241271S1280818 101 1 30    0   0 0   0   00  0 10   0  0   111 011004322   6652133.94 J 118950.77 66521333246174 S1 5 1         09K10E10L09M09M19           24189 04506      1298460   0 0   0 0   00 222 1      1',
-            'K0999999 98 12 01  1 11             24 190  04606N17 1  84A1 0',
-            'K0999999 98 13001 1207217 2  01 15521741  020081711 00                                                              7725 3999  342                                                                                                                                           259959  134571   11515 39185 101864  4303 11769  8489 24696 4196',
-            'K0999999 97 11    66521333246174    1010   1117021         060059100170409   2   3  1891251S7260918 101 1 20    0   0 0   0   00  0 00   0  0   0   011004323   6652133.28 T  97955.34 66521333246174 S1 3 3         00M00M00M      00      1800 04050 00705 1000012940A    0 0   0 12  00 222 1      3   9383',
-            'K0999999 97 12 01  1 31 1800 5000   04 050  00705F00 1 714B2 0',
-            'K0999999 96 21    66521333246174    0100   1041721         000059100417      4  55         S0280818 101 3 4     0   0 0   0    132       0  0        1          6652133.05 T 117155.45 66521333246174    5 1                                                          0A                              3  19 21'
-        ]
-
-        vmi12_builder: VMIBuilder = VMI12Builder(vmi_builder_flags, {}, vmi12_data)
+        vmi12_builder: VMIBuilder = VMI12Builder(vmi_builder_flags, {}, cls.vmi12_rows)
         return vmi12_builder
 
     @classmethod
@@ -1,9 +1,10 @@
 import copy
+import pickle
 import unittest
 
 import numpy as np
 
-from lukefi.metsi.data.vectorize import ReferenceTrees, Strata, vectorize
+from lukefi.metsi.data.vectorize import ReferenceTrees, Strata, vectorize, vectorize_objects
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.data.model import ForestStand, ReferenceTree, TreeStratum
 
@@ -48,3 +49,31 @@ class TestVectorize(unittest.TestCase):
             for aso_stratum, soa_stratum_species in zip(before.tree_strata, after.tree_strata_soa.species if
                                                         after.tree_strata_soa.size > 0 else []):
                 self.assertEqual(aso_stratum.species, soa_stratum_species)
+
+    def test_vectorize_objects(self):
+        trees = TestVectorize.before[1].reference_trees
+        result = vectorize_objects(trees, ReferenceTrees)
+        self.assertIsInstance(result, ReferenceTrees)
+        self.assertEqual(2, result.size)
+        self.assertEqual([3, 4], list(result.species))
+        self.assertIsInstance(trees[0], ReferenceTree)
+
+    def test_select(self):
+        trees = self.after[1].reference_trees_soa
+        trees.select(np.array([False, True]))
+        self.assertEqual(1, trees.size)
+        self.assertEqual([4], list(trees.species))
+        self.assertEqual((1, 3), trees.stand_origin_relative_position.shape)
+
+    def test_take(self):
+        trees = vectorize_objects(TestVectorize.before[1].reference_trees, ReferenceTrees)
+        view = trees.take(slice(1, 2))
+        self.assertEqual(1, view.size)
+        self.assertNotIn('species', view.__dict__)
+        self.assertEqual([4], list(view.species))
+        self.assertTrue(np.shares_memory(trees.species, view.species))
+        self.assertFalse(hasattr(view, 'latvuskerros'))
+        restored = pickle.loads(pickle.dumps(trees.take(slice(0, 1))))
+        self.assertIsNone(restored._view_of)
+        self.assertEqual([3], list(restored.species))
+        self.assertEqual([3, 4], list(trees.take(np.array([0, 1])).species))
@@ -1,8 +1,15 @@
 import unittest
 from copy import deepcopy
+import numpy as np
 from lukefi.metsi.data.formats import vmi_const
 from lukefi.metsi.data.formats.forest_builder import *
 from lukefi.metsi.data.enums.internal import *
+from lukefi.metsi.data.formats.declarative_conversion import Conversion
+from lukefi.metsi.data.vector_model import ReferenceTrees, Strata
+from lukefi.metsi.data.vectorize import vectorize_objects
+from pathlib import Path
+from lukefi.metsi.app import file_io
+from lukefi.metsi.app.utils import MetsiException
 from tests.data.test_util import ForestBuilderTestBench
 
 class TestForestBuilder(unittest.TestCase):
@@ -424,3 +431,56 @@ class TestForestBuilder(unittest.TestCase):
         self.vmi13_builder().remove_strata(stands)
         self.assertEqual(0, len(stands[1].tree_strata))
 
+
+    @staticmethod
+    def _stand_summary(stand: ForestStand) -> tuple:
+        return (
+            stand.identifier, stand.stand_id, stand.year, stand.area, stand.geo_location, stand.degree_days,
+            [(t.identifier, t.species, t.breast_height_diameter, t.stems_per_ha, t.height, t.stand is stand)
+             for t in stand.reference_trees],
+            [(s.identifier, s.species, s.mean_diameter, s.mean_height, s.stand is stand) for s in stand.tree_strata]
+        )
+
+    def test_vmi_stream(self):
+        vmi13_rows = file_io.vmi_file_reader(Path('tests', 'data', 'resources', 'VMI13_source_mini.dat'))
+        for builder_type, rows, expected in (
+                (VMI13Builder, vmi13_rows, self.vmi13_stands),
+                (VMI12Builder, ForestBuilderTestBench.vmi12_rows, self.vmi12_stands)):
+            stream = builder_type(ForestBuilderTestBench.default_builder_flags, {}).stream(iter(rows))
+            self.assertEqual([self._stand_summary(s) for s in expected], [self._stand_summary(s) for s in stream])
+
+    def test_vmi_stream_rows_out_of_test_area(self):
+        rows = file_io.vmi_file_reader(Path('tests', 'data', 'resources', 'VMI13_source_mini.dat'))
+        stream = VMI13Builder(ForestBuilderTestBench.default_builder_flags, {}).stream(rows[:2] + rows[7:] + rows[2:7])
+        self.assertRaises(MetsiException, list, stream)
+
+    def test_vmi_build_vectorized(self):
+        vmi13_rows = file_io.vmi_file_reader(Path('tests', 'data', 'resources', 'VMI13_source_mini.dat'))
+        for builder_type, rows, expected in (
+                (VMI13Builder, vmi13_rows, self.vmi13_stands),
+                (VMI12Builder, ForestBuilderTestBench.vmi12_rows, self.vmi12_stands)):
+            stands = builder_type(ForestBuilderTestBench.default_builder_flags, {}).build_vectorized(iter(rows))
+            self.assertEqual([(s.identifier, s.stand_id, s.area) for s in expected],
+                             [(s.identifier, s.stand_id, s.area) for s in stands])
+            for expected_stand, stand in zip(expected, stands):
+                self.assertEqual([], stand.reference_trees)
+                for objects, soa, container in (
+                        (expected_stand.reference_trees, stand.reference_trees_soa, ReferenceTrees),
+                        (expected_stand.tree_strata, stand.tree_strata_soa, Strata)):
+                    vectorized = vectorize_objects(objects, container)
+                    self.assertEqual(vectorized.size, soa.size)
+                    if vectorized.size == 0:
+                        continue
+                    for name in filter(lambda name: hasattr(vectorized, name), vectorized.dtypes):
+                        expected_column, column = getattr(vectorized, name), getattr(soa, name)
+                        self.assertEqual(expected_column.dtype, column.dtype, name)
+                        np.testing.assert_array_equal(expected_column, column, name)
+
+    def test_vmi_build_vectorized_declared_conversions(self):
+        rows = file_io.vmi_file_reader(Path('tests', 'data', 'resources', 'VMI13_source_mini.dat'))
+        flags = ForestBuilderTestBench.default_builder_flags
+        stands = VMI13Builder(flags, {'origin': Conversion(lambda x: int(x) + 10, indices=(0,))}).build_vectorized(rows)
+        self.assertEqual([13, 13, 13], stands[1].reference_trees_soa.origin.tolist())
+        self.assertEqual([12, 12], stands[1].tree_strata_soa.origin.tolist())
+        builder = VMI13Builder(flags, {'origin': Conversion(lambda obj: 1, object_type=ReferenceTree)})
+        self.assertRaises(MetsiException, builder.build_vectorized, rows)
@@ -1,6 +1,8 @@
 import unittest
+from lukefi.metsi.app.utils import MetsiException
 from lukefi.metsi.domain.utils.filter import applyfilter
 from lukefi.metsi.data.model import ForestStand, ReferenceTree, TreeSpecies, TreeStratum
+from lukefi.metsi.data.vectorize import vectorize
 
 from lukefi.metsi.domain.pre_ops import preproc_filter
 
@@ -39,6 +41,79 @@ class FilterTest(unittest.TestCase):
         self.assertEqual(stand1.tree_strata, [s2])
         self.assertEqual(stand2.tree_strata, [])
 
+    def test_filter_lists_vectorized(self):
+        t1 = ReferenceTree(identifier="t-1", species=TreeSpecies.PINE, breast_height_diameter=0, height=0.7)
+        t2 = ReferenceTree(identifier="t-2", species=TreeSpecies.SPRUCE, breast_height_diameter=0, height=0.6)
+        t3 = ReferenceTree(identifier="t-3", species=TreeSpecies.SILVER_BIRCH, breast_height_diameter=20, height=25)
+        t4 = ReferenceTree(identifier="t-4", species=TreeSpecies.GREY_ALDER, breast_height_diameter=10, height=15)
+        s1 = TreeStratum(identifier="s-1", species=TreeSpecies.PINE)
+        s2 = TreeStratum(identifier="s-2", species=TreeSpecies.SPRUCE)
+        stand1 = ForestStand(identifier="S-1", reference_trees=[t1, t2, t3], tree_strata=[s1, s2], degree_days=900)
+        stand2 = ForestStand(identifier="S-2", reference_trees=[t4], tree_strata=[], degree_days=1100)
+        applyfilter([stand1, stand2], "remove trees", "height < 1.3 and species == 1", vectorized=True)
+        self.assertEqual(stand1.reference_trees, [t2, t3])
+        self.assertEqual(stand2.reference_trees, [t4])
+        applyfilter([stand1, stand2], "select trees", "height > 20 or stand.degree_days > 1000", vectorized=True)
+        self.assertEqual(stand1.reference_trees, [t3])
+        self.assertEqual(stand2.reference_trees, [t4])
+        applyfilter([stand1, stand2], "select strata", "species in (2, 3)", vectorized=True)
+        self.assertEqual(stand1.tree_strata, [s2])
+
+    def test_filter_vectorized_stands(self):
+        t1 = ReferenceTree(identifier="t-1", species=TreeSpecies.PINE, height=0.7, sapling=True)
+        t2 = ReferenceTree(identifier="t-2", species=TreeSpecies.SPRUCE, height=12.0, stems_per_ha=0.0)
+        t3 = ReferenceTree(identifier="t-3", species=TreeSpecies.SPRUCE, height=15.0, stems_per_ha=50.0)
+        stand = ForestStand(identifier="S-1", reference_trees=[t1, t2, t3])
+        vectorize([stand])
+        applyfilter([stand], "remove trees", "sapling or stems_per_ha == 0", vectorized=True)
+        self.assertEqual(stand.reference_trees, [t3])
+        self.assertEqual(1, stand.reference_trees_soa.size)
+        self.assertEqual(["t-3"], list(stand.reference_trees_soa.identifier))
+        self.assertEqual([15.0], list(stand.reference_trees_soa.height))
+
+    def test_filter_mixed_stands_vectorized(self):
+        t1 = ReferenceTree(identifier="t-1", species=TreeSpecies.PINE, height=0.7)
+        t2 = ReferenceTree(identifier="t-2", species=TreeSpecies.SPRUCE, height=12.0)
+        t3 = ReferenceTree(identifier="t-3", species=TreeSpecies.PINE, height=None)
+        t4 = ReferenceTree(identifier="t-4", species=TreeSpecies.SPRUCE, height=15.0)
+        vectorized = ForestStand(identifier="S-1", reference_trees=[t1, t2])
+        vectorize([vectorized])
+        rowwise = ForestStand(identifier="S-2", reference_trees=[t3, t4])
+        applyfilter([vectorized, rowwise], "select trees", "species == 2", vectorized=True)
+        self.assertEqual(vectorized.reference_trees, [t2])
+        self.assertEqual(["t-2"], list(vectorized.reference_trees_soa.identifier))
+        self.assertEqual(rowwise.reference_trees, [t4])
+        self.assertIsNone(rowwise.reference_trees_soa)
+
+    def test_filter_vectorized_out_of_sync(self):
+        t1 = ReferenceTree(identifier="t-1", species=TreeSpecies.PINE, height=0.7)
+        t2 = ReferenceTree(identifier="t-2", species=TreeSpecies.SPRUCE, height=12.0)
+        stand = ForestStand(identifier="S-1", reference_trees=[t1, t2])
+        vectorize([stand])
+        stand.reference_trees.append(ReferenceTree(identifier="t-3", species=TreeSpecies.PINE, height=5.0))
+        with self.assertRaisesRegex(MetsiException, "S-1 has 3 reference_trees objects but 2"):
+            applyfilter([stand], "select trees", "species == 2", vectorized=True)
+        self.assertEqual(2, stand.reference_trees_soa.size)
+
+    def test_filter_stands_vectorized(self):
+        s900 = ForestStand(identifier="1", degree_days=900)
+        s1000 = ForestStand(identifier="2", degree_days=1000)
+        s_none = ForestStand(identifier="3", degree_days=None)
+        self.assertEqual(
+            applyfilter([s900, s1000, s_none], "remove stands", "degree_days == None", vectorized=True),
+            [s900, s1000]
+        )
+        self.assertEqual(
+            applyfilter(
+                [s900, s1000],
+                "select",
+                "first or 950 < degree_days < 1050",
+                named={"first": "identifier == '1'"},
+                vectorized=True
+            ),
+            [s900, s1000]
+        )
+
     def test_filter_named(self):
         s1 = ForestStand(identifier="1")
         s2 = ForestStand(identifier="2")
@@ -83,3 +158,20 @@ class FilterTest(unittest.TestCase):
         self.assertEqual(stands, [s1])
         self.assertEqual(s1.reference_trees, [t1, t2])
         self.assertEqual(s2.reference_trees, [])
+
+    def test_preproc_filter_vectorized(self):
+        t1 = ReferenceTree(identifier="1")
+        t2 = ReferenceTree(identifier="2")
+        t3 = ReferenceTree(identifier="3")
+        s1 = ForestStand(identifier="1", reference_trees=[t1, t2])
+        s2 = ForestStand(identifier="2", reference_trees=[t3])
+        stands = preproc_filter([s1, s2], **{
+            "vectorized": True,
+            "named": {
+                "empty": "not reference_trees"
+            },
+            "remove trees": "identifier == '3'",
+            "select": "not empty"
+        })
+        self.assertEqual(stands, [s1])
+        self.assertEqual(s1.reference_trees, [t1, t2])
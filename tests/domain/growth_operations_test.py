@@ -5,7 +5,8 @@ from lukefi.metsi.domain.pre_ops import compute_location_metadata
 from tests.test_utils import prepare_growth_test_stand
 
 try:
-    from lukefi.metsi.domain.natural_processes.grow_motti import grow_motti
+    from lukefi.metsi.domain.natural_processes.grow_motti import grow_motti, species2motti, spe2motti
+    from lukefi.metsi.data.conversion.internal2mela import species_map
     pymotti = True
 except ImportError:
     pymotti = None
@@ -41,6 +42,12 @@ class GrowthOperationsTest(unittest.TestCase):
         self.assertEqual(stand.reference_trees[2].breast_height_age, 6)
         self.assertEqual(stand.year, 2030)
 
+    @unittest.skipIf(pymotti is None, "pymotti not installed")
+    def test_species2motti(self):
+        species = list(species_map.keys())
+        self.assertEqual([spe2motti(spe) for spe in species], species2motti(species))
+        self.assertRaises(ValueError, species2motti, [1, -1])
+
     def test_grow_acta(self):
         stand = prepare_growth_test_stand()
         grow_acta((stand, None))
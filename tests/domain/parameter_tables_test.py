@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from lukefi.metsi.app.utils import ConfigurationException
+from lukefi.metsi.domain.forestry_operations.clearcutting_limits import (
+    get_clearcutting_agelimits_from_parameter_file_contents)
+from lukefi.metsi.domain.forestry_operations.planting import get_planting_instructions_from_parameter_file_contents
+from lukefi.metsi.domain.forestry_operations.thinning_limits import SpeciesKey, create_thinning_limits_table
+from lukefi.metsi.domain.utils.enums import SiteTypeKey
+from lukefi.metsi.domain.utils.file_io import get_land_values_as_dict, get_timber_price_table
+from lukefi.metsi.domain.utils.parameter_tables import PARAMETER_TABLES, validate_parameter_files
+
+
+class ParameterTablesTest(unittest.TestCase):
+
+    def test_registered_tables(self):
+        self.assertEqual(
+            {'thinning_limits', 'clearcutting_limits_ages', 'clearcutting_limits_diameters', 'planting_instructions',
+             'renewal_costs', 'land_values', 'timber_price_table'},
+            set(PARAMETER_TABLES.keys()))
+
+    def test_tables_are_parsed_once(self):
+        path = 'data/parameter_files/renewal_ages_southernFI.txt'
+        ages = get_clearcutting_agelimits_from_parameter_file_contents(path)
+        self.assertIs(ages, get_clearcutting_agelimits_from_parameter_file_contents(path))
+        self.assertIs(ages, PARAMETER_TABLES['clearcutting_limits_ages'](path))
+
+    def test_tables_are_immutable(self):
+        ages = get_clearcutting_agelimits_from_parameter_file_contents('data/parameter_files/renewal_ages_southernFI.txt')
+        with self.assertRaises(TypeError):
+            ages[SiteTypeKey.OMT][SpeciesKey.PINE] = 1
+        self.assertIsInstance(create_thinning_limits_table('tests/resources/thinning_limits.txt'), tuple)
+        land_values = get_land_values_as_dict(
+            'tests/resources/net_present_value_test/land_values_per_site_type_and_interest_rate.json')
+        with self.assertRaises(TypeError):
+            land_values['key'] = {}
+        instructions = get_planting_instructions_from_parameter_file_contents(
+            'tests/resources/planting_test/planting_instructions.txt')
+        with self.assertRaises(TypeError):
+            instructions[SiteTypeKey.OMT]['species'] = 2
+        prices = get_timber_price_table('tests/resources/timber_price_table.csv')
+        self.assertRaises(ValueError, prices.fill, 0.0)
+
+    def test_validate_parameter_files(self):
+        validate_parameter_files({
+            'clearcutting': {
+                'clearcutting_limits_ages': 'data/parameter_files/renewal_ages_southernFI.txt',
+                'clearcutting_limits_diameters': 'data/parameter_files/renewal_diameters_southernFI.txt'
+            },
+            'other': {'unregistered_file': 'no/such/file.txt'}
+        })
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'Thin.txt')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('1 2 3\n4 5 6')
+            with self.assertRaises(ConfigurationException):
+                validate_parameter_files({'thinning_from_above': {'thinning_limits': path}})
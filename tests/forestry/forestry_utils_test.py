@@ -1,4 +1,5 @@
 import unittest
+import random
 from parameterized import parameterized
 from lukefi.metsi.forestry import forestry_utils as futil
 from lukefi.metsi.data.model import ReferenceTree, ForestStand, TreeStratum
@@ -238,3 +239,42 @@ class ForestryUtilsTest(unittest.TestCase):
             self.assertEqual(strata[expected_stratum_index], result)
         else:
             self.assertEqual(None, result)
+
+    def test_stratum_index_matches_linear_search(self):
+        rng = random.Random(1)
+        species = [TreeSpecies.PINE, TreeSpecies.SPRUCE, TreeSpecies.SILVER_BIRCH, TreeSpecies.DOWNY_BIRCH,
+                   TreeSpecies.ASPEN, TreeSpecies.GREY_ALDER]
+        storeys = [Storey.DOMINANT, Storey.UNDER]
+        for _ in range(50):
+            strata = strata_fixture() + [
+                TreeStratum(species=rng.choice(species), storey=rng.choice(storeys),
+                            mean_diameter=rng.choice([None, 0.0, round(rng.uniform(1, 40), 1)]))
+                for _ in range(rng.randint(0, 10))
+            ]
+            index = futil.StratumIndex(strata)
+            for _ in range(50):
+                tree = ReferenceTree(species=rng.choice(species), storey=rng.choice(storeys + [Storey.OVER]),
+                                     breast_height_diameter=round(rng.uniform(0, 60), 1))
+                self.assertIs(futil.find_matching_storey_stratum_for_tree(tree, strata), index.find(tree))
+
+    def test_stand_aggregates(self):
+        rng = random.Random(2)
+        trees = [
+            ReferenceTree(species=rng.choice([TreeSpecies.PINE, TreeSpecies.SPRUCE, TreeSpecies.DOWNY_BIRCH]),
+                          breast_height_diameter=round(rng.uniform(1, 40), 1), stems_per_ha=rng.uniform(1, 60),
+                          biological_age=rng.randint(10, 120))
+            for _ in range(40)
+        ]
+        stand = ForestStand(reference_trees=trees)
+        aggregates = futil.StandAggregates(trees)
+        self.assertEqual(futil.overall_basal_area(trees), aggregates.basal_area)
+        self.assertEqual(futil.overall_stems_per_ha(trees), aggregates.stems_per_ha)
+        self.assertEqual(futil.solve_dominant_species(trees), aggregates.dominant_species)
+        self.assertEqual(futil.solve_dominant_height_c_largest(stand), aggregates.dominant_height_c_largest())
+        self.assertEqual(futil.solve_dominant_height_c_largest(stand, 5000), aggregates.dominant_height_c_largest(5000))
+        self.assertEqual(futil.mean_age_stand(stand), aggregates.mean_age)
+        self.assertEqual(
+            futil.calculate_basal_area_weighted_attribute_sum(
+                trees, lambda x: x.breast_height_diameter * futil.calculate_basal_area(x)),
+            aggregates.basal_area_weighted_diameter)
+        self.assertIsNone(futil.StandAggregates([]).dominant_species)
@@ -2,7 +2,70 @@ import unittest
 
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.data.model import ForestStand, ReferenceTree
-from lukefi.metsi.forestry.naturalprocess.grow_continuous import continuous_growth_r
+from lukefi.metsi.forestry.preprocessing.naslund import naslund_height
+try:
+    unrunnable = False
+    from rpy2 import robjects
+    from lukefi.metsi.forestry.naturalprocess.grow_continuous import (
+        continuous_growth_r, continuous_growth_r_stands, load_pukkala_growth, species_map)
+except ImportError:
+    unrunnable = True
+
+
+def continuous_growth_r_yearly(stand: ForestStand, step: int = 5) -> ForestStand:
+    """ Pukkala growth with one R call per year, as grown before the yearly loop was moved into R """
+    if len(stand.reference_trees) == 0:
+        return stand
+    dir = load_pukkala_growth()
+
+    existing_count = len(stand.reference_trees)
+    last_tree_num = stand.reference_trees[-1].tree_number
+    tree_data = {
+        'id': robjects.IntVector([i for i, _ in enumerate(stand.reference_trees)]),
+        'sp': robjects.IntVector([species_map.get(tree.species, 7) for tree in stand.reference_trees]),
+        'dbh': robjects.FloatVector([tree.breast_height_diameter for tree in stand.reference_trees]),
+        'Ntrees': robjects.FloatVector([tree.stems_per_ha for tree in stand.reference_trees]),
+        'sitetype': robjects.IntVector([stand.site_type_category for _ in range(len(stand.reference_trees))]),
+        'landclass': robjects.IntVector([stand.soil_peatland_category for _ in range(len(stand.reference_trees))]),
+        'TS': robjects.FloatVector([stand.degree_days for _ in range(len(stand.reference_trees))]),
+        'y': robjects.IntVector([stand.geo_location[0] for _ in range(len(stand.reference_trees))]),
+        'x': robjects.IntVector([stand.geo_location[1] for _ in range(len(stand.reference_trees))]),
+        'alt': robjects.FloatVector([stand.geo_location[2] for _ in range(len(stand.reference_trees))]),
+        'harv': robjects.IntVector([0 for _ in range(len(stand.reference_trees))]),
+        'yr': robjects.IntVector([tree.biological_age for tree in stand.reference_trees])
+    }
+    df = robjects.DataFrame(tree_data)
+
+    for _ in range(step):
+        df = robjects.r['grow'](df, path=str(dir) + '/', standArea=stand.area, perLength=1)
+        results = list(df)
+
+        for i in range(len(results[0])):
+            if i < existing_count:
+                tree = stand.reference_trees[i]
+                tree.breast_height_diameter = results[2][i]
+                tree.stems_per_ha = results[3][i]
+                tree.biological_age = results[11][i]
+                tree.height = naslund_height(tree.breast_height_diameter, tree.species)
+                if tree.sapling and tree.height is not None and tree.height >= 1.3:
+                    tree.breast_height_age = results[11][i]
+                tree.sapling = True if tree.height is None or tree.height < 1.3 else False
+            else:
+                new_number = last_tree_num + (i + 1 - existing_count)
+                stand.reference_trees.append(ReferenceTree(
+                    identifier=f"{stand.identifier}-{new_number}-tree",
+                    species={value: key for key, value in species_map.items()}[results[1][i]],
+                    breast_height_diameter=results[2][i],
+                    stems_per_ha=results[3][i],
+                    biological_age=results[11][i],
+                    tree_number=new_number,
+                    sapling=True
+                ))
+        existing_count = len(stand.reference_trees)
+        last_tree_num = stand.reference_trees[-1].tree_number
+
+    return stand
+
 
 @unittest.skip("Not working")
 class ContinuousGrowthTest(unittest.TestCase):
@@ -39,3 +102,72 @@ class ContinuousGrowthTest(unittest.TestCase):
         self.assertEqual(6, len(result.reference_trees))
         result2 = continuous_growth_r(result)
         ...
+
+
+@unittest.skipIf(unrunnable, "rpy2 not installed")
+class ContinuousGrowthStandsTest(unittest.TestCase):
+    @staticmethod
+    def stands() -> list[ForestStand]:
+        stands = [
+            ForestStand(
+                identifier=str(i),
+                degree_days=1234.0,
+                geo_location=(6555234.0, 3290233, 79.0, "EPSG:3067"),
+                site_type_category=1,
+                soil_peatland_category=1,
+                area=1.0
+            ) for i in range(3)
+        ]
+        stands[0].reference_trees = [
+            ReferenceTree(identifier='0-1-tree', breast_height_diameter=20.3, species=TreeSpecies.PINE,
+                          biological_age=23.0, stems_per_ha=52.3, tree_number=1),
+            ReferenceTree(identifier='0-2-tree', breast_height_diameter=0.0, species=TreeSpecies.SPRUCE,
+                          biological_age=4.0, stems_per_ha=800.0, tree_number=2, sapling=True)
+        ]
+        stands[2].reference_trees = [
+            ReferenceTree(identifier='2-1-tree', breast_height_diameter=14.3, species=TreeSpecies.SILVER_BIRCH,
+                          biological_age=27.0, stems_per_ha=120.0, tree_number=1, breast_height_age=7.0)
+        ]
+        return stands
+
+    def test_equivalence_to_yearly_growth(self):
+        attributes = ('identifier', 'species', 'tree_number', 'breast_height_diameter', 'stems_per_ha',
+                      'biological_age', 'height', 'breast_height_age', 'sapling')
+        for step in (1, 2, 5):
+            robjects.r['set.seed'](step)
+            expected = [continuous_growth_r_yearly(stand, step) for stand in self.stands()]
+            robjects.r['set.seed'](step)
+            result = continuous_growth_r_stands(self.stands(), step)
+            for e, r in zip(expected, result):
+                self.assertEqual([[getattr(t, a) for a in attributes] for t in e.reference_trees],
+                                 [[getattr(t, a) for a in attributes] for t in r.reference_trees])
+
+    def test_pukkala_grow_stands(self):
+        stands = [
+            ForestStand(
+                identifier=str(i),
+                degree_days=1234.0,
+                geo_location=(6555234.0, 3290233, 79.0, "EPSG:3067"),
+                site_type_category=1,
+                soil_peatland_category=1,
+                area=1.0
+            ) for i in range(3)
+        ]
+        for stand in stands[:2]:
+            stand.reference_trees = [
+                ReferenceTree(
+                    identifier=f'{stand.identifier}-1-tree',
+                    breast_height_diameter=20.3,
+                    species=TreeSpecies.PINE,
+                    biological_age=23.0,
+                    stems_per_ha=52.3,
+                    tree_number=1)
+            ]
+        result = continuous_growth_r_stands(stands, 5)
+        self.assertEqual(3, len(result))
+        self.assertEqual(0, len(result[2].reference_trees))
+        for stand in result[:2]:
+            tree = stand.reference_trees[0]
+            self.assertEqual(28.0, tree.biological_age)
+            self.assertTrue(tree.breast_height_diameter > 20.3)
+            self.assertTrue(all(t.identifier.startswith(f"{stand.identifier}-") for t in stand.reference_trees))
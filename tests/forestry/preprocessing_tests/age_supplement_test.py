@@ -1,4 +1,5 @@
 import unittest
+import random
 from lukefi.metsi.forestry.preprocessing import age_supplementing as age_sup
 from lukefi.metsi.data.model import TreeStratum, ReferenceTree
 from collections import namedtuple
@@ -170,3 +171,38 @@ class TestAgeSupplementing(unittest.TestCase):
         # test that the sapling 002-002-02-1-01-tree is not included in results
         result = [tree for tree in result if tree.identifier == input_trees[0].identifier]
         self.assertEqual(0, len(result))
+
+    def test_supplement_ages_matches_strategies(self):
+        rng = random.Random(3)
+        tree_lists, strata_lists, expected = [], [], []
+        for _ in range(100):
+            tree_inputs = [
+                Input(str(i), rng.choice([1, 2, 3]), round(rng.uniform(1, 30), 1),
+                      rng.choice([None, None, 0, rng.randint(5, 50)]), None, rng.choice([1.0, 2.0, 15.0]))
+                for i in range(rng.randint(0, 12))
+            ]
+            stratum_inputs = [
+                Input(str(i), rng.choice([1, 2, 4]), rng.choice([0.0, round(rng.uniform(1, 30), 1)]),
+                      rng.choice([0, rng.randint(5, 50)]), rng.randint(10, 60), None)
+                for i in range(rng.randint(0, 5))
+            ]
+            # the row wise strategies on copies of the stand
+            trees = create_test_trees(tree_inputs)
+            no_age_trees = [t for t in trees if t.breast_height_age is None and t.has_height_over_130_cm()]
+            age_trees = [t for t in trees if t.breast_height_age]
+            stratums = create_test_stratums(stratum_inputs)
+            age_stratums = [s for s in stratums if s.breast_height_age > 0.0]
+            strategies = age_sup.solve_supplement_strategy(no_age_trees, age_trees, age_stratums)
+            age_sup.perform_supplementing(strategies, age_trees, age_stratums)
+            expected.append([(t.identifier, t.breast_height_age, t.biological_age) for t in no_age_trees])
+            tree_lists.append(create_test_trees(tree_inputs))
+            strata_lists.append(create_test_stratums(stratum_inputs))
+        result = age_sup.supplement_ages(tree_lists, strata_lists)
+        self.assertEqual(expected,
+                         [[(t.identifier, t.breast_height_age, t.biological_age) for t in ts] for ts in result])
+
+    def test_supplement_ages_unsolved(self):
+        trees = create_test_trees([Input('1', 3, 10.0, None, 5, 8.0)])
+        with self.assertRaises(UserWarning):
+            age_sup.supplement_ages([trees], [[]])
+        self.assertIsNone(trees[0].breast_height_age)
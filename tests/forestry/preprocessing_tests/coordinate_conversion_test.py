@@ -1,6 +1,8 @@
 import unittest
+from unittest.mock import patch
+from lukefi.metsi.forestry.preprocessing import coordinate_conversion
 from lukefi.metsi.forestry.preprocessing.coordinate_conversion import \
-    CRS, convert_location_to_ykj, _erts_tm35_to_ykj
+    CRS, convert_location_to_ykj, convert_locations_to_ykj, _erts_tm35_to_ykj, _erts_tm35_to_ykj_array
 from lukefi.metsi.data.model import ForestStand
 
 class TestCoordinateConversion(unittest.TestCase):
@@ -11,6 +13,27 @@ class TestCoordinateConversion(unittest.TestCase):
         self.assertEqual(x, 6643400.000631507)
         self.assertEqual(y, 3268000.003019635)
 
+    def test_coordinate_conversion_array(self):
+        u = [6640610.26, 6900000.0, 7200000.0]
+        v = [267924.92, 400000.0, 500000.0]
+        (x, y) = _erts_tm35_to_ykj_array(u, v)
+        self.assertEqual([_erts_tm35_to_ykj(*uv) for uv in zip(u, v)], list(zip(x.tolist(), y.tolist())))
+
+    def test_coordinate_conversion_array_point_by_point(self):
+        u = [6640610.26, 6900000.0]
+        v = [267924.92, 400000.0]
+        with patch.object(coordinate_conversion, '_ARRAY_CONVERSION', False):
+            (x, y) = _erts_tm35_to_ykj_array(u, v)
+        self.assertEqual([_erts_tm35_to_ykj(*uv) for uv in zip(u, v)], list(zip(x.tolist(), y.tolist())))
+
+    def test_convert_locations_to_ykj(self):
+        stands = [
+            ForestStand(geo_location=(6640610.26, 267924.92, 10.0, 'EPSG:3067')),
+            ForestStand(geo_location=(6643400.0, 3268000.0, 20.0, 'EPSG:2393')),
+        ]
+        result = convert_locations_to_ykj(stands)
+        self.assertEqual([convert_location_to_ykj(s) for s in stands], result)
+
     def test_convert_location_to_ykj(self):
         dummy_float = 0.0
         target_crs = 'EPSG:2393'
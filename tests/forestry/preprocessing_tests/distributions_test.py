@@ -1,3 +1,4 @@
+import numpy as np
 from lukefi.metsi.data.model import TreeStratum, ReferenceTree
 from lukefi.metsi.forestry.preprocessing import distributions
 from tests.forestry import test_util
@@ -54,6 +55,17 @@ class TestDistributions(test_util.ConverterTestSuite):
                 result = (tree.stems_per_ha, tree.breast_height_diameter)
                 self.assertEqual(next(asse), result)
 
+    def test_weibull_arrays(self):
+        inputs = [(28.0, 27.0, 1.3), (9.0, 11.0, 7.0), (28.0, 27.0, 22.0), (0.0, 27.0, 22.0)]
+        stems, diameters = distributions.weibull_arrays(10, *zip(*inputs))
+        self.assertEqual((4, 10), stems.shape)
+        for i, (diameter, basal_area, height) in enumerate(inputs[:3]):
+            for j, tree in enumerate(distributions.weibull(10, diameter, basal_area, height)):
+                self.assertAlmostEqual(tree.stems_per_ha, stems[i, j], places=9)
+                self.assertAlmostEqual(tree.breast_height_diameter, diameters[i, j], places=9)
+        # distribution of a stratum without diameter can not be computed
+        self.assertFalse(np.isfinite(stems[3]).any())
+
     def test_trees_from_simple_height_distribution(self):
         fixture = TreeStratum()
         fixture.mean_diameter = 28.0
@@ -2,8 +2,8 @@ import unittest
 from statistics import mean
 
 from lukefi.metsi.data.enums.internal import TreeSpecies
-from lukefi.metsi.data.model import TreeStratum, ReferenceTree
-from lukefi.metsi.forestry.preprocessing.tree_generation_lm import tree_generation_lm
+from lukefi.metsi.data.model import ForestStand, TreeStratum, ReferenceTree
+from lukefi.metsi.forestry.preprocessing.tree_generation_lm import tree_generation_lm, tree_generation_lm_strata
 
 
 class TestLmTreeGeneration(unittest.TestCase):
@@ -96,8 +96,32 @@ class TestLmTreeGeneration(unittest.TestCase):
                 tuhon_ilmiasu = '0'
             ),
         ]
-        stratum._trees = trees
-        result = tree_generation_lm(stratum, DDY, G)
+        result = tree_generation_lm(stratum, DDY, G, trees)
         self.assertEqual(7, len(result))
         self.assertAlmostEqual(stratum.mean_height, mean([t.height for t in result]), delta=4)
         self.assertAlmostEqual(stratum.mean_diameter, mean([t.breast_height_diameter for t in result]), delta=4)
+
+    def test_lm_tree_generation_strata(self):
+        stand = ForestStand(basal_area=17.0, degree_days=1271.0)
+        strata = [
+            TreeStratum(stand=stand, mean_diameter=17.0, basal_area=12.0, mean_height=14.5,
+                        species=TreeSpecies.PINE, stems_per_ha=0.0),
+            TreeStratum(stand=stand, mean_diameter=12.0, basal_area=5.0, mean_height=11.0,
+                        species=TreeSpecies.SPRUCE, stems_per_ha=0.0),
+        ]
+        source_trees = [
+            [
+                ReferenceTree(species=TreeSpecies.PINE, breast_height_diameter=d, measured_height=h,
+                              tuhon_ilmiasu='0')
+                for d, h in ((15.4, None), (17.1, None), (20.1, 10.0), (24.4, 13.4))
+            ],
+            []
+        ]
+        result = tree_generation_lm_strata(strata, source_trees, n_trees=10)
+        self.assertEqual(2, len(result))
+        for stratum, stratum_source_trees, trees in zip(strata, source_trees, result):
+            expected = tree_generation_lm(stratum, stand.degree_days, stand.basal_area, stratum_source_trees,
+                                          n_trees=10)
+            self.assertEqual([(t.breast_height_diameter, t.stems_per_ha, t.height) for t in expected],
+                             [(t.breast_height_diameter, t.stems_per_ha, t.height) for t in trees])
+            self.assertTrue(all(t.species == stratum.species for t in trees))
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from lukefi.metsi.forestry.preprocessing.location_cache import GridCache
+
+
+class TestGridCache(unittest.TestCase):
+    def test_exact_lookup(self):
+        calls = []
+        fn = lambda x, y: calls.append((x, y)) or x + y
+        cache = GridCache()
+        self.assertEqual(3.5, cache.lookup('f', fn, 1.25, 2.25))
+        self.assertEqual(3.5, cache.lookup('f', fn, 1.25, 2.25))
+        self.assertEqual(3.75, cache.lookup('f', fn, 1.5, 2.25))
+        self.assertEqual([(1.25, 2.25), (1.5, 2.25)], calls)
+        self.assertEqual((1, 2), (cache.hits, cache.misses))
+
+    def test_grid_lookup(self):
+        calls = []
+        fn = lambda x, y, z: calls.append((x, y, z)) or z
+        cache = GridCache(resolution=0.5)
+        self.assertEqual(10, cache.lookup('f', fn, 6640.61, 3267.92, 10))
+        self.assertEqual(10, cache.lookup('f', fn, 6640.49, 3268.1, 10))
+        self.assertEqual(11, cache.lookup('f', fn, 6640.49, 3268.1, 11))
+        self.assertEqual([(6640.5, 3268.0, 10), (6640.5, 3268.0, 11)], calls)
+        self.assertAlmostEqual(1 / 3, cache.hit_rate)
+
+    def test_lru_eviction(self):
+        cache = GridCache(maxsize=2)
+        fn = lambda x, y: x
+        cache.lookup('f', fn, 1.0, 0.0)
+        cache.lookup('f', fn, 2.0, 0.0)
+        cache.lookup('f', fn, 1.0, 0.0)
+        cache.lookup('f', fn, 3.0, 0.0)
+        self.assertEqual([('f', (1.0, 0.0)), ('f', (3.0, 0.0))], list(cache.entries))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.pickle')
+            cache = GridCache(path=path)
+            cache.lookup('f', lambda x, y: x * y, 2.0, 3.0)
+            cache.save()
+            restored = GridCache(path=path)
+            self.assertEqual(6.0, restored.lookup('f', lambda x, y: None, 2.0, 3.0))
+            self.assertEqual(1, restored.hits)
+
+    def test_save_merges_within_maxsize(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.pickle')
+            first, second = GridCache(maxsize=3, path=path), GridCache(maxsize=3, path=path)
+            for x in (1.0, 2.0, 3.0):
+                first.lookup('f', lambda x, y: x, x, 0.0)
+            first.save()
+            for x in (4.0, 5.0):
+                second.lookup('f', lambda x, y: x, x, 0.0)
+            second.save()
+            restored = GridCache(maxsize=3, path=path)
+            self.assertEqual([('f', (3.0, 0.0)), ('f', (4.0, 0.0)), ('f', (5.0, 0.0))], list(restored.entries))
+            self.assertFalse(os.path.exists(f"{path}.lock"))
+
+    def test_save_removes_stale_lock(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.pickle')
+            with open(f"{path}.lock", 'w', encoding='utf-8'):
+                pass
+            cache = GridCache(path=path)
+            cache.lock_timeout = 0.05
+            cache.lookup('f', lambda x, y: x * y, 2.0, 3.0)
+            cache.save()
+            self.assertEqual(6.0, GridCache(path=path).lookup('f', lambda x, y: None, 2.0, 3.0))
+            self.assertFalse(os.path.exists(f"{path}.lock"))
@@ -1,3 +1,4 @@
+import numpy as np
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.forestry.preprocessing import naslund
 from tests.forestry import test_util
@@ -18,6 +19,14 @@ class TestNaslund(test_util.ConverterTestSuite):
         ]
         self.run_with_test_assertions(assertions, naslund.naslund_height)
 
+    def test_naslund_heights(self):
+        diameters = [0.0, 10.0, 10.0, 20.0, 10.0, 20.0, 10.0]
+        species = [TreeSpecies.PINE, TreeSpecies.PINE, TreeSpecies.DOUGLAS_FIR, TreeSpecies.SPRUCE,
+                   TreeSpecies.SPRUCE, TreeSpecies.SILVER_BIRCH, None]
+        result = naslund.naslund_heights(diameters, species)
+        self.assertTrue(np.isnan(result[0]))
+        self.assertEqual([14.58, 14.58, 17.1, 9.85, 13.45, 10.38], result[1:].tolist())
+
     def test_naslund_correction(self):
         assertions = [
             ([2, 10.0, 12.0], 1.22),
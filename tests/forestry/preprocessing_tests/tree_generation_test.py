@@ -41,6 +41,27 @@ class TestTreeGeneration(unittest.TestCase):
         self.assertEqual(17.4, result[0].height)
         self.assertEqual(1.9357767362985978, result[0].stems_per_ha)
 
+    def test_trees_from_weibull_strata(self):
+        inputs = [
+            self.Input(TreeSpecies.PINE, 28.0, 27.0, 22.0, None, None, None, None, None),
+            self.Input(TreeSpecies.SPRUCE, 12.0, 8.0, 11.0, None, None, None, None, None),
+            # heights rounded halfway, where np.round differs from round()
+            self.Input(TreeSpecies.PINE, 35.9, 2.9, 9.0, None, None, None, None, None),
+            self.Input(TreeSpecies.SILVER_BIRCH, 0.0, 8.0, 11.0, None, None, None, None, None),
+        ]
+        strata = self.create_test_stratums(inputs)
+        result = tree_generation.trees_from_weibull_strata(strata, n_trees=10)
+        self.assertEqual(4, len(result))
+        for stratum, trees in zip(strata[:3], result):
+            expected = tree_generation.trees_from_weibull(stratum, n_trees=10)
+            self.assertEqual(10, len(trees))
+            for e, t in zip(expected, trees):
+                self.assertAlmostEqual(e.stems_per_ha, t.stems_per_ha, places=9)
+                self.assertAlmostEqual(e.breast_height_diameter, t.breast_height_diameter, places=9)
+                self.assertEqual(e.height, t.height)
+        # left to trees_from_weibull to report
+        self.assertIsNone(result[3])
+
     def test_finalize_trees(self):
         n_trees = 4
         stratum = TreeStratum()
@@ -20,3 +20,18 @@ class RUtilsTest(unittest.TestCase):
 
         result = r_utils.lmfor_volume(fixture)
         self.assertAlmostEqual(147.55, result, 0)
+
+    def test_lmfor_volumes(self):
+        stands = [ForestStand(degree_days=720.3), ForestStand(degree_days=1200.0), ForestStand(degree_days=900.0)]
+        stands[0].reference_trees = [
+            ReferenceTree(height=10.4, breast_height_diameter=20.3, species=TreeSpecies.PINE),
+            ReferenceTree(height=13.4, breast_height_diameter=14.3, species=TreeSpecies.SILVER_BIRCH)
+        ]
+        stands[2].reference_trees = [
+            ReferenceTree(height=17.0, breast_height_diameter=22.0, species=TreeSpecies.SPRUCE)
+        ]
+        volumes, offsets = r_utils.lmfor_volumes(stands)
+        self.assertEqual([0, 2, 2, 3], offsets.tolist())
+        self.assertEqual(3, len(volumes))
+        for i, stand in enumerate(stands):
+            self.assertAlmostEqual(r_utils.lmfor_volume(stand), volumes[offsets[i]:offsets[i + 1]].sum())
@@ -1,10 +1,40 @@
 import unittest
+from collections.abc import Callable
 from lukefi.metsi.data.model import ForestStand, ReferenceTree
 from lukefi.metsi.data.enums.internal import TreeSpecies
 from lukefi.metsi.forestry.harvest import thinning
 from lukefi.metsi.forestry import forestry_utils as futil
 
 
+def iterative_thinning_oracle(
+        stand: ForestStand,
+        thinning_factor: float,
+        thin_predicate: Callable,
+        extra_factor_solver: Callable
+) -> ForestStand:
+    """ Iteratively decreases the stem count of stand reference trees until stoppin condition is met.
+
+    The parameter :extra_factor_solver: may be used to customize the removal of stems.
+    If given as (lambda i,n,c: 0) removes same amount of stems from each tree (a.k.a even thinning).
+
+    :param stand: Forest stand instance of forestdatamodel library
+    :param thinning_factor: Intensity of the thinning on each iteration
+    :param thin_predicate: Condition to stop thinning
+    :param extra_factor_solver: Gradually increasing proportion of removal
+    """
+    n = len(stand.reference_trees)
+    c = thinning_factor
+
+    while thin_predicate(stand):
+        # cut until lower bound reached
+        for i, rt in enumerate(stand.reference_trees):
+            thin_factor = c + extra_factor_solver(i, n, c)
+            thin_factor = 1.0 if thin_factor > 1.0 else thin_factor
+            rt.stems_per_ha *= thin_factor
+
+    return stand
+
+
 class ThinningTest(unittest.TestCase):
 
     def test_iterative_thinning(self):
@@ -19,11 +49,33 @@ class ThinningTest(unittest.TestCase):
             for spe, d, f, id in zip(species, diameters, stems, ids)
         ]
         thinning_factor = 0.97
-        basal_area_upper_bound = 18.0
-        thin_predicate = lambda stand: basal_area_upper_bound < futil.overall_basal_area(stand.reference_trees)
+        basal_area_bound = 18.0
         extra_factor_solver = lambda i, n ,c: 0
-        thinning.iterative_thinning(stand, thinning_factor, thin_predicate, extra_factor_solver)
+        thinning.iterative_thinning_to_bound(stand, thinning_factor, basal_area_bound, extra_factor_solver)
         self.assertEqual(3, len(stand.reference_trees))
         self.assertEqual(171.747, round(stand.reference_trees[0].stems_per_ha, 3))
         self.assertEqual(172.606, round(stand.reference_trees[1].stems_per_ha, 3))
         self.assertEqual(173.464, round(stand.reference_trees[2].stems_per_ha, 3))
+
+    def test_iterative_thinning_to_bound(self):
+        for measure, total, extra_factor_solver in (
+                ('basal_area', futil.overall_basal_area, lambda i, n, c: 0),
+                ('stems_per_ha', futil.overall_stems_per_ha, lambda i, n, c: (1.0 - c) * i / n)):
+            stands = []
+            for _ in range(2):
+                stand = ForestStand()
+                stand.reference_trees = [
+                    ReferenceTree(breast_height_diameter=5.0 + 1.5 * i, stems_per_ha=100.0 + 13 * i)
+                    for i in range(20)
+                ]
+                stands.append(stand)
+            bound = 0.4 * total(stands[0].reference_trees)
+            iterative_thinning_oracle(stands[0], 0.97, lambda s: bound <= total(s.reference_trees), extra_factor_solver)
+            thinning.iterative_thinning_to_bound(stands[1], 0.97, bound, extra_factor_solver, measure)
+            self.assertEqual([t.stems_per_ha for t in stands[0].reference_trees],
+                             [t.stems_per_ha for t in stands[1].reference_trees])
+
+    def test_iterative_thinning_to_unreachable_bound(self):
+        stand = ForestStand()
+        stand.reference_trees = [ReferenceTree(breast_height_diameter=20.0, stems_per_ha=200.0)]
+        self.assertRaises(UserWarning, thinning.iterative_thinning_to_bound, stand, 1.0, 1.0, lambda i, n, c: 0)
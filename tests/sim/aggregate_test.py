@@ -1,8 +1,9 @@
 from dataclasses import dataclass
 import unittest
 from collections import OrderedDict
-from copy import deepcopy
-from lukefi.metsi.sim.core_types import CollectedData
+from copy import copy, deepcopy
+from types import SimpleNamespace
+from lukefi.metsi.sim.core_types import CollectedData, TimeIndexedResults
 
 class AggregateUtilsTest(unittest.TestCase):
 
@@ -40,3 +41,46 @@ class AggregateUtilsTest(unittest.TestCase):
         result = deepcopy(self.collected_data)
         result.store('oper3', new_collected_data)
         self.assertEqual(fixture.operation_results, result.operation_results)
+
+    def test_list_results_are_time_indexed(self):
+        collected_data = CollectedData()
+        collected_data.extend_list_result('oper', [
+            SimpleNamespace(time_point=5, a=1),
+            SimpleNamespace(time_point=0, a=2),
+            SimpleNamespace(time_point=5, a=3),
+            SimpleNamespace(time_point=10, a=4)
+        ])
+        result = collected_data.get_list_result('oper')
+        self.assertIsInstance(result, TimeIndexedResults)
+        self.assertEqual([2, 1, 3, 4], [r.a for r in result])
+        self.assertEqual([2, 1, 3], [r.a for r in result.between(0, 10)])
+        self.assertEqual([1, 3], [r.a for r in result.at(5)])
+        self.assertEqual([], result.at(7))
+        self.assertEqual([4], [r.a for r in result.after(5)])
+
+    def test_time_indexed_results_survive_copy(self):
+        collected_data = CollectedData(operation_results={'oper': [SimpleNamespace(time_point=1)]})
+        collected_data.extend_list_result('oper', [SimpleNamespace(time_point=2)])
+        copied = copy(collected_data)
+        copied.extend_list_result('oper', [SimpleNamespace(time_point=3)])
+        self.assertEqual(2, len(collected_data.get_list_result('oper')))
+        self.assertIsInstance(copied.get_list_result('oper'), TimeIndexedResults)
+        self.assertEqual(1, len(copied.get_list_result('oper').after(2)))
+
+    def test_time_indexed_results_keep_index_in_sync(self):
+        first, second, third = (SimpleNamespace(time_point=t) for t in (1, 2, 3))
+        result = TimeIndexedResults([third, first, second])
+        self.assertIs(third, result.pop())
+        self.assertEqual([], result.at(3))
+        result.remove(first)
+        self.assertEqual([second], result.between(0, 3))
+        for mutation in (
+            lambda: result.insert(0, first),
+            lambda: result.__setitem__(0, first),
+            lambda: result.__delitem__(0),
+            result.sort,
+            result.reverse
+        ):
+            self.assertRaises(TypeError, mutation)
+        self.assertEqual([second], result)
+        self.assertEqual([second], result.after(1))
@@ -1,7 +1,7 @@
 import unittest
 from lukefi.metsi.sim.util import merge_operation_params, get_operation_file_params
 import tests.test_utils
-from lukefi.metsi.sim.operations import prepared_operation, _get_operation_last_run
+from lukefi.metsi.sim.operations import prepared_operation, _get_operation_last_run, stand_local, is_stand_local
 
 
 class SimOperationsTest(unittest.TestCase):
@@ -48,3 +48,14 @@ class SimOperationsTest(unittest.TestCase):
         self.assertEqual(_get_operation_last_run(operation_history, "operationX"), None)
 
 
+
+    def test_stand_local(self):
+        @stand_local("debug")
+        def operation(stands, **operation_params):
+            _ = operation_params
+            return stands
+
+        self.assertTrue(is_stand_local(operation, {}))
+        self.assertTrue(is_stand_local(operation, {"debug": False}))
+        self.assertFalse(is_stand_local(operation, {"debug": True}))
+        self.assertFalse(is_stand_local(prepared_operation, {}))